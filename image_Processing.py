@@ -1,17 +1,58 @@
+import sys
+import time
+
+# Startup timing (imports, window, deferred panels) is reported under Settings > Performance Stats.
+STARTED = (time.perf_counter(), time.process_time())
+
+# Command-line runs are dispatched before anything below is imported, so they never load Tk.
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from image_cli import main
+    sys.exit(main())
+
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
-from tkinter import Tk, filedialog, Button, Label, Frame, Canvas, messagebox, ttk, Menu, PhotoImage, Toplevel, StringVar
+from tkinter import Tk, filedialog, Button, Label, Frame, Canvas, messagebox, ttk, Menu, PhotoImage, Toplevel, StringVar, Text
 from PIL import Image, ImageTk
-from scipy.fft import fft2, fftshift
-from scipy.stats import skew, kurtosis
 import logging
 import os
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import math
+import zlib
+import queue
+import threading
+import multiprocessing
+import sqlite3
+from collections import OrderedDict
+import image_engine as engine
+import image_io
+import image_profiler
+from image_batch import BatchExecutor
+from image_graph import OperationGraph
+from image_cache import ResultCache, image_digest
+from image_manifest import BatchManifest, pipeline_signature, output_name
+from image_video import VideoPipeline, VIDEO_EXTENSIONS
+
+IMPORTED = (time.perf_counter(), time.process_time())
 
 # Logging setup
 logging.basicConfig(filename='image_app.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Gradient operators and Canny threshold modes offered in the Analysis section, by combobox label.
+GRADIENT_OPERATORS = OrderedDict([('Sobel', 'sobel'), ('Scharr', 'scharr')])
+CANNY_THRESHOLDS = OrderedDict([('Fixed 100/200', None), ('Auto (median)', 'median'), ('Auto (Otsu)', 'otsu')])
+
+# Median/bilateral implementations offered in the Enhancements section, by combobox label.
+FILTER_METHODS = OrderedDict([('Auto', 'auto'), ('Exact', 'exact'), ('Fast', 'fast')])
+
+# Frequency-domain filters offered in the Enhancements section, by combobox label.
+FREQUENCY_FILTERS = OrderedDict([('Low-pass', 'lowpass_filter'), ('High-pass', 'highpass_filter'), ('Band-pass', 'bandpass_filter')])
+
+# matplotlib and its Tk backend take longer to import than the rest of the app together and only
+# the histogram and FFT windows use them, so they are imported on first use.
+def _plotting():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    return Figure, FigureCanvasTkAgg
+
 # ToolTip Class for user guidance
 class ToolTip:
     def __init__(self, widget, text):
@@ -44,18 +85,422 @@ class SectionFrame(Frame):
         self.content_frame = Frame(self, bg="#ecf0f1")
         self.content_frame.pack(fill='x', padx=5, pady=5)
 
+# HistoryStore Class for undo/redo within a memory budget
+class HistoryStore:
+    # ROI edits keep only the before/after patches; global edits keep a compressed snapshot of the
+    # previous image (the "after" image is captured when the step is undone). Oldest steps are
+    # evicted once the stored bytes exceed byte_budget.
+    def __init__(self, byte_budget=512 * 1024 * 1024, compression_level=1):
+        self.byte_budget = byte_budget
+        self.compression_level = compression_level
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def reset(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def clear_redo(self):
+        self.redo_stack.clear()
+
+    # Region the next undo/redo will rewrite (None for a whole-image step).
+    def undo_rect(self):
+        return self.undo_stack[-1].rect if self.undo_stack else None
+
+    def redo_rect(self):
+        return self.redo_stack[-1].rect if self.redo_stack else None
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def nbytes(self):
+        return sum(entry.nbytes() for entry in self.undo_stack + self.redo_stack)
+
+    # make_entry only compresses and may run on a worker thread; push updates the stacks.
+    def make_entry(self, before, after=None, rect=None):
+        if rect is not None:
+            return HistoryEntry(self._pack(before), self._pack(after), rect)
+        return HistoryEntry(self._pack(before))
+
+    def push(self, entry):
+        self.redo_stack.clear()
+        self.undo_stack.append(entry)
+        self._evict()
+
+    def record(self, before, after=None, rect=None):
+        self.push(self.make_entry(before, after, rect))
+
+    def undo(self, current):
+        entry = self.undo_stack.pop()
+        if entry.rect is not None:
+            current = self._write_patch(current, entry.rect, entry.before)
+        else:
+            entry.after = self._pack(current)
+            current = self._unpack(entry.before)
+        self.redo_stack.append(entry)
+        self._evict()
+        return current, entry.rect
+
+    def redo(self, current):
+        entry = self.redo_stack.pop()
+        if entry.rect is not None:
+            current = self._write_patch(current, entry.rect, entry.after)
+        else:
+            current = self._unpack(entry.after)
+            entry.after = None
+        self.undo_stack.append(entry)
+        return current, entry.rect
+
+    def _write_patch(self, current, rect, blob):
+        x1, y1, x2, y2 = rect
+        current[y1:y2, x1:x2] = self._unpack(blob)
+        return current
+
+    def _evict(self):
+        # Oldest undo steps go first, then the farthest redo steps; the nearest step of each is
+        # always kept so a single large edit can still be undone and redone.
+        total = self.nbytes()
+        while total > self.byte_budget:
+            if len(self.undo_stack) > 1:
+                entry = self.undo_stack.pop(0)
+            elif len(self.redo_stack) > 1:
+                entry = self.redo_stack.pop(0)
+            else:
+                break
+            total -= entry.nbytes()
+
+    def _pack(self, img):
+        # Horizontal delta filter (as PNG's "Sub" filter) before deflate: neighbouring pixels are
+        # similar, so the residuals compress much better than raw pixels.
+        img = np.ascontiguousarray(img)
+        residual = img.copy()
+        if img.ndim >= 2 and img.shape[1] > 1:
+            np.subtract(img[:, 1:], img[:, :-1], out=residual[:, 1:])
+        return (zlib.compress(residual.tobytes(), self.compression_level), img.shape, img.dtype)
+
+    def _unpack(self, blob):
+        data, shape, dtype = blob
+        residual = np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(shape)
+        if len(shape) >= 2 and shape[1] > 1:
+            return np.cumsum(residual, axis=1, dtype=dtype)
+        return residual.copy()
+
+# HistoryEntry Class for a single undo step
+class HistoryEntry:
+    def __init__(self, before, after=None, rect=None):
+        self.before = before
+        self.after = after
+        self.rect = rect
+
+    def nbytes(self):
+        return sum(len(blob[0]) for blob in (self.before, self.after) if blob is not None)
+
+# ImagePyramid Class for lazily built mipmap levels of the processed image
+class ImagePyramid:
+    # Level k is the image downsampled by 2**k. Levels are split into tiles that are computed on
+    # first access from the level below, so only tiles that are actually displayed get built, and
+    # an ROI edit only invalidates the tiles it overlaps.
+    def __init__(self, tile_size=256, min_size=32):
+        self.tile_size = tile_size
+        self.min_size = min_size
+        self.levels = []
+        self.valid = []
+
+    @property
+    def base(self):
+        return self.levels[0] if self.levels else None
+
+    def set_image(self, image):
+        self.levels = [image] if image is not None else []
+        self.valid = [None]
+        if image is None:
+            return
+        h, w = image.shape[:2]
+        while min(h, w) // 2 >= self.min_size:
+            h, w = h // 2, w // 2
+            self.levels.append(np.empty((h, w) + image.shape[2:], dtype=image.dtype))
+            self.valid.append(np.zeros((-(-h // self.tile_size), -(-w // self.tile_size)), dtype=bool))
+
+    def invalidate(self, rect):
+        x1, y1, x2, y2 = rect
+        for k in range(1, len(self.levels)):
+            t = self.tile_size << k
+            self.valid[k][y1 // t:-(-y2 // t), x1 // t:-(-x2 // t)] = False
+
+    # Picks the smallest level that still has at least the display resolution.
+    def level_for_zoom(self, zoom):
+        if zoom >= 1 or len(self.levels) <= 1:
+            return 0
+        return min(len(self.levels) - 1, int(math.floor(math.log2(1 / zoom))))
+
+    # Returns level k cropped to (x0, y0, x1, y1) in that level's coordinates, building any
+    # missing tiles in the region first.
+    def region(self, k, x0, y0, x1, y1):
+        if k > 0:
+            t = self.tile_size
+            level = self.levels[k]
+            valid = self.valid[k]
+            for ty in range(y0 // t, -(-y1 // t)):
+                for tx in range(x0 // t, -(-x1 // t)):
+                    if valid[ty, tx]:
+                        continue
+                    ty0, tx0 = ty * t, tx * t
+                    ty1, tx1 = min(ty0 + t, level.shape[0]), min(tx0 + t, level.shape[1])
+                    src = self.region(k - 1, 2 * tx0, 2 * ty0, 2 * tx1, 2 * ty1)
+                    level[ty0:ty1, tx0:tx1] = cv2.resize(src, (tx1 - tx0, ty1 - ty0), interpolation=cv2.INTER_AREA)
+                    valid[ty, tx] = True
+        return self.levels[k][y0:y1, x0:x1]
+
+# HistogramState Class for per-channel histograms kept current across ROI edits
+class HistogramState:
+    # An ROI edit subtracts the histogram of the replaced patch and adds that of the new one, so
+    # the histogram (and the statistics derived from its moments) is never rescanned after one.
+    # Any other edit leaves the stored version behind and the next reader recounts.
+    def __init__(self):
+        self.counts = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def current(self, version):
+        with self.lock:
+            if self.version != version:
+                return None
+            return {name: counts.copy() for name, counts in self.counts.items()}
+
+    def reset(self, counts, version):
+        with self.lock:
+            self.counts = {name: c.copy() for name, c in counts.items()}
+            self.version = version
+
+    def update_region(self, before, after, old_version, new_version):
+        with self.lock:
+            if self.version != old_version or before.shape != after.shape:
+                return False
+            old, new = engine.histogram(before), engine.histogram(after)
+            for name in self.counts:
+                self.counts[name] += new[name] - old[name]
+            self.version = new_version
+            return True
+
+# ViewportRenderer Class for scaling only the visible part of the image, with a frame cache
+class ViewportRenderer:
+    def __init__(self, cache_size=8):
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    # The image is centered on the canvas at the given zoom. Returns the visible region in image
+    # coordinates and the canvas position of the image's top-left corner.
+    @staticmethod
+    def viewport(image_shape, zoom, canvas_size):
+        canvas_w, canvas_h = canvas_size
+        img_h, img_w = image_shape[:2]
+        offset_x = (canvas_w - int(img_w * zoom)) // 2
+        offset_y = (canvas_h - int(img_h * zoom)) // 2
+        x0 = max(0, int(-offset_x / zoom))
+        y0 = max(0, int(-offset_y / zoom))
+        x1 = min(img_w, int(math.ceil((canvas_w - offset_x) / zoom)))
+        y1 = min(img_h, int(math.ceil((canvas_h - offset_y) / zoom)))
+        return (x0, y0, x1, y1), (offset_x, offset_y)
+
+    def cached(self, version, zoom, canvas_size, high_quality):
+        key = (version, zoom, canvas_size, high_quality)
+        frame = self.cache.get(key)
+        if frame is not None:
+            self.cache.move_to_end(key)
+        return frame
+
+    # Returns the visible region scaled to display size as (pixels, left, top, origin), where origin
+    # is the image coordinate of its top-left pixel, or None if nothing is visible. The region is
+    # read from the pyramid level nearest to the zoom, so zoomed-out views never touch
+    # full-resolution pixels.
+    def visible_region(self, pyramid, zoom, canvas_size, high_quality):
+        (x0, y0, x1, y1), (offset_x, offset_y) = self.viewport(pyramid.base.shape, zoom, canvas_size)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        left, top = offset_x + int(round(x0 * zoom)), offset_y + int(round(y0 * zoom))
+        width = max(1, offset_x + int(round(x1 * zoom)) - left)
+        height = max(1, offset_y + int(round(y1 * zoom)) - top)
+        k = pyramid.level_for_zoom(zoom)
+        level_h, level_w = pyramid.levels[k].shape[:2]
+        lx0, ly0 = min(x0 >> k, level_w - 1), min(y0 >> k, level_h - 1)
+        lx1, ly1 = max(lx0 + 1, min(level_w, -(-x1 >> k))), max(ly0 + 1, min(level_h, -(-y1 >> k)))
+        crop = pyramid.region(k, lx0, ly0, lx1, ly1)
+        if (width, height) != (crop.shape[1], crop.shape[0]):
+            if high_quality:
+                interpolation = cv2.INTER_AREA if width < crop.shape[1] else cv2.INTER_CUBIC
+            else:
+                interpolation = cv2.INTER_NEAREST
+            crop = cv2.resize(crop, (width, height), interpolation=interpolation)
+        return crop, left, top, (x0, y0)
+
+    # Returns (PhotoImage, left, top) for the visible region, or None if nothing is visible.
+    def render(self, pyramid, version, zoom, canvas_size, high_quality):
+        frame = self.cached(version, zoom, canvas_size, high_quality)
+        if frame is not None:
+            return frame
+        region = self.visible_region(pyramid, zoom, canvas_size, high_quality)
+        if region is None:
+            return None
+        pixels, left, top, _ = region
+        frame = (ImageTk.PhotoImage(image=Image.fromarray(pixels)), left, top)
+        for key in [key for key in self.cache if key[0] != version]:
+            del self.cache[key]
+        self.cache[(version, zoom, canvas_size, high_quality)] = frame
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return frame
+
+# ScheduledJob Class for one queued operation
+class ScheduledJob:
+    def __init__(self, key, label, compute, prepare, commit):
+        self.key = key
+        self.label = label
+        self.compute = compute
+        self.prepare = prepare
+        self.commit = commit
+        self.cancelled = False
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.started = None
+
+# OperationScheduler Class for running operations off the Tk main thread
+class OperationScheduler:
+    # Jobs run one at a time in submission order: prepare() on the main thread, compute(inputs, job)
+    # on a worker thread, then commit(result) back on the main thread (polled with root.after, as
+    # Tk must only be touched from the main thread). A queued job that has not started yet is
+    # replaced by a newer submission with the same key. Long computations may update job.progress
+    # (0..1) and check job.cancelled.
+    def __init__(self, root, status_label, poll_ms=50):
+        self.root = root
+        self.status_label = status_label
+        self.poll_ms = poll_ms
+        self.pending = []
+        self.current = None
+        self.done = queue.Queue()
+        self.poll_job = None
+
+    def busy(self):
+        return self.current is not None
+
+    def submit(self, key, label, compute=None, prepare=None, commit=None):
+        job = ScheduledJob(key, label, compute, prepare, commit)
+        for i, queued in enumerate(self.pending):
+            if key is not None and queued.key == key:
+                self.pending[i] = job
+                break
+        else:
+            self.pending.append(job)
+        self._start_next()
+
+    def cancel(self):
+        # OpenCV calls cannot be interrupted, so a running job is detached and its result dropped.
+        if self.current is None and not self.pending:
+            return
+        if self.current is not None:
+            self.current.cancelled = True
+            logging.info(f"Cancelled {self.current.label}")
+            self.current = None
+        self.pending.clear()
+        self.status_label.config(text="Operation cancelled")
+
+    def _start_next(self):
+        while self.current is None and self.pending:
+            job = self.pending.pop(0)
+            try:
+                inputs = job.prepare() if job.prepare else None
+                if job.compute is None:
+                    if job.commit:
+                        job.commit(inputs)
+                    continue
+            except Exception as e:
+                self._fail(job, e)
+                continue
+            self.current = job
+            job.started = time.perf_counter()
+            threading.Thread(target=self._run, args=(job, inputs), daemon=True).start()
+            self._show_progress()
+            if self.poll_job is None:
+                self.poll_job = self.root.after(self.poll_ms, self._poll)
+
+    def _run(self, job, inputs):
+        try:
+            job.result = job.compute(inputs, job)
+        except Exception as e:
+            job.error = e
+        self.done.put(job)
+
+    def _poll(self):
+        self.poll_job = None
+        while True:
+            try:
+                job = self.done.get_nowait()
+            except queue.Empty:
+                break
+            if job.cancelled or job is not self.current:
+                continue
+            self.current = None
+            try:
+                if job.error is not None:
+                    raise job.error
+                if job.commit:
+                    job.commit(job.result)
+            except Exception as e:
+                self._fail(job, e)
+        self._start_next()
+        if self.current is not None:
+            self._show_progress()
+            if self.poll_job is None:
+                self.poll_job = self.root.after(self.poll_ms, self._poll)
+
+    def _show_progress(self):
+        job = self.current
+        progress = f" {job.progress * 100:.0f}%" if job.progress is not None else ""
+        queued = f", {len(self.pending)} queued" if self.pending else ""
+        self.status_label.config(text=f"Running {job.label}...{progress} ({time.perf_counter() - job.started:.1f}s{queued}, Esc to cancel)")
+
+    def _fail(self, job, e):
+        messagebox.showerror("Error", f"Operation failed: {str(e)}")
+        logging.error(f"Operation failed: {str(e)}")
+
 # Main Application Class
 class ImageProcessingApp:
     def __init__(self):
         self.original_image = None
+        self.image_path = None
         self.processed_image = None
-        self.history = []
-        self.future_history = []
-        self.history_limit = 50
+        self.encoder_options = dict(image_io.ENCODER_DEFAULTS)
+        self.history = HistoryStore(byte_budget=512 * 1024 * 1024)
         self.color_mode = 'grayscale'
         self.selected_roi = None
         self.zoom_factor = 1.0
-        self.setup_gui()
+        self.batch_jobs = os.cpu_count()
+        self.tiled_min_bytes = 64 * 1024 * 1024
+        self.image_version = 0
+        self.renderer = ViewportRenderer()
+        self.pyramid = ImagePyramid()
+        self.refine_job = None
+        self.preview_op = None
+        self.preview_filter = 'gaussian_blur'
+        self.preview_job = None
+        self.instruments = image_profiler.Instrumentation(sinks=[self.log_span])
+        self.instruments.record('startup.imports', IMPORTED[0] - STARTED[0], IMPORTED[1] - STARTED[1])
+        self.trace_sink = None
+        self.stats_window = None
+        self.graph = None
+        self.graph_node = None
+        self.result_cache = ResultCache(max_bytes=256 * 1024 * 1024)
+        self.digest_memo = (None, None)
+        self.histogram_state = HistogramState()
+        self.fft_display_size = 1024
+        self.live_histogram = None
+        self.live_histogram_job = None
+        with self.instruments.span('startup.window'):
+            self.setup_gui()
+        self.root.mainloop()
 
     def setup_gui(self):
         self.root = Tk()
@@ -75,6 +520,10 @@ class ImageProcessingApp:
         menu_bar.add_cascade(label="Help", menu=help_menu)
         settings_menu = Menu(menu_bar, tearoff=0)
         settings_menu.add_command(label="Toggle Theme", command=self.toggle_theme)
+        settings_menu.add_command(label="Performance Stats", command=self.show_performance_stats)
+        settings_menu.add_command(label="Save Options...", command=self.show_encoder_options)
+        self.lazy_var = StringVar(value="0")
+        settings_menu.add_checkbutton(label="Lazy Evaluation", variable=self.lazy_var, onvalue="1", offvalue="0", command=self.toggle_lazy)
         menu_bar.add_cascade(label="Settings", menu=settings_menu)
 
         # Title
@@ -104,6 +553,7 @@ class ImageProcessingApp:
 
         # Status elements
         self._setup_status_elements()
+        self.scheduler = OperationScheduler(self.root, self.status_label)
 
         # Bind shortcuts
         self._bind_shortcuts()
@@ -114,8 +564,6 @@ class ImageProcessingApp:
         # Update color widgets state initially
         self.update_color_widgets_state()
 
-        self.root.mainloop()
-
     def _setup_frames(self, left_frame):
         file_frame = SectionFrame(left_frame, "File Controls")
         self._setup_file_frame(file_frame.content_frame)
@@ -133,9 +581,16 @@ class ImageProcessingApp:
         self._setup_color_frame(color_frame.content_frame)
         color_frame.pack(fill='x', padx=5, pady=15)
 
-        analysis_frame = SectionFrame(left_frame, "Analysis Tools")
-        self._setup_analysis_frame(analysis_frame.content_frame)
-        analysis_frame.pack(fill='x', padx=5, pady=15)
+        # The analysis tools are the least used section and sit at the bottom of the panel; they
+        # are built once the rest of the window has been drawn.
+        self.root.after_idle(self._setup_deferred_frames, left_frame)
+
+    def _setup_deferred_frames(self, left_frame):
+        with self.instruments.span('startup.panels'):
+            analysis_frame = SectionFrame(left_frame, "Analysis Tools")
+            self._setup_analysis_frame(analysis_frame.content_frame)
+            analysis_frame.pack(fill='x', padx=5, pady=15)
+        self.instruments.record('startup.total', time.perf_counter() - STARTED[0], time.process_time() - STARTED[1])
 
     def _setup_file_frame(self, frame):
         # Row 1: Load, Save, Undo, Redo, Reset
@@ -187,6 +642,11 @@ class ImageProcessingApp:
         self.add_hover_effect(btn_zoom_out)
         ToolTip(btn_zoom_out, "Zoom out on the image")
 
+        self.preview_var = StringVar(value="0")
+        preview_check = ttk.Checkbutton(file_row2, text="Live Preview", variable=self.preview_var, onvalue="1", offvalue="0", command=self.update_preview)
+        preview_check.pack(side='left', padx=5)
+        ToolTip(preview_check, "Preview parameter changes on the visible area; press the operation's button to apply")
+
     def _setup_transform_frame(self, frame):
         # Row 1: Halve Resolution, Negative, Rotate 90°, Flip Horizontal
         transform_row1 = Frame(frame, bg="#ecf0f1")
@@ -212,6 +672,7 @@ class ImageProcessingApp:
         self.log_c_entry = ttk.Entry(log_row, width=8)
         self.log_c_entry.insert(0, "1.0")
         self.log_c_entry.pack(side='left', padx=5)
+        self.bind_preview(self.log_c_entry, 'log_transform')
         ToolTip(self.log_c_entry, "Scaling factor for log transform")
         btn_log = Button(log_row, text="Log", command=self.log_transform, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
         btn_log.pack(side='left', padx=5)
@@ -225,12 +686,14 @@ class ImageProcessingApp:
         self.gamma_entry = ttk.Entry(gamma_row, width=8)
         self.gamma_entry.insert(0, "1.0")
         self.gamma_entry.pack(side='left', padx=5)
+        self.bind_preview(self.gamma_entry, 'gamma_transform')
         ToolTip(self.gamma_entry, "Gamma value for power-law transform")
         c_label = Label(gamma_row, text="c:", bg="#ecf0f1", fg="#2c3e50")
         c_label.pack(side='left', padx=5)
         self.c_entry = ttk.Entry(gamma_row, width=8)
         self.c_entry.insert(0, "1.0")
         self.c_entry.pack(side='left', padx=5)
+        self.bind_preview(self.c_entry, 'gamma_transform')
         ToolTip(self.c_entry, "Scaling factor for gamma transform")
         btn_gamma = Button(gamma_row, text="Gamma", command=self.gamma_transform, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
         btn_gamma.pack(side='left', padx=5)
@@ -244,6 +707,7 @@ class ImageProcessingApp:
         self.rotate_angle_entry = ttk.Entry(rotate_row, width=8)
         self.rotate_angle_entry.insert(0, "0")
         self.rotate_angle_entry.pack(side='left', padx=5)
+        self.bind_preview(self.rotate_angle_entry, 'rotate_any')
         ToolTip(self.rotate_angle_entry, "Rotation angle in degrees")
         btn_rotate_any = Button(rotate_row, text="Rotate", command=self.rotate_any, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
         btn_rotate_any.pack(side='left', padx=5)
@@ -284,7 +748,36 @@ class ImageProcessingApp:
         self.mask_size_entry = ttk.Entry(filter_row, width=8)
         self.mask_size_entry.insert(0, "3")
         self.mask_size_entry.pack(side='left', padx=5)
+        self.bind_preview(self.mask_size_entry, None)
         ToolTip(self.mask_size_entry, "Size of the filter kernel (positive integer)")
+        self.filter_method_var = StringVar(value='Auto')
+        method_combo = ttk.Combobox(filter_row, textvariable=self.filter_method_var, values=list(FILTER_METHODS), state='readonly', width=6)
+        method_combo.pack(side='left', padx=5)
+        method_combo.bind("<<ComboboxSelected>>", lambda e: self.schedule_preview(self.preview_filter))
+        ToolTip(method_combo, "Median/Bilateral: Exact OpenCV filters, Fast constant-time approximations (subsampled median, guided filter), or Auto to switch the median to Fast for large sizes (the bilateral stays Exact)")
+        btn_unsharp = Button(filter_row, text="Unsharp Mask", command=self.unsharp_mask, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
+        btn_unsharp.pack(side='left', padx=5)
+        self.add_hover_effect(btn_unsharp)
+        ToolTip(btn_unsharp, "Sharpen by subtracting a Gaussian blur of the filter size; large sizes run via FFT")
+
+        # Row 4: Frequency-domain filters
+        frequency_row = Frame(frame, bg="#ecf0f1")
+        frequency_row.pack(fill='x', padx=5, pady=5)
+        self.frequency_var = StringVar(value='Low-pass')
+        frequency_combo = ttk.Combobox(frequency_row, textvariable=self.frequency_var, values=list(FREQUENCY_FILTERS), state='readonly', width=10)
+        frequency_combo.pack(side='left', padx=(15,5))
+        frequency_combo.bind("<<ComboboxSelected>>", lambda e: self.schedule_preview('frequency'))
+        ToolTip(frequency_combo, "Gaussian filter applied in the frequency domain")
+        cutoff_label = Label(frequency_row, text="Cutoff:", bg="#ecf0f1", fg="#2c3e50")
+        cutoff_label.pack(side='left', padx=5)
+        self.cutoff_entry = ttk.Entry(frequency_row, width=10)
+        self.cutoff_entry.insert(0, "0.05")
+        self.cutoff_entry.pack(side='left', padx=5)
+        self.bind_preview(self.cutoff_entry, 'frequency')
+        ToolTip(self.cutoff_entry, "Cutoff in cycles per pixel (0-0.5); band-pass takes low-high, e.g. 0.02-0.1")
+        btn_frequency = Button(frequency_row, text="Apply Filter", command=self.frequency_filter, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
+        btn_frequency.pack(side='left', padx=5)
+        self.add_hover_effect(btn_frequency)
 
     def _setup_color_frame(self, frame):
         # Row 1: Saturation
@@ -295,6 +788,7 @@ class ImageProcessingApp:
         self.saturation_entry = ttk.Entry(saturation_row, width=8)
         self.saturation_entry.insert(0, "1.0")
         self.saturation_entry.pack(side='left', padx=5)
+        self.bind_preview(self.saturation_entry, 'adjust_color')
         ToolTip(self.saturation_entry, "Saturation factor (0.0 to 2.0)")
 
         # Row 2: Brightness
@@ -305,6 +799,7 @@ class ImageProcessingApp:
         self.brightness_entry = ttk.Entry(brightness_row, width=8)
         self.brightness_entry.insert(0, "0")
         self.brightness_entry.pack(side='left', padx=5)
+        self.bind_preview(self.brightness_entry, 'adjust_color')
         ToolTip(self.brightness_entry, "Brightness offset (-255 to 255)")
 
         # Row 3: Apply Button
@@ -328,7 +823,7 @@ class ImageProcessingApp:
         btn_edge.pack(side='left', padx=5)
         self.add_hover_effect(btn_edge)
 
-        # Row 2: Stats, Batch Process, FFT
+        # Row 2: Stats, Batch Process, FFT, Process Video
         analysis_row2 = Frame(frame, bg="#ecf0f1")
         analysis_row2.pack(fill='x', padx=5, pady=5)
         btn_stats = Button(analysis_row2, text="Stats", command=self.show_image_stats, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
@@ -340,6 +835,34 @@ class ImageProcessingApp:
         btn_fft = Button(analysis_row2, text="FFT", command=self.show_fft, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
         btn_fft.pack(side='left', padx=5)
         self.add_hover_effect(btn_fft)
+        btn_video = Button(analysis_row2, text="Process Video", command=self.process_video, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
+        btn_video.pack(side='left', padx=5)
+        self.add_hover_effect(btn_video)
+        ToolTip(btn_video, "Run the batch operations over every frame of a video")
+
+        # Row 3: Live Histogram
+        analysis_row3 = Frame(frame, bg="#ecf0f1")
+        analysis_row3.pack(fill='x', padx=5, pady=5)
+        btn_live_hist = Button(analysis_row3, text="Live Histogram", command=self.show_live_histogram, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
+        btn_live_hist.pack(side='left', padx=(15,5))
+        self.add_hover_effect(btn_live_hist)
+        ToolTip(btn_live_hist, "Histogram and statistics of the image (or ROI) that update after every edit")
+        btn_orientation = Button(analysis_row3, text="Orientation", command=self.gradient_orientation, bg="#3498db", fg="white", font=("Arial", 10), relief="flat")
+        btn_orientation.pack(side='left', padx=5)
+        self.add_hover_effect(btn_orientation)
+        ToolTip(btn_orientation, "Gradient direction (hue in color mode, 0-360 degrees as 0-255 in grayscale)")
+
+        # Row 4: Gradient operator, Canny thresholds
+        analysis_row4 = Frame(frame, bg="#ecf0f1")
+        analysis_row4.pack(fill='x', padx=5, pady=5)
+        self.gradient_operator_var = StringVar(value='Sobel')
+        operator_combo = ttk.Combobox(analysis_row4, textvariable=self.gradient_operator_var, values=list(GRADIENT_OPERATORS), state='readonly', width=8)
+        operator_combo.pack(side='left', padx=(15,5))
+        ToolTip(operator_combo, "Derivative operator for Gradient Mag and Orientation")
+        self.canny_var = StringVar(value='Fixed 100/200')
+        canny_combo = ttk.Combobox(analysis_row4, textvariable=self.canny_var, values=list(CANNY_THRESHOLDS), state='readonly', width=14)
+        canny_combo.pack(side='left', padx=5)
+        ToolTip(canny_combo, "Edge Detection thresholds: fixed, or derived from the median or Otsu level of the image")
 
     def _setup_canvas(self):
         self.image_canvas = Canvas(self.root, bd=0, relief="flat", highlightthickness=0, bg="#ffffff")
@@ -361,6 +884,7 @@ class ImageProcessingApp:
         self.root.bind("<Control-y>", lambda e: self.redo())
         self.root.bind("<Control-s>", lambda e: self.save_image())
         self.root.bind("<Control-o>", lambda e: self.load_image())
+        self.root.bind("<Escape>", lambda e: self.scheduler.cancel())
 
     def apply_theme(self):
         bg = "#ecf0f1"
@@ -402,33 +926,167 @@ class ImageProcessingApp:
         about = "Ultimate Image Processing Studio\nVersion 2.0\nDeveloped by @I_am_Programming_the_World\nMIT License"
         messagebox.showinfo("About", about)
 
+    # Performance panel: per-span call counts and timings, refreshed while open, with switches for
+    # memory tracking and cProfile and a JSON lines trace that batch workers append to as well.
+    def show_performance_stats(self):
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        self.stats_window = window = Toplevel(self.root)
+        window.title("Performance Stats")
+        columns = ('calls', 'mean', 'max', 'cpu', 'total', 'memory', 'size')
+        headings = ('Calls', 'Mean ms', 'Max ms', 'CPU ms', 'Total ms', 'Last MB', 'Last Size')
+        tree = ttk.Treeview(window, columns=columns, height=16)
+        tree.heading('#0', text='Span')
+        tree.column('#0', width=200)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=80, anchor='e')
+        tree.pack(fill='both', expand=True, padx=5, pady=5)
+
+        controls = Frame(window, bg="#ecf0f1")
+        controls.pack(fill='x', padx=5, pady=5)
+        memory_var = StringVar(value="1" if self.instruments.trace_memory else "0")
+        ttk.Checkbutton(controls, text="Track Memory", variable=memory_var, onvalue="1", offvalue="0", command=lambda: self.instruments.set_trace_memory(memory_var.get() == "1")).pack(side='left', padx=5)
+        profile_var = StringVar(value="1" if self.instruments.profile else "0")
+        ttk.Checkbutton(controls, text="cProfile", variable=profile_var, onvalue="1", offvalue="0", command=lambda: setattr(self.instruments, 'profile', profile_var.get() == "1")).pack(side='left', padx=5)
+        ttk.Button(controls, text="Profile Report", command=self.show_profile_report).pack(side='left', padx=5)
+        trace_button = ttk.Button(controls, text="Stop Trace" if self.trace_sink else "Start Trace...")
+        trace_button.configure(command=lambda: self.toggle_trace(trace_button))
+        trace_button.pack(side='left', padx=5)
+        ttk.Button(controls, text="Reset", command=self.instruments.reset).pack(side='left', padx=5)
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for name, s in self.instruments.summary().items():
+                memory = f"{s['bytes'] / 1e6:.1f}" if s['bytes'] is not None else ""
+                size = "x".join(str(n) for n in s['shape']) if s['shape'] else ""
+                tree.insert('', 'end', text=name, values=(s['count'], f"{s['mean_ms']:.1f}", f"{s['max_ms']:.1f}", f"{s['cpu_ms']:.1f}", f"{s['total_ms']:.0f}", memory, size))
+            window.after(1000, refresh)
+        refresh()
+
+    def show_encoder_options(self):
+        dialog = Toplevel(self.root)
+        dialog.title("Save Options")
+        fields = (
+            ('png_compression', "PNG compression (0-9, blank for fast default):"),
+            ('jpeg_quality', "JPEG quality (1-100):"),
+            ('webp_quality', "WebP quality (1-100, 101 lossless):"),
+        )
+        entries = {}
+        for key, text in fields:
+            row = Frame(dialog, bg="#ecf0f1")
+            row.pack(fill='x', padx=10, pady=5)
+            Label(row, text=text, bg="#ecf0f1", fg="#2c3e50").pack(side='left', padx=5)
+            entries[key] = ttk.Entry(row, width=8)
+            value = self.encoder_options[key]
+            entries[key].insert(0, "" if value is None else str(value))
+            entries[key].pack(side='right', padx=5)
+
+        def apply():
+            try:
+                options = {key: int(entry.get()) if entry.get().strip() else None for key, entry in entries.items()}
+                if options['jpeg_quality'] is None or options['webp_quality'] is None:
+                    raise ValueError("JPEG and WebP quality are required.")
+                for ext in ('.png', '.jpg', '.webp'):
+                    image_io.encode_params('image' + ext, options)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            self.encoder_options = options
+            logging.info(f"Save options: {options}")
+            dialog.destroy()
+        ttk.Button(dialog, text="OK", command=apply).pack(pady=10)
+
+    def log_span(self, record):
+        # Display and preview spans fire on every zoom step and keystroke; they only go to the panel.
+        if record['name'].startswith(('display.', 'preview.')):
+            return
+        shape = "x".join(str(n) for n in record.get('shape', ()))
+        logging.info(f"{record['name']}: {record['wall_ms']:.1f} ms wall, {record['cpu_ms']:.1f} ms CPU {shape}".rstrip())
+
+    def show_profile_report(self):
+        if not self.instruments.profile:
+            messagebox.showinfo("Profile", "Enable cProfile in the Performance Stats window, then run some operations.")
+            return
+        report_window = Toplevel(self.root)
+        report_window.title("Profile Report")
+        text = Text(report_window, width=120, height=40, font=("Courier", 9))
+        text.insert('end', self.instruments.profile_report())
+        text.config(state='disabled')
+        text.pack(fill='both', expand=True)
+
+    def toggle_trace(self, button):
+        if self.trace_sink:
+            self.instruments.remove_sink(self.trace_sink)
+            logging.info(f"Stopped trace: {self.trace_sink.path}")
+            self.trace_sink = None
+            button.config(text="Start Trace...")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=[("JSON lines", "*.jsonl"), ("All files", "*.*")])
+        if not file_path:
+            return
+        self.trace_sink = image_profiler.JsonLinesSink(file_path)
+        self.instruments.add_sink(self.trace_sink)
+        button.config(text="Stop Trace")
+        logging.info(f"Tracing to {file_path}")
+
     def load_image(self):
         try:
-            file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp"), ("All files", "*.*")])
+            file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.webp"), ("All files", "*.*")])
             if not file_path:
                 return
-            self.original_image = cv2.cvtColor(cv2.imread(file_path, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
-            if self.original_image is None:
-                raise ValueError("Invalid image file.")
-            self.processed_image = cv2.cvtColor(self.original_image, cv2.COLOR_RGB2GRAY) if self.color_mode == 'grayscale' else self.original_image.copy()
-            self.history = [self.processed_image.copy()]
-            self.future_history.clear()
-            self.update_image_display()
-            self.status_label.config(text="Image loaded")
-            logging.info(f"Loaded image: {file_path}")
+            self.scheduler.cancel()
+            # A reduced-resolution decode is shown right away; the full decode runs on the worker
+            # thread, straight into the current mode (grayscale files are never decoded in color).
+            self.show_load_preview(file_path)
+            mode = self.color_mode
+            def decode(inputs, job):
+                with self.instruments.span('load_image', file=file_path) as fields:
+                    img = image_io.read_image(file_path, mode)
+                    fields['shape'] = img.shape
+                return img
+            self.scheduler.submit(None, "Load " + os.path.basename(file_path), decode, commit=lambda img: self.finish_load(file_path, img))
         except Exception as e:
             messagebox.showerror("Error", f"Load failed: {str(e)}")
             logging.error(f"Load failed: {str(e)}")
 
+    def show_load_preview(self, file_path):
+        canvas_w, canvas_h = self.image_canvas.winfo_width(), self.image_canvas.winfo_height()
+        if image_io.preview_factor(file_path, max(canvas_w, canvas_h)) == 1:
+            return
+        with self.instruments.span('load_preview', file=file_path) as fields:
+            preview, factor = image_io.read_preview(file_path, max(canvas_w, canvas_h), self.color_mode)
+            fields['factor'] = factor
+        scale = min(canvas_w / preview.shape[1], canvas_h / preview.shape[0], 1.0)
+        if scale < 1.0:
+            preview = cv2.resize(preview, (max(1, int(preview.shape[1] * scale)), max(1, int(preview.shape[0] * scale))), interpolation=cv2.INTER_AREA)
+        left, top = (canvas_w - preview.shape[1]) // 2, (canvas_h - preview.shape[0]) // 2
+        self.draw_frame((ImageTk.PhotoImage(image=Image.fromarray(preview)), left, top))
+
+    def finish_load(self, file_path, img):
+        self.image_path = file_path
+        self.original_image = img
+        self.processed_image = img.copy()
+        self.history.reset()
+        self.graph = None
+        self.image_changed()
+        self.update_image_display()
+        self.status_label.config(text="Image loaded")
+        logging.info(f"Loaded image: {file_path}")
+
     def save_image(self):
         try:
             if self.processed_image is None:
                 raise ValueError("No image to save.")
-            file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg")])
+            self.materialize()
+            file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg"), ("WebP files", "*.webp")])
             if not file_path:
                 return
-            img = self.processed_image if self.color_mode == 'grayscale' else cv2.cvtColor(self.processed_image, cv2.COLOR_RGB2BGR)
-            cv2.imwrite(file_path, img)
+            with self.instruments.span('save_image', self.processed_image, file=file_path):
+                image_io.write_image(file_path, self.processed_image, self.encoder_options)
             self.status_label.config(text=f"Saved to {os.path.basename(file_path)}")
             logging.info(f"Saved image: {file_path}")
         except Exception as e:
@@ -436,90 +1094,344 @@ class ImageProcessingApp:
             logging.error(f"Save failed: {str(e)}")
 
     def undo(self):
-        if len(self.history) <= 1:
+        if self.scheduler.busy():
+            self.scheduler.submit(None, "Undo", commit=lambda result: self.undo())
+            return
+        if self.graph is not None and self.graph.can_undo():
+            self.graph.undo()
+            self.request_evaluation("Undo successful")
+            return
+        self.graph = None
+        if not self.history.can_undo():
             messagebox.showinfo("Undo", "No more steps to undo!")
             return
-        self.future_history.append(self.processed_image.copy())
-        self.history.pop()
-        self.processed_image = self.history[-1].copy()
+        before = self.region_copy(self.history.undo_rect())
+        with self.instruments.span('history.undo', self.processed_image):
+            self.processed_image, rect = self.history.undo(self.processed_image)
+        self.image_changed(rect, before)
         self.update_image_display()
         self.status_label.config(text="Undo successful")
         logging.info("Undo performed")
 
     def redo(self):
-        if not self.future_history:
+        if self.scheduler.busy():
+            self.scheduler.submit(None, "Redo", commit=lambda result: self.redo())
+            return
+        if self.graph is not None and self.graph.can_redo():
+            self.graph.redo()
+            self.request_evaluation("Redo successful")
+            return
+        self.graph = None
+        if not self.history.can_redo():
             messagebox.showinfo("Redo", "No more steps to redo!")
             return
-        self.history.append(self.processed_image.copy())
-        self.processed_image = self.future_history.pop()
+        before = self.region_copy(self.history.redo_rect())
+        with self.instruments.span('history.redo', self.processed_image):
+            self.processed_image, rect = self.history.redo(self.processed_image)
+        self.image_changed(rect, before)
         self.update_image_display()
         self.status_label.config(text="Redo successful")
         logging.info("Redo performed")
 
+    def region_copy(self, rect):
+        if rect is None:
+            return None
+        x1, y1, x2, y2 = rect
+        return self.processed_image[y1:y2, x1:x2].copy()
+
+    def image_changed(self, rect=None, before=None):
+        # Called whenever processed_image is replaced or edited in place (rect: the edited region,
+        # before: its previous pixels, which lets the histogram be updated instead of recounted).
+        self.image_version += 1
+        self.preview_op = None
+        if rect is None or self.pyramid.base is not self.processed_image:
+            self.pyramid.set_image(self.processed_image)
+        else:
+            self.pyramid.invalidate(rect)
+        if rect is not None and before is not None:
+            x1, y1, x2, y2 = rect
+            self.histogram_state.update_region(before, self.processed_image[y1:y2, x1:x2], self.image_version - 1, self.image_version)
+        self.schedule_live_histogram()
+
     def update_image_display(self):
         if self.processed_image is None:
             self.image_canvas.delete("all")
             self.image_canvas.create_text(self.image_canvas.winfo_width() // 2, self.image_canvas.winfo_height() // 2, text="No image loaded", fill="gray", font=("Arial", 14))
             return
-        canvas_width, canvas_height = self.image_canvas.winfo_width(), self.image_canvas.winfo_height()
-        image_height, image_width = self.processed_image.shape[:2]
-        display_width = int(image_width * self.zoom_factor)
-        display_height = int(image_height * self.zoom_factor)
-        img = Image.fromarray(self.processed_image).resize((display_width, display_height), Image.Resampling.LANCZOS)
-        self.imgtk = ImageTk.PhotoImage(image=img)
+        if self.preview_active():
+            self.schedule_preview(self.preview_op)
+            return
+        # Draw a fast nearest-neighbour frame right away and defer the high-quality pass until
+        # zooming/resizing settles; frames are cached per (image version, zoom, canvas size).
+        canvas_size = (self.image_canvas.winfo_width(), self.image_canvas.winfo_height())
+        with self.instruments.span('display.frame', self.processed_image, zoom=self.zoom_factor) as fields:
+            frame = self.renderer.cached(self.image_version, self.zoom_factor, canvas_size, True)
+            fields['cached'] = frame is not None
+            if frame is None:
+                frame = self.renderer.render(self.pyramid, self.image_version, self.zoom_factor, canvas_size, False)
+                if self.refine_job is not None:
+                    self.root.after_cancel(self.refine_job)
+                self.refine_job = self.root.after(150, self.refine_image_display)
+            self.draw_frame(frame)
+
+    def refine_image_display(self):
+        self.refine_job = None
+        if self.processed_image is None or self.preview_active():
+            return
+        canvas_size = (self.image_canvas.winfo_width(), self.image_canvas.winfo_height())
+        with self.instruments.span('display.refine', self.processed_image, zoom=self.zoom_factor):
+            self.draw_frame(self.renderer.render(self.pyramid, self.image_version, self.zoom_factor, canvas_size, True))
+
+    def draw_frame(self, frame):
         self.image_canvas.delete("all")
-        self.image_canvas.create_image(canvas_width // 2, canvas_height // 2, anchor='center', image=self.imgtk)
+        if frame is not None:
+            self.imgtk, left, top = frame
+            self.image_canvas.create_image(left, top, anchor='nw', image=self.imgtk)
         if self.selected_roi:
             x1, y1, x2, y2 = self.map_roi_to_canvas_coords()
             self.image_canvas.create_rectangle(x1, y1, x2, y2, outline="red")
 
-    def save_to_history(self):
-        self.future_history.clear()
-        if len(self.history) >= self.history_limit:
-            self.history.pop(0)
-        self.history.append(self.processed_image.copy())
-
-    def apply_to_image(self, func, *args, **kwargs):
-        if self.processed_image is None:
+    def bind_preview(self, entry, op):
+        # op None means the filter-size entry, which previews the last used filter.
+        entry.bind("<KeyRelease>", lambda e: self.schedule_preview(op or self.preview_filter))
+
+    def preview_active(self):
+        return self.preview_var.get() == "1" and self.preview_op is not None and self.processed_image is not None
+
+    def schedule_preview(self, op):
+        self.preview_op = op
+        if self.preview_job is not None:
+            self.root.after_cancel(self.preview_job)
+        self.preview_job = self.root.after(150, self.update_preview)
+
+    def read_preview_params(self, op):
+        if op == 'log_transform':
+            return {'c': float(self.log_c_entry.get())}
+        if op == 'gamma_transform':
+            return {'gamma': float(self.gamma_entry.get()), 'c': float(self.c_entry.get())}
+        if op == 'rotate_any':
+            return {'angle': float(self.rotate_angle_entry.get())}
+        if op == 'adjust_color':
+            return {'saturation': float(self.saturation_entry.get()), 'brightness': int(self.brightness_entry.get())}
+        if op == 'frequency':
+            return self.read_frequency_params()[1]
+        if op in ('median_filter', 'bilateral_filter'):
+            return {'size': int(self.mask_size_entry.get()), 'method': FILTER_METHODS[self.filter_method_var.get()]}
+        return {'size': int(self.mask_size_entry.get())}
+
+    # Applies the pending operation to a display-resolution proxy of the visible region only; the
+    # full-resolution image and the history are untouched until the operation's button is pressed.
+    def update_preview(self):
+        self.preview_job = None
+        if not self.preview_active():
+            self.update_image_display()
+            return
+        canvas_size = (self.image_canvas.winfo_width(), self.image_canvas.winfo_height())
+        region = self.renderer.visible_region(self.pyramid, self.zoom_factor, canvas_size, False)
+        if region is None:
             return
+        proxy, left, top, (x0, y0) = region
+        proxy = proxy.copy()
+        zoom = self.zoom_factor
         try:
+            op = self.read_frequency_params()[0] if self.preview_op == 'frequency' else self.preview_op
+            params = self.read_preview_params(self.preview_op)
+            if 'size' in params and params['size'] > 0:
+                # Neighbourhood sizes are in image pixels; scale them to the proxy.
+                params['size'] = max(1, int(round(params['size'] * zoom)) | 1)
+            for key in ('cutoff', 'low', 'high'):
+                if key in params:
+                    # Cutoffs are in cycles per image pixel; a proxy pixel spans 1/zoom of them.
+                    params[key] = min(0.49, params[key] / zoom)
+            target = proxy
             if self.selected_roi:
                 x1, y1, x2, y2 = self.map_roi_to_image_coords()
-                roi = self.processed_image[y1:y2, x1:x2]
-                self.processed_image[y1:y2, x1:x2] = func(roi, *args, **kwargs)
+                px1, py1 = max(0, int((x1 - x0) * zoom)), max(0, int((y1 - y0) * zoom))
+                px2, py2 = min(proxy.shape[1], int((x2 - x0) * zoom)), min(proxy.shape[0], int((y2 - y0) * zoom))
+                if px2 <= px1 or py2 <= py1:
+                    return
+                target = proxy[py1:py2, px1:px2]
+            elif self.preview_op == 'rotate_any':
+                h, w = self.processed_image.shape[:2]
+                params['center'] = ((w // 2 - x0) * zoom, (h // 2 - y0) * zoom)
+            with self.instruments.span('preview.' + op, target):
+                target[...] = engine.apply_operation(target, op, **params)
+        except ValueError as e:
+            self.status_label.config(text=f"Preview: {str(e)}")
+            return
+        self.draw_frame((ImageTk.PhotoImage(image=Image.fromarray(proxy)), left, top))
+        self.status_label.config(text=f"Previewing {op.replace('_', ' ')} (press its button to apply)")
+
+    def apply_to_image(self, func, *args, done_message=None, **kwargs):
+        if self.processed_image is None:
+            return
+        if self.lazy_var.get() == "1" and not self.selected_roi and not args:
+            # Queued behind running work so the graph always extends the latest image.
+            self.scheduler.submit(None, "Lazy " + func.__name__.replace('_', ' '), commit=lambda result: self.add_lazy_node(func.__name__, kwargs, done_message))
+            return
+        # The operation (and compressing its undo step) runs on the scheduler's worker thread;
+        # the ROI is read and the result is written back on the main thread.
+        def prepare():
+            self.flatten_graph()
+            rect = self.map_roi_to_image_coords() if self.selected_roi else None
+            return self.processed_image, rect, self.image_version
+
+        def run(img, job, digest=None):
+            # Large inputs go through the strip-wise engine, which reports progress and can stop
+            # between strips when the job is cancelled; only operations whose strips reproduce the
+            # whole-image result are tiled. Results are copied out of the cache since ROI edits
+            # write into processed_image in place.
+            if args or img.nbytes < self.tiled_min_bytes or not engine.tiles_exactly(func.__name__, kwargs):
+                with self.instruments.span('op.' + func.__name__, img, **kwargs):
+                    if args:
+                        return func(img, *args)
+                    return self.result_cache.cached(img, func.__name__, kwargs, lambda: func(img, **kwargs), copy=True, digest=digest)
+            def progress(fraction):
+                if job.cancelled:
+                    raise RuntimeError("Operation cancelled")
+                job.progress = fraction
+            with self.instruments.span('op.' + func.__name__, img, tiled=True, **kwargs):
+                return engine.run_pipeline_tiled(img, np.empty_like(img), [{'op': func.__name__, **kwargs}], progress=progress)
+
+        def make_entry(before, after=None, rect=None):
+            with self.instruments.span('history.compress', before):
+                return self.history.make_entry(before, after, rect)
+
+        def compute(inputs, job):
+            image, rect, version = inputs
+            if rect:
+                x1, y1, x2, y2 = rect
+                before = image[y1:y2, x1:x2].copy()
+                after = run(before, job)
+                return rect, version, after, make_entry(before, after, rect), before
+            after = run(image, job, self.version_digest(image, version))
+            return rect, version, after, make_entry(image), None
+
+        def commit(result):
+            rect, version, after, entry, before = result
+            if version != self.image_version:
+                logging.warning(f"Discarded {func.__name__}: the image changed while it was running")
+                return
+            if rect:
+                x1, y1, x2, y2 = rect
+                self.processed_image[y1:y2, x1:x2] = after
             else:
-                self.processed_image = func(self.processed_image, *args, **kwargs)
-            self.save_to_history()
+                self.processed_image = after
+            with self.instruments.span('history.push', after) as fields:
+                self.history.push(entry)
+                fields['history_bytes'] = self.history.nbytes()
+            self.image_changed(rect, before)
             self.update_image_display()
-        except Exception as e:
-            messagebox.showerror("Error", f"Operation failed: {str(e)}")
-            logging.error(f"Operation failed: {str(e)}")
+            if done_message:
+                self.status_label.config(text=done_message)
+
+        # Only parameterized operations coalesce: a newer request carries the newer parameters,
+        # while repeated parameterless ones (e.g. three rotations) must all run.
+        label = func.__name__.replace('_', ' ').capitalize()
+        self.scheduler.submit(func.__name__ if kwargs else None, label, compute=compute, prepare=prepare, commit=commit)
+
+    # Lazy mode: operations become nodes of an OperationGraph over the current image and pixels are
+    # evaluated once per burst of clicks (queued evaluations coalesce). Undo/redo walk the graph.
+    # ROI edits, and switching lazy mode off, fold the chain into one ordinary history step.
+    def add_lazy_node(self, name, params, done_message):
+        if self.graph is None:
+            self.graph = OperationGraph(self.processed_image)
+            self.graph_node = self.graph.root
+            self.history.clear_redo()
+        self.graph.apply(name, **params)
+        self.request_evaluation(done_message)
+
+    def request_evaluation(self, done_message=None):
+        graph = self.graph
+        def compute(node, job):
+            with self.instruments.span('graph.evaluate', steps=len(node.steps)) as fields:
+                img = graph.evaluate(node)
+                fields['shape'] = img.shape
+            return node, img
+        def commit(result):
+            node, img = result
+            if graph is not self.graph or node is not graph.head:
+                return
+            self.show_graph_node(node, img)
+            if done_message:
+                self.status_label.config(text=done_message)
+        self.scheduler.submit('graph.evaluate', "Evaluating", prepare=lambda: graph.head, compute=compute, commit=commit)
+
+    def show_graph_node(self, node, img):
+        self.processed_image = img
+        self.graph_node = node
+        self.image_changed()
+        self.update_image_display()
+
+    # Brings processed_image up to date with the graph head for readers outside the scheduler.
+    def materialize(self):
+        if self.graph is not None and self.graph_node is not self.graph.head:
+            self.show_graph_node(self.graph.head, self.graph.evaluate())
+
+    def flatten_graph(self):
+        if self.graph is None:
+            return
+        self.materialize()
+        if self.graph.can_undo():
+            self.history.record(self.graph.source)
+        self.graph = None
+        self.graph_node = None
+
+    def toggle_lazy(self):
+        if self.lazy_var.get() == "0":
+            self.scheduler.submit(None, "Flatten", commit=lambda result: self.flatten_graph())
+
+    # Content digest of processed_image, computed at most once per image version and shared by
+    # the result cache lookups of operations and analysis views.
+    def version_digest(self, img, version):
+        memo_version, digest = self.digest_memo
+        if memo_version != version:
+            digest = image_digest(img)
+            self.digest_memo = (version, digest)
+        return digest
+
+    def cached_analysis(self, name, img, version, **params):
+        return self.result_cache.cached(img, name, params, lambda: getattr(engine, name)(img, **params), digest=self.version_digest(img, version))
+
+    # Whole-image counts, shared by the histogram, stats and live views (statistics come from the
+    # histogram moments): kept current across ROI edits, otherwise recounted through the cache.
+    def full_histogram(self, img, version):
+        counts = self.histogram_state.current(version)
+        if counts is None:
+            counts = self.cached_analysis('histogram', img, version)
+            self.histogram_state.reset(counts, version)
+        return counts
+
+    # Analysis views cover the selected ROI when there is one: (pixels, rect or None).
+    def analysis_region(self):
+        if not self.selected_roi:
+            return self.processed_image, None
+        x1, y1, x2, y2 = rect = self.map_roi_to_image_coords()
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError("The selected ROI does not cover the image.")
+        return self.processed_image[y1:y2, x1:x2], rect
+
+    def region_histogram(self, img, rect, version):
+        return engine.histogram(img) if rect else self.full_histogram(img, version)
 
     def halve_resolution(self):
-        self.apply_to_image(lambda img: cv2.resize(img, (0, 0), fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA))
-        self.status_label.config(text="Resolution halved")
+        self.apply_to_image(engine.halve_resolution, done_message="Resolution halved")
 
     def negative_transform(self):
-        self.apply_to_image(lambda img: 255 - img)
-        self.status_label.config(text="Negative transform applied")
+        self.apply_to_image(engine.negative_transform, done_message="Negative transform applied")
 
     def rotate_90(self):
-        self.apply_to_image(lambda img: cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE))
-        self.status_label.config(text="Rotated 90° clockwise")
+        self.apply_to_image(engine.rotate_90, done_message="Rotated 90° clockwise")
 
     def flip_horizontal(self):
-        self.apply_to_image(cv2.flip, 1)
-        self.status_label.config(text="Flipped horizontally")
+        self.apply_to_image(engine.flip_horizontal, done_message="Flipped horizontally")
 
     def log_transform(self):
         try:
             c = float(self.log_c_entry.get())
             if c <= 0:
                 raise ValueError("'c' must be positive.")
-            func = lambda img: np.uint8(np.clip(c * np.log1p(img), 0, 255)) if self.color_mode == 'grayscale' else \
-                   np.stack([np.uint8(np.clip(c * np.log1p(img[:, :, i]), 0, 255)) for i in range(3)], axis=2)
-            self.apply_to_image(func)
-            self.status_label.config(text="Log transform applied")
+            self.apply_to_image(engine.log_transform, c=c, done_message="Log transform applied")
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
@@ -529,72 +1441,75 @@ class ImageProcessingApp:
             c = float(self.c_entry.get())
             if gamma <= 0 or c <= 0:
                 raise ValueError("'gamma' and 'c' must be positive.")
-            func = lambda img: np.uint8(np.clip(c * np.power(img / 255.0, gamma) * 255, 0, 255)) if self.color_mode == 'grayscale' else \
-                   np.stack([np.uint8(np.clip(c * np.power(img[:, :, i] / 255.0, gamma) * 255, 0, 255)) for i in range(3)], axis=2)
-            self.apply_to_image(func)
-            self.status_label.config(text="Gamma transform applied")
+            self.apply_to_image(engine.gamma_transform, gamma=gamma, c=c, done_message="Gamma transform applied")
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
     def histogram_equalization(self):
-        if self.processed_image is None:
-            return
-        if self.color_mode == 'grayscale':
-            self.processed_image = cv2.equalizeHist(self.processed_image)
-        else:
-            ycrcb = cv2.cvtColor(self.processed_image, cv2.COLOR_RGB2YCrCb)
-            ycrcb[:, :, 0] = cv2.equalizeHist(ycrcb[:, :, 0])
-            self.processed_image = cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB)
-        self.save_to_history()
-        self.update_image_display()
-        self.status_label.config(text="Histogram equalization applied")
+        self.apply_to_image(engine.histogram_equalization, done_message="Histogram equalization applied")
 
     def sharpen_image(self):
-        kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
-        self.apply_to_image(cv2.filter2D, -1, kernel)
-        self.status_label.config(text="Image sharpened")
+        self.apply_to_image(engine.sharpen_image, done_message="Image sharpened")
 
     def contrast_stretch(self):
-        def stretch(img):
-            if self.color_mode == 'grayscale':
-                min_val, max_val = np.min(img), np.max(img)
-                return np.uint8(255 * (img - min_val) / (max_val - min_val)) if max_val > min_val else img
-            else:
-                for i in range(3):
-                    min_val, max_val = np.min(img[:, :, i]), np.max(img[:, :, i])
-                    if max_val > min_val:
-                        img[:, :, i] = np.uint8(255 * (img[:, :, i] - min_val) / (max_val - min_val))
-                return img
-        self.apply_to_image(stretch)
-        self.status_label.config(text="Contrast stretched")
+        self.apply_to_image(engine.contrast_stretch, done_message="Contrast stretched")
+
+    def read_filter_size(self, odd=True):
+        n = int(self.mask_size_entry.get())
+        if n <= 0 or (odd and n % 2 == 0):
+            raise ValueError("Filter size must be a positive odd integer." if odd else "Filter size must be a positive integer.")
+        return n
 
     def gaussian_blur(self):
+        self.preview_filter = 'gaussian_blur'
         try:
-            n = int(self.mask_size_entry.get())
-            if n <= 0 or n % 2 == 0:
-                raise ValueError("Filter size must be a positive odd integer.")
-            self.apply_to_image(cv2.GaussianBlur, (n, n), 0)
-            self.status_label.config(text=f"Gaussian blur applied with filter size {n}")
+            n = self.read_filter_size()
+            self.apply_to_image(engine.gaussian_blur, size=n, done_message=f"Gaussian blur applied with filter size {n}")
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
     def median_filter(self):
+        self.preview_filter = 'median_filter'
         try:
-            n = int(self.mask_size_entry.get())
-            if n <= 0 or n % 2 == 0:
-                raise ValueError("Filter size must be a positive odd integer.")
-            self.apply_to_image(cv2.medianBlur, n)
-            self.status_label.config(text=f"Median filter applied with filter size {n}")
+            n = self.read_filter_size()
+            method = FILTER_METHODS[self.filter_method_var.get()]
+            self.apply_to_image(engine.median_filter, size=n, method=method, done_message=f"Median filter applied with filter size {n}")
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
     def bilateral_filter(self):
+        self.preview_filter = 'bilateral_filter'
+        try:
+            n = self.read_filter_size(odd=False)
+            method = FILTER_METHODS[self.filter_method_var.get()]
+            self.apply_to_image(engine.bilateral_filter, size=n, method=method, done_message=f"Bilateral filter applied with filter size {n}")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def unsharp_mask(self):
+        self.preview_filter = 'unsharp_mask'
+        try:
+            n = self.read_filter_size()
+            self.apply_to_image(engine.unsharp_mask, size=n, done_message=f"Unsharp mask applied with filter size {n}")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    # Returns (operation name, params) for the selected frequency filter and cutoff text.
+    def read_frequency_params(self):
+        op = FREQUENCY_FILTERS[self.frequency_var.get()]
+        text = self.cutoff_entry.get().strip()
+        if op == 'bandpass_filter':
+            low, sep, high = text.partition('-')
+            if not sep:
+                raise ValueError("Band-pass cutoff must be given as low-high, e.g. 0.02-0.1.")
+            return op, {'low': float(low), 'high': float(high)}
+        return op, {'cutoff': float(text)}
+
+    def frequency_filter(self):
         try:
-            n = int(self.mask_size_entry.get())
-            if n <= 0:
-                raise ValueError("Filter size must be a positive integer.")
-            self.apply_to_image(cv2.bilateralFilter, n, 75, 75)
-            self.status_label.config(text=f"Bilateral filter applied with filter size {n}")
+            op, params = self.read_frequency_params()
+            func = engine.get_operation(op)
+            self.apply_to_image(func, done_message=f"{self.frequency_var.get()} filter applied", **params)
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
@@ -607,13 +1522,7 @@ class ImageProcessingApp:
             bright = int(self.brightness_entry.get())
             if not (0 <= sat <= 2) or not (-255 <= bright <= 255):
                 raise ValueError("Saturation must be 0.0-2.0, brightness -255 to 255.")
-            hsv = cv2.cvtColor(self.processed_image, cv2.COLOR_RGB2HSV)
-            hsv[:, :, 1] = np.clip(hsv[:, :, 1] * sat, 0, 255)
-            hsv[:, :, 2] = np.clip(hsv[:, :, 2] + bright, 0, 255)
-            self.processed_image = cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
-            self.save_to_history()
-            self.update_image_display()
-            self.status_label.config(text="Color adjusted")
+            self.apply_to_image(engine.adjust_color, saturation=sat, brightness=bright, done_message="Color adjusted")
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
@@ -621,19 +1530,29 @@ class ImageProcessingApp:
         if self.processed_image is None:
             messagebox.showerror("Error", "No image loaded.")
             return
+        self.materialize()
+        try:
+            region, rect = self.analysis_region()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        counts = self.region_histogram(region, rect, self.image_version)
+        scope = "ROI " if rect else ""
         hist_window = Toplevel(self.root)
-        hist_window.title("Histogram")
-        fig = plt.Figure(figsize=(6, 4))
+        hist_window.title(f"{scope}Histogram")
+        Figure, FigureCanvasTkAgg = _plotting()
+        fig = Figure(figsize=(6, 4))
         ax = fig.add_subplot(111)
+        levels = np.arange(256)
         if self.color_mode == 'grayscale':
-            ax.hist(self.processed_image.ravel(), bins=256, color='gray')
-            ax.set_title('Grayscale Histogram')
+            ax.bar(levels, counts['Gray'], width=1.0, color='gray')
+            ax.set_title(f'{scope}Grayscale Histogram')
         else:
             colors = ['r', 'g', 'b']
-            for i, color in enumerate(colors):
-                ax.hist(self.processed_image[:, :, i].ravel(), bins=256, color=color, alpha=0.5, label=f'{color.upper()} Channel')
+            for color, channel_counts in zip(colors, counts.values()):
+                ax.bar(levels, channel_counts, width=1.0, color=color, alpha=0.5, label=f'{color.upper()} Channel')
             ax.legend()
-            ax.set_title('Color Histogram')
+            ax.set_title(f'{scope}Color Histogram')
         canvas = FigureCanvasTkAgg(fig, master=hist_window)
         canvas.draw()
         canvas.get_tk_widget().pack(fill='both', expand=True)
@@ -642,85 +1561,132 @@ class ImageProcessingApp:
         if self.processed_image is None:
             messagebox.showerror("Error", "No image loaded.")
             return
-        if self.color_mode == 'grayscale':
-            sobelx = cv2.Sobel(self.processed_image, cv2.CV_64F, 1, 0, ksize=3)
-            sobely = cv2.Sobel(self.processed_image, cv2.CV_64F, 0, 1, ksize=3)
-            mag = np.sqrt(sobelx**2 + sobely**2)
-            self.processed_image = np.uint8(255 * mag / np.max(mag))
-        else:
-            mags = []
-            for i in range(3):
-                sobelx = cv2.Sobel(self.processed_image[:, :, i], cv2.CV_64F, 1, 0, ksize=3)
-                sobely = cv2.Sobel(self.processed_image[:, :, i], cv2.CV_64F, 0, 1, ksize=3)
-                mag = np.sqrt(sobelx**2 + sobely**2)
-                mags.append(np.uint8(255 * mag / np.max(mag)))
-            self.processed_image = np.stack(mags, axis=2)
-        self.save_to_history()
-        self.update_image_display()
-        self.status_label.config(text="Gradient magnitude computed")
+        operator = GRADIENT_OPERATORS[self.gradient_operator_var.get()]
+        self.apply_to_image(engine.gradient_magnitude, operator=operator, done_message="Gradient magnitude computed")
+
+    def gradient_orientation(self):
+        if self.processed_image is None:
+            messagebox.showerror("Error", "No image loaded.")
+            return
+        operator = GRADIENT_OPERATORS[self.gradient_operator_var.get()]
+        self.apply_to_image(engine.gradient_orientation, operator=operator, done_message="Gradient orientation computed")
 
     def edge_detection(self):
         if self.processed_image is None:
             messagebox.showerror("Error", "No image loaded.")
             return
-        if self.color_mode == 'grayscale':
-            self.processed_image = cv2.Canny(self.processed_image, 100, 200)
-        else:
-            gray = cv2.cvtColor(self.processed_image, cv2.COLOR_RGB2GRAY)
-            self.processed_image = cv2.cvtColor(cv2.Canny(gray, 100, 200), cv2.COLOR_GRAY2RGB)
-        self.save_to_history()
-        self.update_image_display()
-        self.status_label.config(text="Edge detection applied")
+        auto = CANNY_THRESHOLDS[self.canny_var.get()]
+        params = {'auto': auto} if auto else {}
+        self.apply_to_image(engine.edge_detection, done_message="Edge detection applied", **params)
 
     def show_image_stats(self):
         if self.processed_image is None:
             messagebox.showerror("Error", "No image loaded.")
             return
+        def prepare():
+            region, rect = self.analysis_region()
+            return region.copy() if rect else region, rect, self.image_version
+        def compute(inputs, job):
+            region, rect, version = inputs
+            counts = self.region_histogram(region, rect, version)
+            return {name: engine.histogram_stats(c) for name, c in counts.items()}, "ROI Statistics" if rect else "Image Statistics"
+        self.scheduler.submit('show_image_stats', "Image statistics", prepare=prepare, compute=compute, commit=lambda result: self.display_image_stats(*result))
+
+    def display_image_stats(self, image_stats, title="Image Statistics"):
         stats = ""
-        if self.color_mode == 'grayscale':
-            data = self.processed_image.ravel()
-            stats = f"Mean: {np.mean(data):.2f}\nStd Dev: {np.std(data):.2f}\nMin: {np.min(data)}\nMax: {np.max(data)}\nSkewness: {skew(data):.2f}\nKurtosis: {kurtosis(data):.2f}"
-        else:
-            colors = ['Red', 'Green', 'Blue']
-            for i, color in enumerate(colors):
-                data = self.processed_image[:, :, i].ravel()
-                stats += f"{color} - Mean: {np.mean(data):.2f}, Std Dev: {np.std(data):.2f}, Min: {np.min(data)}, Max: {np.max(data)}, Skew: {skew(data):.2f}, Kurt: {kurtosis(data):.2f}\n"
-        messagebox.showinfo("Image Statistics", stats)
+        for name, s in image_stats.items():
+            if self.color_mode == 'grayscale':
+                stats = f"Mean: {s['mean']:.2f}\nStd Dev: {s['std']:.2f}\nMin: {s['min']}\nMax: {s['max']}\nSkewness: {s['skew']:.2f}\nKurtosis: {s['kurtosis']:.2f}"
+            else:
+                stats += f"{name} - Mean: {s['mean']:.2f}, Std Dev: {s['std']:.2f}, Min: {s['min']}, Max: {s['max']}, Skew: {s['skew']:.2f}, Kurt: {s['kurtosis']:.2f}\n"
+        self.status_label.config(text="Ready")
+        messagebox.showinfo(title, stats)
+
+    # Live histogram: redrawn (debounced) after every edit and ROI change. Whole-image counts come
+    # from the incrementally maintained HistogramState; an ROI is counted directly.
+    def show_live_histogram(self):
+        if self.live_histogram is not None and self.live_histogram[0].winfo_exists():
+            self.live_histogram[0].lift()
+            return
+        window = Toplevel(self.root)
+        window.title("Live Histogram")
+        Figure, FigureCanvasTkAgg = _plotting()
+        fig = Figure(figsize=(6, 4))
+        ax = fig.add_subplot(111)
+        canvas = FigureCanvasTkAgg(fig, master=window)
+        canvas.get_tk_widget().pack(fill='both', expand=True)
+        stats_label = Label(window, text="", font=("Courier", 9), justify='left', anchor='w')
+        stats_label.pack(fill='x', padx=5, pady=5)
+        self.live_histogram = (window, ax, canvas, stats_label)
+        self.refresh_live_histogram()
+
+    def schedule_live_histogram(self):
+        if self.live_histogram is None:
+            return
+        if self.live_histogram_job is not None:
+            self.root.after_cancel(self.live_histogram_job)
+        self.live_histogram_job = self.root.after(100, self.refresh_live_histogram)
+
+    def refresh_live_histogram(self):
+        self.live_histogram_job = None
+        if self.live_histogram is None:
+            return
+        window, ax, canvas, stats_label = self.live_histogram
+        if not window.winfo_exists():
+            self.live_histogram = None
+            return
+        ax.clear()
+        lines = []
+        try:
+            if self.processed_image is not None:
+                region, rect = self.analysis_region()
+                counts = self.region_histogram(region, rect, self.image_version)
+                colors = {'Gray': 'gray', 'Red': 'r', 'Green': 'g', 'Blue': 'b'}
+                for name, c in counts.items():
+                    ax.plot(np.arange(256), c, color=colors[name], drawstyle='steps-mid', label=name)
+                    s = engine.histogram_stats(c)
+                    lines.append(f"{name:<5} mean {s['mean']:7.2f}  std {s['std']:6.2f}  min {s['min']:3d}  max {s['max']:3d}  skew {s['skew']:6.2f}  kurt {s['kurtosis']:6.2f}")
+                ax.set_xlim(0, 255)
+                ax.set_title("ROI Histogram" if rect else "Histogram")
+        except ValueError as e:
+            lines = [str(e)]
+        stats_label.config(text="\n".join(lines))
+        canvas.draw_idle()
 
     def show_fft(self):
         if self.processed_image is None:
             messagebox.showerror("Error", "No image loaded.")
             return
+        self.scheduler.submit('show_fft', "FFT", prepare=lambda: (self.processed_image, self.image_version), compute=lambda inputs, job: self.cached_analysis('fft_magnitude', *inputs, max_size=self.fft_display_size), commit=self.display_fft)
+
+    def display_fft(self, spectra):
         fft_window = Toplevel(self.root)
         fft_window.title("Frequency Spectrum")
-        fig = plt.figure(figsize=(12, 4))
-        if self.color_mode == 'color':
+        # A standalone Figure (not pyplot's) is released with its window.
+        Figure, FigureCanvasTkAgg = _plotting()
+        fig = Figure(figsize=(12, 4))
+        if len(spectra) > 1:
             axes = fig.subplots(1, 3)
-            colors = ['Red', 'Green', 'Blue']
-            for i, ax in enumerate(axes):
-                f = fftshift(fft2(self.processed_image[:, :, i]))
-                magnitude_spectrum = 20 * np.log(np.abs(f) + 1)
+            for ax, (name, magnitude_spectrum) in zip(axes, spectra.items()):
                 ax.imshow(magnitude_spectrum, cmap='gray')
-                ax.set_title(f'{colors[i]} Channel')
-            plt.tight_layout()
+                ax.set_title(f'{name} Channel')
+            fig.tight_layout()
         else:
-            f = fftshift(fft2(self.processed_image))
-            magnitude_spectrum = 20 * np.log(np.abs(f) + 1)
-            plt.imshow(magnitude_spectrum, cmap='gray')
-            plt.title('Grayscale')
+            ax = fig.add_subplot(111)
+            ax.imshow(spectra['Gray'], cmap='gray')
+            ax.set_title('Grayscale')
         canvas = FigureCanvasTkAgg(fig, master=fft_window)
         canvas.draw()
         canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.status_label.config(text="Ready")
 
-    def batch_process(self):
-        files = filedialog.askopenfilenames(filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp")])
-        if not files:
-            return
+    # Asks which operations to run over several files or frames; returns engine steps, or None.
+    def select_batch_steps(self):
         operations = [
-            ("Negative Transform", self.negative_transform),
-            ("Histogram Equalization", self.histogram_equalization),
-            ("Gaussian Blur", self.gaussian_blur),
-            ("Median Filter", self.median_filter)
+            ("Negative Transform", "negative_transform"),
+            ("Histogram Equalization", "histogram_equalization"),
+            ("Gaussian Blur", "gaussian_blur"),
+            ("Median Filter", "median_filter")
         ]
         selected_ops = []
         dialog = Toplevel(self.root)
@@ -734,37 +1700,142 @@ class ImageProcessingApp:
         dialog.wait_window()
         selected_names = [name for name, var in selected_ops if var.get() == "1"]
         if not selected_names:
+            return None
+        try:
+            steps = []
+            for name, op in operations:
+                if name in selected_names:
+                    params = {'size': self.read_filter_size()} if op in ('gaussian_blur', 'median_filter') else {}
+                    steps.append({'op': op, **params})
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return None
+        return steps
+
+    def batch_process(self):
+        files = filedialog.askopenfilenames(filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp")])
+        if not files:
+            return
+        steps = self.select_batch_steps()
+        if not steps:
             return
 
-        for i, file in enumerate(files):
-            img = cv2.imread(file, cv2.IMREAD_COLOR)
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            for op_name in selected_names:
-                for name, func in operations:
-                    if name == op_name:
-                        self.processed_image = img
-                        func()
-                        img = self.processed_image
-                        break
-            base, ext = os.path.splitext(file)
-            output_path = f"{base}_processed{ext}"
-            counter = 1
-            while os.path.exists(output_path):
-                output_path = f"{base}_processed_{counter}{ext}"
-                counter += 1
-            cv2.imwrite(output_path, cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
-        messagebox.showinfo("Batch Process", f"Processed {len(files)} images.")
-        self.status_label.config(text="Batch process completed")
+        # Outputs are named after the pipeline (file_processed_<signature>.ext) and recorded in a
+        # manifest next to the inputs, so re-running the same batch skips files already done.
+        encoder_options = None if self.encoder_options == image_io.ENCODER_DEFAULTS else self.encoder_options
+        signature = pipeline_signature(steps, encoder_options=encoder_options)
+        tasks = [(file, output_name(file, signature)) for file in files]
+        try:
+            manifest = BatchManifest(os.path.join(os.path.dirname(files[0]), '.image_batch_manifest.sqlite'))
+            tasks, skipped = manifest.plan(tasks, signature)
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Batch process failed: {str(e)}")
+            logging.error(f"Batch process failed: {str(e)}")
+            return
+        trace_path = self.trace_sink.path if self.trace_sink else None
+        executor = BatchExecutor(steps, jobs=self.batch_jobs, ordered=False, mp_context=multiprocessing.get_context('spawn'), trace_path=trace_path, hash_inputs=True, encoder_options=self.encoder_options)
+        results = queue.Queue()
+        def run_batch():
+            try:
+                for result in executor.run(tasks):
+                    manifest.record(result, signature)
+                    results.put(result)
+            except Exception as e:
+                logging.error(f"Batch process failed: {str(e)}")
+            finally:
+                manifest.close()
+            results.put(None)
+        threading.Thread(target=run_batch, daemon=True).start()
+        self.status_label.config(text=f"Batch processing {len(skipped)}/{len(files)}...")
+        self.poll_batch(results, len(files), len(skipped), 0, len(skipped))
+
+    def poll_batch(self, results, total, done, failed, skipped=0):
+        while True:
+            try:
+                result = results.get_nowait()
+            except queue.Empty:
+                break
+            if result is None:
+                summary = f"Processed {done - failed - skipped} of {total} images."
+                if skipped:
+                    summary += f" {skipped} unchanged since the last run were skipped."
+                if failed:
+                    summary += f" {failed} failed, see image_app.log."
+                messagebox.showinfo("Batch Process", summary)
+                self.status_label.config(text="Batch process completed")
+                return
+            done += 1
+            if result.skipped:
+                skipped += 1
+            elif result.error:
+                failed += 1
+                logging.error(f"Batch process failed for {result.input_path}: {result.error}")
+        self.status_label.config(text=f"Batch processing {done}/{total}...")
+        self.root.after(100, self.poll_batch, results, total, done, failed, skipped)
+
+    # Streams a video through the selected operations on background threads (decode, process and
+    # encode overlap), reporting progress in the status bar.
+    def process_video(self):
+        input_path = filedialog.askopenfilename(filetypes=[("Video files", " ".join('*' + ext for ext in VIDEO_EXTENSIONS)), ("All files", "*.*")])
+        if not input_path:
+            return
+        steps = self.select_batch_steps()
+        if not steps:
+            return
+        output_path = filedialog.asksaveasfilename(defaultextension=".mp4", filetypes=[("MP4 video", "*.mp4"), ("AVI video", "*.avi")])
+        if not output_path:
+            return
+        if os.path.abspath(output_path) == os.path.abspath(input_path):
+            messagebox.showerror("Error", "Output must differ from the input video.")
+            return
+        trace_path = self.trace_sink.path if self.trace_sink else None
+        pipeline = VideoPipeline(steps, workers=max(1, min(4, (self.batch_jobs or 1) - 1)), instruments=image_profiler.for_trace(trace_path))
+        outcome = {}
+        def run_video():
+            try:
+                outcome['stats'] = pipeline.run(input_path, output_path, encoder_options=self.encoder_options)
+            except Exception as e:
+                outcome['error'] = e
+        thread = threading.Thread(target=run_video, daemon=True)
+        thread.start()
+        self.poll_video(pipeline, thread, outcome, output_path)
+
+    def poll_video(self, pipeline, thread, outcome, output_path):
+        if thread.is_alive():
+            total = f"/{pipeline.frame_count}" if pipeline.frame_count else ""
+            self.status_label.config(text=f"Processing video: {pipeline.frames_done}{total} frames...")
+            self.root.after(200, self.poll_video, pipeline, thread, outcome, output_path)
+            return
+        if 'error' in outcome:
+            messagebox.showerror("Error", f"Video processing failed: {str(outcome['error'])}")
+            logging.error(f"Video processing failed: {str(outcome['error'])}")
+            self.status_label.config(text="Video processing failed")
+            return
+        stats = outcome['stats']
+        logging.info(f"Processed video to {output_path}: {stats['frames']} frames in {stats['seconds']:.1f}s")
+        messagebox.showinfo("Process Video", f"Wrote {stats['frames']} frames to {os.path.basename(output_path)} ({stats['fps']:.1f} fps).")
+        self.status_label.config(text="Video processing completed")
 
     def switch_color_mode(self, event):
         new_mode = self.color_mode_var.get()
         if new_mode == self.color_mode or self.original_image is None:
             return
         if messagebox.askyesno("Confirm Mode Switch", "Switching color mode will reset the history. Proceed?"):
+            self.scheduler.cancel()
+            if new_mode == 'color' and self.original_image.ndim == 2:
+                # Images loaded in grayscale mode were decoded without color; decode it now.
+                try:
+                    self.original_image = image_io.read_image(self.image_path, 'color')
+                except (OSError, ValueError) as e:
+                    self.color_mode_var.set(self.color_mode)
+                    messagebox.showerror("Error", f"Mode switch failed: {str(e)}")
+                    logging.error(f"Mode switch failed: {str(e)}")
+                    return
             self.color_mode = new_mode
-            self.processed_image = cv2.cvtColor(self.original_image, cv2.COLOR_RGB2GRAY) if new_mode == 'grayscale' else self.original_image.copy()
-            self.history = [self.processed_image.copy()]
-            self.future_history.clear()
+            self.processed_image = cv2.cvtColor(self.original_image, cv2.COLOR_RGB2GRAY) if self.original_image.ndim == 3 and new_mode == 'grayscale' else self.original_image.copy()
+            self.history.reset()
+            self.graph = None
+            self.image_changed()
             self.update_image_display()
             self.status_label.config(text=f"Switched to {self.color_mode} mode")
             self.update_color_widgets_state()
@@ -778,10 +1849,13 @@ class ImageProcessingApp:
         self.color_apply_btn.config(state=state)
 
     def reset_app(self):
+        self.scheduler.cancel()
         self.original_image = None
+        self.image_path = None
         self.processed_image = None
-        self.history.clear()
-        self.future_history.clear()
+        self.history.reset()
+        self.graph = None
+        self.image_changed()
         self.selected_roi = None
         self.zoom_factor = 1.0
         self.update_image_display()
@@ -827,6 +1901,7 @@ class ImageProcessingApp:
         self.selected_roi = (self.roi_start[0], self.roi_start[1], event.x, event.y)
         self.status_label.config(text="ROI selected")
         self.update_image_display()
+        self.schedule_live_histogram()
 
     def map_roi_to_image_coords(self):
         if not self.selected_roi:
@@ -855,11 +1930,7 @@ class ImageProcessingApp:
     def rotate_any(self):
         try:
             angle = float(self.rotate_angle_entry.get())
-            h, w = self.processed_image.shape[:2]
-            center = (w // 2, h // 2)
-            M = cv2.getRotationMatrix2D(center, angle, 1.0)
-            self.apply_to_image(cv2.warpAffine, M, (w, h))
-            self.status_label.config(text=f"Rotated by {angle}°")
+            self.apply_to_image(engine.rotate_any, angle=angle, done_message=f"Rotated by {angle}°")
         except ValueError:
             messagebox.showerror("Error", "Invalid angle.")
 
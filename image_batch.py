@@ -0,0 +1,144 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+import numpy as np
+
+import image_engine as engine
+import image_io
+import image_profiler
+from image_cache import ResultCache
+from image_manifest import file_digest
+
+# digest: blake2b of the input file (when the executor hashes inputs); skipped: the input matched
+# the known digest of its last successful run, so nothing was written.
+BatchResult = namedtuple('BatchResult', ['index', 'input_path', 'output_path', 'error', 'digest', 'skipped'], defaults=(None, False))
+
+def _init_worker():
+    # One process per core already saturates the machine; keep OpenCV from oversubscribing it.
+    cv2.setNumThreads(1)
+
+# Worker entry point: decode, run the pipeline and encode one file. Only paths travel between
+# processes, so no pixel data is pickled. With tile_bytes set the pipeline runs strip by strip
+# within that memory budget; .npy inputs/outputs (raw arrays in internal channel order) are then
+# memory-mapped, so images larger than RAM never have to be loaded whole.
+# With a cache, the pipeline output is looked up by the digest of the decoded input, so re-running a
+# batch over unchanged files only decodes and encodes them.
+# encoder_options: see image_io.ENCODER_DEFAULTS.
+def process_file(input_path, output_path, steps, mode='color', tile_bytes=None, instruments=None, cache=None, encoder_options=None):
+    instruments = instruments or image_profiler.DISABLED
+    with instruments.span('batch.file', file=input_path):
+        with instruments.span('batch.decode', file=input_path) as fields:
+            img = image_io.read_image(input_path, mode)
+            fields['shape'] = img.shape
+        with instruments.span('batch.pipeline', img, steps=len(steps)):
+            if cache is not None and not tile_bytes:
+                img = cache.cached(img, 'pipeline', {'steps': steps}, lambda: _run_steps(img, output_path, steps, None, instruments))
+            else:
+                img = _run_steps(img, output_path, steps, tile_bytes, instruments)
+        with instruments.span('batch.encode', img, file=output_path):
+            return image_io.write_image(output_path, img, encoder_options)
+
+def _run_steps(img, output_path, steps, tile_bytes, instruments):
+    if not tile_bytes:
+        img = np.asarray(img)
+        for stage in engine.plan_pipeline(steps):
+            with instruments.span('op.' + stage[0], img):
+                img = engine.run_stage(img, stage)
+        return img
+    if output_path.lower().endswith('.npy'):
+        out = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.uint8, shape=img.shape)
+    else:
+        out = np.empty(img.shape, dtype=np.uint8)
+    return engine.run_pipeline_tiled(img, out, steps, max_bytes=tile_bytes, temp_dir=os.path.dirname(output_path) or None)
+
+# Worker processes keep one disk-only cache per directory; a memory tier would not be reused
+# across different files.
+_worker_caches = {}
+
+def _disk_cache(cache_dir):
+    if not cache_dir:
+        return None
+    if cache_dir not in _worker_caches:
+        _worker_caches[cache_dir] = ResultCache(max_bytes=0, disk_dir=cache_dir)
+    return _worker_caches[cache_dir]
+
+def _run_task(index, task, steps, mode, tile_bytes=None, trace_path=None, cache_dir=None, hash_inputs=False, encoder_options=None):
+    input_path, output_path = task[:2]
+    known_digest = task[2] if len(task) > 2 else None
+    digest = None
+    try:
+        if hash_inputs or known_digest:
+            digest = file_digest(input_path)
+            if digest == known_digest:
+                return BatchResult(index, input_path, output_path, None, digest, True)
+        process_file(input_path, output_path, steps, mode, tile_bytes, image_profiler.for_trace(trace_path), _disk_cache(cache_dir), encoder_options)
+        return BatchResult(index, input_path, output_path, None, digest)
+    except Exception as e:
+        return BatchResult(index, input_path, output_path, str(e), digest)
+
+# BatchExecutor Class for fanning files out over a process pool
+class BatchExecutor:
+    # trace_path: JSON lines file that every worker appends per-file decode/pipeline/encode spans to.
+    # cache_dir: on-disk result cache shared by the workers (ignored in tiled mode).
+    # hash_inputs: report each input file's digest in its result (for a BatchManifest).
+    # encoder_options: PNG/JPEG/WebP settings for the outputs (see image_io.ENCODER_DEFAULTS).
+    def __init__(self, steps, jobs=None, prefetch=2, ordered=True, mode='color', mp_context=None, tile_bytes=None, trace_path=None, cache_dir=None, hash_inputs=False, encoder_options=None):
+        self.steps = list(steps)
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        # At most jobs * prefetch files are in flight (queued or being decoded), which bounds the
+        # number of decoded images alive at once regardless of the batch size.
+        self.max_pending = self.jobs * max(1, prefetch)
+        self.ordered = ordered
+        self.mode = mode
+        self.mp_context = mp_context
+        self.tile_bytes = tile_bytes
+        self.trace_path = trace_path
+        self.cache_dir = cache_dir
+        self.hash_inputs = hash_inputs
+        self.encoder_options = dict(encoder_options or {})
+        for ext in ('.png', '.jpg', '.webp'):
+            image_io.encode_params('image' + ext, self.encoder_options)
+        for step in self.steps:
+            engine.validate_step(step)
+        if tile_bytes:
+            for name, _ in engine.plan_pipeline(self.steps):
+                if name != 'point_ops' and not engine.is_tileable(name):
+                    raise ValueError(f"{name} cannot run in tiled mode.")
+
+    # tasks: iterable of (input_path, output_path) or (input_path, output_path, known_digest).
+    # Yields a BatchResult per task, in input order when ordered=True, otherwise as soon as each
+    # file finishes.
+    def run(self, tasks):
+        options = (self.steps, self.mode, self.tile_bytes, self.trace_path, self.cache_dir, self.hash_inputs, self.encoder_options)
+        if self.jobs == 1:
+            for index, task in enumerate(tasks):
+                yield _run_task(index, task, *options)
+            return
+        with ProcessPoolExecutor(max_workers=self.jobs, mp_context=self.mp_context, initializer=_init_worker) as pool:
+            task_iter = enumerate(tasks)
+            pending = set()
+            finished = {}
+            next_index = 0
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self.max_pending:
+                    try:
+                        index, task = next(task_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(_run_task, index, tuple(task), *options))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if not self.ordered:
+                        yield result
+                    else:
+                        finished[result.index] = result
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
@@ -0,0 +1,124 @@
+import json
+import platform
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import image_engine as engine
+
+# Benchmark harness: runs every engine operation over synthetic grayscale and RGB images and
+# reports throughput and peak temporary memory, optionally against a saved baseline.
+SIZES = {
+    'thumb': (256, 256),
+    '1mp': (1000, 1000),
+    '12mp': (3000, 4000),
+    '24mp': (4000, 6000),
+    '50mp': (5800, 8620),
+}
+DEFAULT_SIZES = ['thumb', '1mp', '12mp']
+MODES = ['grayscale', 'color']
+
+# Smooth gradients plus noise, so edge detectors and histogram-based operations see realistic data.
+def synthetic_image(size, mode, seed=0):
+    h, w = SIZES[size]
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    base = [(xx * 255 / w), (yy * 255 / h), ((xx + yy) * 127 / (w + h) + 64)]
+    img = np.dstack(base) if mode == 'color' else base[0]
+    img = img + rng.normal(0, 12, img.shape).astype(np.float32)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+def applicable(name, mode):
+    return not (name == 'adjust_color' and mode == 'grayscale')
+
+def time_operation(func, img, repeat):
+    func(img)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(img)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# Peak bytes allocated through NumPy (including OpenCV results) during one call, above what was
+# live before it. NumPy and OpenCV buffers bypass Python's allocator, so per-allocation counts are
+# not observable here; the peak in units of the output size ("temps") shows how many image-sized
+# buffers an operation keeps alive at once.
+def measure_memory(func, img):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        out = func(img)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before, out.nbytes
+
+def run_benchmarks(sizes=None, modes=None, ops=None, repeat=3, report=print):
+    sizes = sizes or DEFAULT_SIZES
+    modes = modes or MODES
+    ops = ops or list(engine.OPERATIONS)
+    results = {}
+    for size in sizes:
+        for mode in modes:
+            img = synthetic_image(size, mode)
+            megapixels = img.shape[0] * img.shape[1] / 1e6
+            for name in ops:
+                if not applicable(name, mode):
+                    continue
+                func = engine.get_operation(name)
+                seconds = time_operation(func, img, repeat)
+                peak, out_bytes = measure_memory(func, img)
+                result = {
+                    'seconds': seconds,
+                    'mp_per_s': megapixels / seconds if seconds > 0 else float('inf'),
+                    'peak_mb': peak / 1e6,
+                    'temps': peak / out_bytes if out_bytes else 0.0,
+                }
+                results[f"{name}|{mode}|{size}"] = result
+                if report:
+                    report(format_result(name, mode, size, result))
+    return {'meta': environment(), 'results': results}
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'threads': cv2.getNumThreads(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+def format_result(name, mode, size, result):
+    return f"{name:<24} {mode:<9} {size:<6} {result['mp_per_s']:>10.1f} MP/s {result['seconds'] * 1000:>10.2f} ms {result['peak_mb']:>9.1f} MB peak {result['temps']:>6.1f}x temps"
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# Compares throughput against a baseline; returns the keys that got slower than threshold
+# (0.10 = 10% less MP/s) so build machines can fail on regressions.
+def compare_results(current, baseline, threshold=0.10, report=print):
+    regressions = []
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        ratio = result['mp_per_s'] / base['mp_per_s'] if base['mp_per_s'] else float('inf')
+        memory = result['peak_mb'] - base['peak_mb']
+        flag = ''
+        if ratio < 1 - threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        if report:
+            report(f"{key:<44} {ratio:>6.2f}x speed {memory:>+9.1f} MB peak{flag}")
+    return regressions
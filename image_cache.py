@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Content-addressed result cache: results are keyed by (digest of the input pixels, operation,
+# parameters), so the same filter on the same pixels is computed once no matter how the image
+# got there (undo, reload, a batch re-run). An in-memory LRU tier is bounded by bytes; an optional
+# on-disk tier (one .npz file per key, arrays plus a JSON header, never pickles) survives restarts
+# and is shared by batch worker processes.
+
+# Part of every key: bump it whenever an operation's output changes for the same parameters, so
+# results cached by an older version (on disk, possibly by another install) are never returned.
+CACHE_VERSION = 2
+
+# Operations worth caching: hashing the input is one fast pass, so cheap operations (point-op
+# LUTs, flips, quarter turns, 3x3 sharpening, equalization) are faster to recompute than to look up.
+CACHEABLE = {
+    'rotate_any', 'gaussian_blur', 'unsharp_mask', 'lowpass_filter', 'highpass_filter', 'bandpass_filter',
+    'convolve', 'median_filter', 'bilateral_filter', 'adjust_color',
+    'gradient_magnitude', 'gradient_orientation', 'edge_detection', 'histogram', 'image_stats', 'fft_magnitude', 'pipeline',
+}
+
+def image_digest(img):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((img.shape, img.dtype.str)).encode())
+    h.update(np.ascontiguousarray(img).data)
+    return h.hexdigest()
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+# Disk entries hold plain JSON besides their arrays; anything else keeps the value off the disk.
+def _json_scalar(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def make_key(digest, op, params=None):
+    return f"v{CACHE_VERSION}-{digest}-{op}-{json.dumps(params or {}, sort_keys=True, default=_json_default)}"
+
+def value_nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(value_nbytes(v) for v in value.values()) + 64 * len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(value_nbytes(v) for v in value) + 64 * len(value)
+    return 64
+
+# ResultCache Class for the memory and disk tiers
+class ResultCache:
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None, disk_max_bytes=2 * 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.disk_nbytes = None
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    # Cached arrays are returned as-is; callers that may edit the result in place pass copy=True.
+    def get(self, key, copy=False):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+        if value is None:
+            value = self._disk_get(key)
+            if value is not None:
+                self._memory_put(key, value)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value.copy() if copy and isinstance(value, np.ndarray) else value
+
+    def put(self, key, value, copy=False):
+        if copy and isinstance(value, np.ndarray):
+            value = value.copy()
+        self._memory_put(key, value)
+        self._disk_put(key, value)
+
+    # Returns compute() for (img, op, params), looking the result up first when op is cacheable.
+    def cached(self, img, op, params, compute, copy=False, digest=None):
+        if op not in CACHEABLE:
+            return compute()
+        key = make_key(digest or image_digest(img), op, params)
+        value = self.get(key, copy)
+        if value is None:
+            value = compute()
+            self.put(key, value, copy)
+        return value
+
+    def _memory_put(self, key, value):
+        size = value_nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= value_nbytes(self.entries.pop(key))
+            self.entries[key] = value
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= value_nbytes(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '.npz')
+
+    # An entry is the key and the value's layout as JSON ('__meta__') plus one array per ndarray in
+    # the value. Arrays and dicts of arrays and JSON values (pipeline outputs, histograms, stats,
+    # spectra) are stored; anything else stays in memory only.
+    def _disk_encode(self, key, value):
+        if isinstance(value, np.ndarray):
+            meta, arrays = {'key': key, 'kind': 'array'}, {'a0': value}
+        elif isinstance(value, dict) and all(isinstance(k, str) for k in value):
+            names = [k for k, v in value.items() if isinstance(v, np.ndarray)]
+            fields = {k: v for k, v in value.items() if k not in names}
+            meta = {'key': key, 'kind': 'dict', 'order': list(value), 'arrays': names, 'fields': fields}
+            arrays = {f'a{i}': value[k] for i, k in enumerate(names)}
+        else:
+            return None
+        try:
+            meta = json.dumps(meta, default=_json_scalar)
+        except TypeError:
+            return None
+        return {'__meta__': np.array(meta), **arrays}
+
+    def _disk_decode(self, data):
+        meta = json.loads(str(data['__meta__']))
+        if meta['kind'] == 'array':
+            return meta['key'], data['a0']
+        values = dict(meta['fields'])
+        values.update((k, data[f'a{i}']) for i, k in enumerate(meta['arrays']))
+        return meta['key'], {k: values[k] for k in meta['order']}
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                stored_key, value = self._disk_decode(data)
+        except Exception:
+            # Truncated, corrupt or foreign files are misses; remove them so they are rewritten.
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        if stored_key != key:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    # Written to a temporary file and renamed, so concurrent readers never see a partial entry.
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+        arrays = self._disk_encode(key, value)
+        if arrays is None:
+            return
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.disk_dir)
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self._disk_path(key))
+            size = os.path.getsize(self._disk_path(key))
+        except OSError:
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        # The directory is only rescanned once the running estimate (which other processes
+        # sharing it do not update) crosses the limit, not on every write.
+        if self.disk_nbytes is None:
+            self._disk_evict()
+        else:
+            self.disk_nbytes += size
+            if self.disk_nbytes > self.disk_max_bytes:
+                self._disk_evict()
+
+    # Least recently used (by mtime, refreshed on every hit) files go first, down to 90% of the
+    # limit so the next few writes do not trigger another scan.
+    def _disk_evict(self):
+        try:
+            files = [entry for entry in os.scandir(self.disk_dir) if entry.name.endswith('.npz')]
+            stats = [(entry.stat(), entry.path) for entry in files]
+        except OSError:
+            return
+        total = sum(st.st_size for st, _ in stats)
+        target = self.disk_max_bytes if total <= self.disk_max_bytes else self.disk_max_bytes * 0.9
+        for st, path in sorted(stats, key=lambda item: item[0].st_mtime):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= st.st_size
+            except OSError:
+                pass
+        self.disk_nbytes = total
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import sys
+
+import image_engine as engine
+from image_batch import BatchExecutor
+from image_io import IMAGE_EXTENSIONS
+from image_manifest import BatchManifest, pipeline_signature
+
+# A pipeline file is either a list of steps or a mapping with an "operations" list and an optional
+# "mode" ('color' or 'grayscale'). Steps use the engine format: "name" or {"op": name, **params}.
+def load_pipeline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.lower().endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML is required to read YAML pipelines (pip install pyyaml).") from None
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    mode = 'color'
+    if isinstance(data, dict):
+        mode = data.get('mode', mode)
+        data = data.get('operations')
+    if not isinstance(data, list):
+        raise ValueError("Pipeline must be a list of operations or a mapping with an 'operations' list.")
+    if mode not in ('color', 'grayscale'):
+        raise ValueError(f"Invalid mode: {mode}")
+    for step in data:
+        engine.validate_step(step)
+    return data, mode
+
+def collect_inputs(input_path, recursive=False):
+    if os.path.isfile(input_path):
+        return os.path.dirname(input_path), [input_path]
+    if not os.path.isdir(input_path):
+        raise ValueError(f"Input not found: {input_path}")
+    files = []
+    for root, dirs, names in os.walk(input_path):
+        dirs.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not recursive:
+            break
+    return input_path, files
+
+def plan_tasks(input_root, files, output_dir, output_format=None):
+    tasks = []
+    for file in files:
+        rel = os.path.relpath(file, input_root)
+        if output_format:
+            rel = os.path.splitext(rel)[0] + '.' + output_format.lstrip('.')
+        tasks.append((file, os.path.join(output_dir, rel)))
+    return tasks
+
+def cmd_run(args):
+    steps, mode = load_pipeline(args.pipeline)
+    if args.mode:
+        mode = args.mode
+    input_root, files = collect_inputs(args.input, args.recursive)
+    if os.path.isdir(args.input) and os.path.abspath(args.input) == os.path.abspath(args.output):
+        raise ValueError("Output directory must differ from the input directory.")
+    tasks = plan_tasks(input_root, files, args.output, args.format)
+    for output_dir in {os.path.dirname(output_path) for _, output_path in tasks}:
+        os.makedirs(output_dir or '.', exist_ok=True)
+    tile_bytes = int(args.tile_mb * 1024 * 1024) if args.tile_mb else None
+    manifest = BatchManifest(args.manifest) if args.manifest else None
+    encoder_options = {key: value for key, value in (('png_compression', args.png_compression), ('jpeg_quality', args.jpeg_quality), ('webp_quality', args.webp_quality)) if value is not None}
+    signature = pipeline_signature(steps, mode, encoder_options)
+    skipped = []
+    if manifest:
+        tasks, skipped = manifest.plan(tasks, signature, force=args.force)
+    executor = BatchExecutor(steps, jobs=args.jobs, prefetch=args.prefetch, ordered=args.ordered, mode=mode, tile_bytes=tile_bytes, trace_path=args.trace, cache_dir=args.cache_dir, hash_inputs=manifest is not None, encoder_options=encoder_options)
+    failed = processed = 0
+    try:
+        for done, result in enumerate(executor.run(tasks), 1):
+            if manifest:
+                manifest.record(result, signature)
+            if result.skipped:
+                skipped.append((result.input_path, result.output_path))
+            elif result.error:
+                failed += 1
+                print(f"[{done}/{len(tasks)}] FAILED {result.input_path}: {result.error}", file=sys.stderr)
+            else:
+                processed += 1
+                if not args.quiet:
+                    print(f"[{done}/{len(tasks)}] {result.input_path} -> {result.output_path}")
+    finally:
+        if manifest:
+            manifest.close()
+    print(f"Processed {processed} of {len(files)} images." + (f" Skipped {len(skipped)} unchanged." if skipped else ""))
+    return 1 if failed else 0
+
+def cmd_video(args):
+    from image_profiler import for_trace
+    from image_video import VideoPipeline
+    steps, mode = load_pipeline(args.pipeline)
+    if args.mode:
+        mode = args.mode
+    pipeline = VideoPipeline(steps, mode=mode, workers=args.workers, queue_size=args.queue, instruments=for_trace(args.trace))
+    def progress(done, total):
+        if not args.quiet and (done % 50 == 0 or done == total):
+            print(f"[{done}/{total or '?'}] frames", file=sys.stderr)
+    try:
+        stats = pipeline.run(args.input, args.output, fps=args.fps, codec=args.codec, progress=progress)
+    except KeyboardInterrupt:
+        pipeline.stop()
+        raise
+    print(f"Wrote {stats['frames']} frames to {args.output} in {stats['seconds']:.1f}s ({stats['fps']:.1f} fps).")
+    return 0
+
+def cmd_serve(args):
+    from image_profiler import for_trace
+    from image_server import ImageServer
+    server = ImageServer(args.host, args.port, workers=args.workers, max_pending=args.queue, max_body=int(args.max_mb * 1024 * 1024), instruments=for_trace(args.trace))
+    host, port = server.address[:2]
+    print(f"Serving on http://{host}:{port}/ with {server.workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def cmd_list(args):
+    for name, params in engine.describe_operations().items():
+        print(f"{name}({', '.join(f'{k}={v!r}' for k, v in params.items())})")
+    return 0
+
+def cmd_bench(args):
+    import image_bench
+    sizes = args.sizes.split(',') if args.sizes else None
+    for size in sizes or []:
+        if size not in image_bench.SIZES:
+            raise ValueError(f"Unknown size: {size} (choose from {', '.join(image_bench.SIZES)})")
+    ops = args.ops.split(',') if args.ops else None
+    for name in ops or []:
+        engine.get_operation(name)
+    modes = args.modes.split(',') if args.modes else None
+    for mode in modes or []:
+        if mode not in image_bench.MODES:
+            raise ValueError(f"Unknown mode: {mode} (choose from {', '.join(image_bench.MODES)})")
+    baseline = image_bench.load_results(args.compare) if args.compare else None
+    results = image_bench.run_benchmarks(sizes, modes, ops, repeat=args.repeat)
+    if args.save:
+        image_bench.save_results(results, args.save)
+    if baseline:
+        regressions = image_bench.compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.compare}")
+            return 1
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='image_Processing.py', description="Ultimate Image Processing Studio - headless batch processing")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help="Run a pipeline file over an image or a directory of images")
+    run.add_argument('pipeline', help="JSON or YAML pipeline file")
+    run.add_argument('--input', '-i', required=True, help="Input image or directory")
+    run.add_argument('--output', '-o', required=True, help="Output directory")
+    run.add_argument('--jobs', '-j', type=int, default=None, help="Worker processes (default: CPU count)")
+    run.add_argument('--prefetch', type=int, default=2, help="Files queued per worker (default: 2)")
+    run.add_argument('--mode', choices=['color', 'grayscale'], help="Override the pipeline color mode")
+    run.add_argument('--format', help="Output format extension, e.g. png (default: keep input format)")
+    run.add_argument('--png-compression', type=int, help="PNG zlib level 0-9 (default: OpenCV's fast run-length mode)")
+    run.add_argument('--jpeg-quality', type=int, help="JPEG quality 1-100 (default: 95)")
+    run.add_argument('--webp-quality', type=int, help="WebP quality 1-100, 101 for lossless (default: 90)")
+    run.add_argument('--recursive', '-r', action='store_true', help="Recurse into subdirectories")
+    run.add_argument('--tile-mb', type=float, help="Process in strips using at most this many MB per worker (.npy files are memory-mapped)")
+    run.add_argument('--manifest', help="SQLite manifest file; inputs unchanged since their last successful run are skipped")
+    run.add_argument('--force', action='store_true', help="With --manifest, reprocess every input")
+    run.add_argument('--cache-dir', help="Reuse results of unchanged inputs from this cache directory (not with --tile-mb)")
+    run.add_argument('--trace', help="Append per-file and per-operation timings to this JSON lines file")
+    run.add_argument('--ordered', action='store_true', help="Report results in input order")
+    run.add_argument('--quiet', '-q', action='store_true', help="Only report failures and the summary")
+    run.set_defaults(func=cmd_run)
+    video = sub.add_parser('video', help="Stream a video or numbered frame sequence through a pipeline")
+    video.add_argument('pipeline', help="JSON or YAML pipeline file")
+    video.add_argument('--input', '-i', required=True, help="Video file, frame pattern (frames/img_%%04d.png) or directory of frames")
+    video.add_argument('--output', '-o', required=True, help="Video file (.mp4, .avi, ...), frame pattern or directory")
+    video.add_argument('--mode', choices=['color', 'grayscale'], help="Override the pipeline color mode")
+    video.add_argument('--fps', type=float, help="Output frame rate (default: the input's, or 25)")
+    video.add_argument('--codec', help="Four-character codec code (default: by extension, e.g. mp4v for .mp4)")
+    video.add_argument('--workers', type=int, default=1, help="Processing threads (default: 1)")
+    video.add_argument('--queue', type=int, default=8, help="Frames buffered between stages (default: 8)")
+    video.add_argument('--trace', help="Append per-frame timings to this JSON lines file")
+    video.add_argument('--quiet', '-q', action='store_true', help="Only report the summary")
+    video.set_defaults(func=cmd_video)
+    serve = sub.add_parser('serve', help="Serve the operations over HTTP on this machine")
+    serve.add_argument('--host', default='127.0.0.1', help="Address to bind (default: 127.0.0.1)")
+    serve.add_argument('--port', type=int, default=8765, help="Port (default: 8765)")
+    serve.add_argument('--workers', '-j', type=int, default=None, help="Worker processes (default: CPU count)")
+    serve.add_argument('--queue', type=int, default=None, help="Requests admitted at once before answering 429 (default: 4 per worker)")
+    serve.add_argument('--max-mb', type=float, default=64, help="Largest accepted request body in MB (default: 64)")
+    serve.add_argument('--trace', help="Append per-request timings to this JSON lines file")
+    serve.set_defaults(func=cmd_serve)
+    ops = sub.add_parser('list', help="List available operations and their parameters")
+    ops.set_defaults(func=cmd_list)
+    bench = sub.add_parser('bench', help="Benchmark every operation on synthetic images")
+    bench.add_argument('--sizes', help="Comma-separated sizes: thumb,1mp,12mp,24mp,50mp (default: thumb,1mp,12mp)")
+    bench.add_argument('--modes', help="Comma-separated modes: grayscale,color (default: both)")
+    bench.add_argument('--ops', help="Comma-separated operations (default: all)")
+    bench.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the best is reported (default: 3)")
+    bench.add_argument('--save', help="Write results to this JSON file")
+    bench.add_argument('--compare', help="Baseline JSON file to compare against")
+    bench.add_argument('--threshold', type=float, default=0.10, help="Slowdown that counts as a regression (default: 0.10)")
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
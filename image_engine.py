@@ -0,0 +1,745 @@
+import inspect
+import os
+import tempfile
+import cv2
+import numpy as np
+
+# Headless operation engine: every operation takes an image array (grayscale HxW or RGB HxWx3,
+# uint8) plus explicit parameters and returns a new array. Nothing here touches Tk, so the same
+# operations run from the GUI, worker processes, the CLI and servers.
+
+def is_color(img):
+    return img.ndim == 3
+
+def _check_kernel_size(n, odd=True):
+    if n <= 0 or (odd and n % 2 == 0):
+        raise ValueError("Filter size must be a positive odd integer." if odd else "Filter size must be a positive integer.")
+
+# Point operations: per-pixel intensity maps on uint8 data. Each one is expressed as a 256-entry
+# lookup table, so a chain of them is composed into one table and applied in a single cv2.LUT pass
+# instead of one float pass (plus temporaries) per operation.
+LEVELS = np.arange(256, dtype=np.float64)
+
+def _negative_lut():
+    return 255 - np.arange(256, dtype=np.uint8)
+
+def _log_lut(c=1.0):
+    if c <= 0:
+        raise ValueError("'c' must be positive.")
+    return np.uint8(np.clip(c * np.log1p(LEVELS), 0, 255))
+
+def _gamma_lut(gamma=1.0, c=1.0):
+    if gamma <= 0 or c <= 0:
+        raise ValueError("'gamma' and 'c' must be positive.")
+    return np.uint8(np.clip(c * np.power(LEVELS / 255.0, gamma) * 255, 0, 255))
+
+# Data-dependent point operations build their table from the (min, max) of the values present.
+def _stretch_lut(min_val, max_val):
+    if max_val <= min_val:
+        return np.arange(256, dtype=np.uint8)
+    return np.uint8(np.clip(255.0 * (LEVELS - min_val) / (max_val - min_val), 0, 255))
+
+POINT_LUTS = {
+    'negative_transform': _negative_lut,
+    'log_transform': _log_lut,
+    'gamma_transform': _gamma_lut,
+}
+RANGE_LUTS = {
+    'contrast_stretch': _stretch_lut,
+}
+
+def is_point_op(name):
+    return name in POINT_LUTS or name in RANGE_LUTS
+
+# Composes point operations [(name, params), ...] into one table per channel, shaped (256,) for
+# grayscale or (1, 256, C) for color. Range-based operations read the values present in img once
+# (one histogram pass) and track them through the preceding tables; present ([bool[256]] per
+# channel) can be passed in when it was gathered elsewhere, e.g. across tiles.
+def values_present(img):
+    n_channels = img.shape[2] if is_color(img) else 1
+    return [cv2.calcHist([img], [i], None, [256], [0, 256]).ravel() > 0 for i in range(n_channels)]
+
+def compile_point_ops(img, ops, present=None):
+    n_channels = img.shape[2] if is_color(img) else 1
+    luts = [np.arange(256, dtype=np.uint8) for _ in range(n_channels)]
+    for name, params in ops:
+        if name in RANGE_LUTS:
+            if present is None:
+                present = values_present(img)
+            for i in range(n_channels):
+                values = luts[i][present[i]]
+                if values.size:
+                    luts[i] = RANGE_LUTS[name](int(values.min()), int(values.max()), **params)[luts[i]]
+        else:
+            lut = POINT_LUTS[name](**params)
+            luts = [lut[l] for l in luts]
+    if all(np.array_equal(luts[0], lut) for lut in luts[1:]):
+        return luts[0]
+    return np.stack(luts, axis=1).reshape(1, 256, n_channels)
+
+def apply_point_ops(img, ops):
+    return cv2.LUT(img, compile_point_ops(img, ops))
+
+# Transformations
+def halve_resolution(img):
+    return cv2.resize(img, (0, 0), fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+
+def negative_transform(img):
+    return apply_point_ops(img, [('negative_transform', {})])
+
+def rotate_90(img):
+    return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+
+def flip_horizontal(img):
+    return cv2.flip(img, 1)
+
+def log_transform(img, c=1.0):
+    return apply_point_ops(img, [('log_transform', {'c': c})])
+
+def gamma_transform(img, gamma=1.0, c=1.0):
+    return apply_point_ops(img, [('gamma_transform', {'gamma': gamma, 'c': c})])
+
+def rotate_any(img, angle=0.0, center=None):
+    if center is not None:
+        center = tuple(float(c) for c in center)
+        if len(center) != 2:
+            raise ValueError("Center must be an (x, y) pair.")
+    h, w = img.shape[:2]
+    M = cv2.getRotationMatrix2D(center or (w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(img, M, (w, h))
+
+# Enhancements
+def histogram_equalization(img):
+    if not is_color(img):
+        return cv2.equalizeHist(img)
+    ycrcb = cv2.cvtColor(img, cv2.COLOR_RGB2YCrCb)
+    ycrcb[:, :, 0] = cv2.equalizeHist(ycrcb[:, :, 0])
+    return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB)
+
+def sharpen_image(img):
+    kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+    return cv2.filter2D(img, -1, kernel)
+
+def contrast_stretch(img):
+    return apply_point_ops(img, [('contrast_stretch', {})])
+
+def gaussian_blur(img, size=3, method='auto'):
+    _check_kernel_size(size)
+    if _choose_method(method, img, size, separable=True) == 'frequency':
+        sigma = _gaussian_sigma(size)
+        return _to_uint8(_frequency_filter(img, _gaussian_response(1 / (2 * np.pi * sigma)), size // 2))
+    return cv2.GaussianBlur(img, (size, size), 0)
+
+# Unsharp masking: img + amount * (img - blur), with the blur itself spatial or FFT-based.
+def unsharp_mask(img, size=5, amount=1.0, method='auto'):
+    if amount < 0:
+        raise ValueError("'amount' must not be negative.")
+    blurred = gaussian_blur(img, size, method)
+    return cv2.addWeighted(img, 1 + amount, blurred, -amount, 0)
+
+# Large-kernel denoising. method='exact' runs the OpenCV filter, 'fast' a constant-time
+# approximation, and 'auto' switches to the approximation from a kernel size that depends on the
+# size only, so tiled and whole-image runs make the same choice. cv2.medianBlur already uses the
+# O(1) histogram algorithm for 8-bit kernels above 5x5, but at about a second per 12 MP whatever the
+# size; the fast median runs it on a subsampled grid instead. The fast bilateral is a guided filter,
+# which costs a few box filters regardless of the radius (bilateralFilter grows with size squared),
+# but has no counterpart to sigma_space, so 'auto' keeps the bilateral exact at every size.
+MEDIAN_FAST_MIN_SIZE = 31
+
+# threshold=None: 'auto' never switches.
+def _use_fast(method, size, threshold=None):
+    if method not in ('auto', 'exact', 'fast'):
+        raise ValueError("Method must be 'auto', 'exact' or 'fast'.")
+    return method == 'fast' or (method == 'auto' and threshold is not None and size >= threshold)
+
+# Subsampling step of the fast median (1 means exact): about 15x15 samples stay in each window.
+def _fast_median_step(size=3, method='auto'):
+    return max(1, size // 15) if _use_fast(method, size, MEDIAN_FAST_MIN_SIZE) else 1
+
+# Median of every step-th pixel (from step // 2), over windows of the same extent.
+def _subsampled_median(img, size, step):
+    small = np.ascontiguousarray(img[step // 2::step, step // 2::step])
+    return cv2.medianBlur(small, max(3, (size // step) | 1))
+
+# Bilinear upsampling of a grid sampled at rows/columns step // 2 + i * step back to image rows
+# y .. y + shape[0]; anchored to image coordinates so strips line up with a whole-image run.
+def _upsample_grid(small, step, shape, y=0):
+    offset = (step // 2) / step
+    matrix = np.float32([[1 / step, 0, -offset], [0, 1 / step, y / step - offset]])
+    return cv2.warpAffine(small, matrix, (shape[1], shape[0]), flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+
+def median_filter(img, size=3, method='auto'):
+    _check_kernel_size(size)
+    step = _fast_median_step(size, method)
+    if step == 1:
+        return cv2.medianBlur(img, size)
+    return _upsample_grid(_subsampled_median(img, size, step), step, img.shape[:2])
+
+def bilateral_filter(img, size=3, sigma_color=75, sigma_space=75, method='auto'):
+    _check_kernel_size(size, odd=False)
+    if not _use_fast(method, size):
+        return cv2.bilateralFilter(img, size, sigma_color, sigma_space)
+    # The guided filter's window is the bilateral diameter; sigma_space is ignored.
+    return guided_filter(img, max(1, size // 2), float(sigma_color) ** 2)
+
+# Self-guided filter (He et al.): a local linear model of each channel over (2*radius+1)^2 windows
+# that smooths where the local variance is below eps (in squared intensity levels) and keeps
+# edges where it is above. All channels go through each box filter together.
+def guided_filter(img, radius=8, eps=400.0):
+    if radius < 1 or eps <= 0:
+        raise ValueError("Radius must be at least 1 and eps positive.")
+    window = (2 * radius + 1, 2 * radius + 1)
+    src = img.astype(np.float32)
+    mean = cv2.boxFilter(src, -1, window)
+    var = cv2.boxFilter(src * src, -1, window)
+    var -= mean * mean
+    a = var / (var + eps)
+    b = mean - a * mean
+    out = cv2.boxFilter(a, -1, window) * src + cv2.boxFilter(b, -1, window)
+    return np.clip(out, 0, 255, out=out).round().astype(np.uint8)
+
+# Frequency-domain filtering: the image is reflect-padded by the filter radius (the same border
+# rule as OpenCV's filters), multiplied by a transfer function on a multithreaded float32 real FFT
+# of a fast size, and cropped back. The cost depends on the image size only, so it wins over
+# spatial convolution once kernels get large; method='auto' picks whichever is cheaper.
+
+# Kernel sizes from which the FFT path is used in 'auto' mode (measured on a 12 MP RGB image:
+# a 201x201 Gaussian takes 2.2 s spatially and 1.05 s via FFT, whatever the kernel size).
+SEPARABLE_FFT_MIN_SIZE = 121
+DENSE_FFT_MIN_SIZE = 15
+
+def _gaussian_sigma(size):
+    # OpenCV's sigma for a Gaussian kernel of this size when sigma is 0.
+    return 0.3 * ((size - 1) * 0.5 - 1) + 0.8
+
+def _choose_method(method, img, size, separable=False):
+    if method not in ('auto', 'spatial', 'frequency'):
+        raise ValueError("Method must be 'auto', 'spatial' or 'frequency'.")
+    if method != 'auto':
+        return method
+    # A separable kernel costs about 2*size multiply-adds per pixel and a dense one size**2, while
+    # the padded FFT round trip costs the same per pixel for any kernel.
+    threshold = SEPARABLE_FFT_MIN_SIZE if separable else DENSE_FFT_MIN_SIZE
+    return 'frequency' if size >= threshold and min(img.shape[:2]) > size else 'spatial'
+
+def _frequency_filter(img, response, pad):
+    # scipy.fft costs a quarter of a second to import and most pipelines never reach it.
+    from scipy.fft import rfft2, irfft2, next_fast_len
+    h, w = img.shape[:2]
+    pad = min(pad, h - 1, w - 1)
+    padded = cv2.copyMakeBorder(img, pad, pad, pad, pad, cv2.BORDER_REFLECT_101) if pad > 0 else img
+    shape = (next_fast_len(padded.shape[0], real=True), next_fast_len(padded.shape[1], real=True))
+    spectrum = rfft2(padded.astype(np.float32), s=shape, axes=(0, 1), workers=-1)
+    transfer = response(shape)
+    spectrum *= transfer[:, :, None] if is_color(img) else transfer
+    return irfft2(spectrum, s=shape, axes=(0, 1), workers=-1)[pad:pad + h, pad:pad + w]
+
+def _to_uint8(values, offset=0):
+    if offset:
+        values += offset
+    np.clip(values, 0, 255, out=values)
+    return np.rint(values, out=values).astype(np.uint8)
+
+# Gaussian transfer functions; cutoffs are in cycles per pixel (0 < cutoff < 0.5). High- and
+# band-pass results are signed, so they are shown around mid-gray (offset 128).
+def _check_cutoff(*cutoffs):
+    for cutoff in cutoffs:
+        if not 0 < cutoff < 0.5:
+            raise ValueError("Cutoff frequencies must be between 0 and 0.5 cycles per pixel.")
+
+def _pad_for_cutoff(cutoff):
+    # Three spatial standard deviations of the equivalent Gaussian kernel.
+    return int(np.ceil(3 / (2 * np.pi * cutoff)))
+
+# Squared frequency (cycles per pixel) of every bin of a real FFT of this shape.
+def _frequency_grid(shape):
+    fy = np.fft.fftfreq(shape[0]).astype(np.float32)[:, None]
+    fx = np.fft.rfftfreq(shape[1]).astype(np.float32)[None, :]
+    return fy ** 2 + fx ** 2
+
+def _gaussian_response(cutoff):
+    return lambda shape: np.exp(-_frequency_grid(shape) / (2 * cutoff ** 2))
+
+def lowpass_filter(img, cutoff=0.05):
+    _check_cutoff(cutoff)
+    return _to_uint8(_frequency_filter(img, _gaussian_response(cutoff), _pad_for_cutoff(cutoff)))
+
+def highpass_filter(img, cutoff=0.05):
+    _check_cutoff(cutoff)
+    low = _gaussian_response(cutoff)
+    return _to_uint8(_frequency_filter(img, lambda shape: 1 - low(shape), _pad_for_cutoff(cutoff)), 128)
+
+def bandpass_filter(img, low=0.02, high=0.1):
+    _check_cutoff(low, high)
+    if low >= high:
+        raise ValueError("The low cutoff must be below the high cutoff.")
+    lower, upper = _gaussian_response(low), _gaussian_response(high)
+    return _to_uint8(_frequency_filter(img, lambda shape: upper(shape) - lower(shape), _pad_for_cutoff(low)), 128)
+
+# Custom kernel, applied like cv2.filter2D (correlation, anchor at the kernel centre, reflected
+# border). The kernel is a 2D list or array with odd sides; the default leaves the image unchanged.
+def convolve(img, kernel=((0, 0, 0), (0, 1, 0), (0, 0, 0)), method='auto'):
+    kernel = np.asarray(kernel, dtype=np.float32)
+    if kernel.ndim != 2 or kernel.shape[0] % 2 == 0 or kernel.shape[1] % 2 == 0:
+        raise ValueError("Kernel must be a 2D array with odd width and height.")
+    size = max(kernel.shape)
+    if _choose_method(method, img, size) == 'spatial':
+        return cv2.filter2D(img, -1, kernel)
+    kh, kw = kernel.shape
+    def response(shape):
+        # Correlation is multiplication by the conjugate spectrum of the kernel placed with its
+        # centre at the origin.
+        placed = np.zeros(shape, dtype=np.float32)
+        placed[:kh, :kw] = kernel
+        placed = np.roll(placed, (-(kh // 2), -(kw // 2)), axis=(0, 1))
+        from scipy.fft import rfft2
+        return np.conj(rfft2(placed, workers=-1))
+    return _to_uint8(_frequency_filter(img, response, size // 2))
+
+# Color adjustments
+def adjust_color(img, saturation=1.0, brightness=0):
+    if not is_color(img):
+        raise ValueError("Color adjustments are only available in color mode.")
+    if not (0 <= saturation <= 2) or not (-255 <= brightness <= 255):
+        raise ValueError("Saturation must be 0.0-2.0, brightness -255 to 255.")
+    # Saturation and brightness are point operations on the S and V planes: one 3-channel LUT pass.
+    lut = np.stack([LEVELS, np.clip(LEVELS * saturation, 0, 255), np.clip(LEVELS + brightness, 0, 255)], axis=1)
+    hsv = cv2.cvtColor(img, cv2.COLOR_RGB2HSV)
+    cv2.LUT(hsv, lut.astype(np.uint8).reshape(1, 256, 3), dst=hsv)
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
+
+# Analysis operations that produce a new image
+
+# Gradients: 3x3 Sobel or Scharr derivatives of every channel in one float32 call each, combined
+# with cv2.magnitude into the x-derivative's buffer, so the temporaries are two 4-byte planes per
+# channel instead of per-channel float64 copies.
+GRADIENT_OPERATORS = ('sobel', 'scharr')
+
+def _derivatives(img, operator='sobel'):
+    if operator == 'sobel':
+        return cv2.Sobel(img, cv2.CV_32F, 1, 0, ksize=3), cv2.Sobel(img, cv2.CV_32F, 0, 1, ksize=3)
+    if operator == 'scharr':
+        return cv2.Scharr(img, cv2.CV_32F, 1, 0), cv2.Scharr(img, cv2.CV_32F, 0, 1)
+    raise ValueError(f"Operator must be one of: {', '.join(GRADIENT_OPERATORS)}.")
+
+def _gradient(img, operator='sobel'):
+    gx, gy = _derivatives(img, operator)
+    return cv2.magnitude(gx, gy, gx)
+
+# Reduced over rows first (contiguous, vectorized), then over the remaining pixels of a row.
+def _channel_peaks(mag):
+    row_max = mag.reshape(mag.shape[0], -1).max(axis=0)
+    return [float(p) for p in row_max.reshape(-1, mag.shape[2]).max(axis=0)] if mag.ndim == 3 else [float(row_max.max())]
+
+# Each channel is normalized by its own peak; peaks may be given when computed elsewhere (tiles).
+def gradient_magnitude(img, peaks=None, operator='sobel'):
+    mag = _gradient(img, operator)
+    scale = [255 / peak if peak > 0 else 0.0 for peak in (peaks or _channel_peaks(mag))]
+    cv2.multiply(mag, tuple(scale) + (0.0,) * (4 - len(scale)), dst=mag)
+    return mag.astype(np.uint8)
+
+# Gradient direction. Grayscale images map 0-360 degrees to 0-255; color images are rendered as
+# hue = direction and value = normalized magnitude of the luma gradient.
+def gradient_orientation(img, operator='sobel'):
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if is_color(img) else img
+    gx, gy = _derivatives(gray, operator)
+    mag, angle = cv2.cartToPolar(gx, gy, angleInDegrees=True)
+    if not is_color(img):
+        return cv2.convertScaleAbs(angle, alpha=255 / 360)
+    peak = float(mag.max())
+    hsv = np.empty(img.shape, dtype=np.uint8)
+    hsv[:, :, 0] = cv2.convertScaleAbs(angle, alpha=0.5)
+    hsv[:, :, 1] = 255
+    hsv[:, :, 2] = cv2.convertScaleAbs(mag, alpha=255 / peak if peak > 0 else 0)
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
+
+# Canny on the luma. auto='median' puts the thresholds at (1 -/+ sigma) * median intensity,
+# auto='otsu' uses Otsu's threshold as the high one and half of it as the low one; both are read
+# from the luma histogram, so tiled runs use the same thresholds as whole-image runs.
+CANNY_AUTO = (None, 'median', 'otsu')
+
+def _luma(img):
+    return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if is_color(img) else img
+
+def canny_thresholds(hist, auto, sigma=0.33):
+    hist = np.asarray(hist, dtype=np.float64).ravel()
+    if auto == 'median':
+        median = int(np.searchsorted(np.cumsum(hist), hist.sum() / 2))
+        return max(0, int((1 - sigma) * median)), min(255, int((1 + sigma) * median))
+    if auto == 'otsu':
+        levels = np.arange(256)
+        weight = np.cumsum(hist)
+        mean = np.cumsum(hist * levels)
+        total, total_mean = weight[-1], mean[-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            between = (total_mean * weight - mean * total) ** 2 / (weight * (total - weight))
+        high = int(np.nanargmax(np.nan_to_num(between[:-1], nan=-1.0))) if total else 0
+        return high // 2, high
+    raise ValueError(f"Automatic thresholds must be one of: {', '.join(str(a) for a in CANNY_AUTO)}.")
+
+def edge_detection(img, low=100, high=200, auto=None):
+    gray = _luma(img)
+    if auto is not None:
+        low, high = canny_thresholds(cv2.calcHist([gray], [0], None, [256], [0, 256]), auto)
+    edges = cv2.Canny(gray, low, high)
+    return cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB) if is_color(img) else edges
+
+# Analysis results (no image output)
+CHANNEL_NAMES = ['Red', 'Green', 'Blue']
+
+def channels(img):
+    if not is_color(img):
+        return [('Gray', img)]
+    return [(CHANNEL_NAMES[i], img[:, :, i]) for i in range(img.shape[2])]
+
+# One calcHist pass per channel. calcHist counts in float32, which is exact up to 2**24 per bin,
+# so larger images are counted in row bands and summed as integers.
+def histogram(img):
+    rows = max(1, (1 << 24) // max(1, img.shape[1]))
+    counts = {name: np.zeros(256, dtype=np.int64) for name, _ in channels(img)}
+    for y in range(0, img.shape[0], rows):
+        band = img[y:y + rows]
+        for i, name in enumerate(counts):
+            counts[name] += cv2.calcHist([band], [i], None, [256], [0, 256]).ravel().astype(np.int64)
+    return counts
+
+# Mean, standard deviation, skewness and excess kurtosis (population/biased estimators, as
+# np.std and scipy.stats.skew/kurtosis with their defaults) from the moments of a 256-bin
+# histogram; min and max are its first and last occupied bins. Skew and kurtosis are NaN for a
+# constant channel.
+def histogram_stats(counts):
+    n = counts.sum()
+    occupied = np.flatnonzero(counts)
+    if n == 0:
+        return {'mean': float('nan'), 'std': float('nan'), 'min': 0, 'max': 0, 'skew': float('nan'), 'kurtosis': float('nan')}
+    p = counts / n
+    mean = float(p @ LEVELS)
+    d = LEVELS - mean
+    m2, m3, m4 = float(p @ d**2), float(p @ d**3), float(p @ d**4)
+    return {
+        'mean': mean, 'std': m2 ** 0.5,
+        'min': int(occupied[0]), 'max': int(occupied[-1]),
+        'skew': m3 / m2 ** 1.5 if m2 > 0 else float('nan'),
+        'kurtosis': m4 / m2 ** 2 - 3 if m2 > 0 else float('nan'),
+    }
+
+def image_stats(img):
+    return {name: histogram_stats(counts) for name, counts in histogram(img).items()}
+
+# Centred log-magnitude spectrum (20 * ln(|F| + 1)) per channel. All channels go through one
+# multithreaded real FFT in float32, zero-padded to sizes with small prime factors; the half
+# spectrum is mirrored (|F(-u, -v)| = |F(u, v)| for real input) and, with max_size, reduced for
+# display with area averaging.
+def fft_magnitude(img, max_size=None):
+    from scipy.fft import rfft2, next_fast_len
+    h, w = img.shape[:2]
+    shape = (next_fast_len(h, real=True), next_fast_len(w, real=True))
+    spectrum = rfft2(img.astype(np.float32), s=shape, axes=(0, 1), workers=-1)
+    half = np.abs(spectrum)
+    np.log1p(half, out=half)
+    half *= 20
+    spectra = {}
+    for i, (name, _) in enumerate(channels(img)):
+        magnitude = _mirror_half_spectrum(half[:, :, i] if is_color(img) else half, shape[1])
+        magnitude = np.fft.fftshift(magnitude)
+        if max_size and max(magnitude.shape) > max_size:
+            scale = max_size / max(magnitude.shape)
+            size = (max(1, round(magnitude.shape[1] * scale)), max(1, round(magnitude.shape[0] * scale)))
+            magnitude = cv2.resize(magnitude, size, interpolation=cv2.INTER_AREA)
+        spectra[name] = magnitude
+    return spectra
+
+def _mirror_half_spectrum(half, width):
+    h, half_width = half.shape
+    full = np.empty((h, width), dtype=half.dtype)
+    full[:, :half_width] = half
+    if width > half_width:
+        # Column v >= half_width mirrors column width - v, row u mirrors row -u (mod h).
+        mirrored = half[:, width - half_width:0:-1]
+        full[0, half_width:] = mirrored[0]
+        full[1:, half_width:] = mirrored[:0:-1]
+    return full
+
+# Operation registry: name -> function(img, **params). Names match the GUI handlers.
+OPERATIONS = {
+    'halve_resolution': halve_resolution,
+    'negative_transform': negative_transform,
+    'rotate_90': rotate_90,
+    'flip_horizontal': flip_horizontal,
+    'log_transform': log_transform,
+    'gamma_transform': gamma_transform,
+    'rotate_any': rotate_any,
+    'histogram_equalization': histogram_equalization,
+    'sharpen_image': sharpen_image,
+    'contrast_stretch': contrast_stretch,
+    'gaussian_blur': gaussian_blur,
+    'unsharp_mask': unsharp_mask,
+    'lowpass_filter': lowpass_filter,
+    'highpass_filter': highpass_filter,
+    'bandpass_filter': bandpass_filter,
+    'convolve': convolve,
+    'median_filter': median_filter,
+    'bilateral_filter': bilateral_filter,
+    'guided_filter': guided_filter,
+    'adjust_color': adjust_color,
+    'gradient_magnitude': gradient_magnitude,
+    'gradient_orientation': gradient_orientation,
+    'edge_detection': edge_detection,
+}
+
+def get_operation(name):
+    try:
+        return OPERATIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown operation: {name}") from None
+
+def apply_operation(img, name, **params):
+    return get_operation(name)(img, **params)
+
+# A pipeline step is either an operation name or a dict {"op": name, **params}.
+def parse_step(step):
+    if isinstance(step, str):
+        return step, {}
+    if not isinstance(step, dict) or 'op' not in step:
+        raise ValueError(f"Invalid pipeline step: {step!r}")
+    params = {k: v for k, v in step.items() if k != 'op'}
+    return step['op'], params
+
+# Peephole rules over a step list: involutions applied twice (flip, negative), four quarter turns,
+# a repeated contrast stretch (the first already spans 0-255) and identity parameters are dropped,
+# so a pipeline only runs operations that change the result.
+INVOLUTIONS = ('flip_horizontal', 'negative_transform')
+IDEMPOTENT = ('contrast_stretch',)
+
+def is_identity(name, params):
+    if name == 'gamma_transform':
+        return params.get('gamma', 1.0) == 1 and params.get('c', 1.0) == 1
+    if name == 'rotate_any':
+        return params.get('angle', 0.0) % 360 == 0
+    return False
+
+def simplify_steps(steps):
+    out = []
+    for step in steps:
+        name, params = parse_step(step)
+        if is_identity(name, params):
+            continue
+        if out and out[-1][0] == name and (name in INVOLUTIONS or name in IDEMPOTENT):
+            if name in INVOLUTIONS:
+                out.pop()
+            continue
+        if name == 'rotate_90' and len(out) >= 3 and all(n == 'rotate_90' for n, _ in out[-3:]):
+            del out[-3:]
+            continue
+        out.append((name, params))
+    return out
+
+# Groups consecutive point operations into one fused stage: returns [(name, params) or
+# ('point_ops', [(name, params), ...]), ...].
+def plan_pipeline(steps):
+    stages = []
+    for name, params in simplify_steps(steps):
+        if is_point_op(name):
+            if stages and stages[-1][0] == 'point_ops':
+                stages[-1][1].append((name, params))
+            else:
+                stages.append(('point_ops', [(name, params)]))
+        else:
+            stages.append((name, params))
+    return stages
+
+def run_stage(img, stage):
+    name, params = stage
+    if name == 'point_ops':
+        return apply_point_ops(img, params)
+    return apply_operation(img, name, **params)
+
+def run_pipeline(img, steps):
+    for stage in plan_pipeline(steps):
+        img = run_stage(img, stage)
+    return img
+
+def validate_step(step):
+    name, params = parse_step(step)
+    func = get_operation(name)
+    try:
+        inspect.signature(func).bind(None, **params)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for {name}: {e}") from None
+    return name, params
+
+def describe_operations():
+    described = {}
+    for name, func in OPERATIONS.items():
+        params = list(inspect.signature(func).parameters.values())[1:]
+        described[name] = {p.name: p.default for p in params}
+    return described
+
+# Tiled execution: runs a pipeline over horizontal strips so that only one strip (plus a halo of
+# rows for neighborhood operations) and its temporaries are in memory at a time. Source and
+# destination may be np.memmap arrays, which keeps images larger than RAM on disk.
+TILE_HALOS = {
+    'sharpen_image': lambda: 1,
+    'gaussian_blur': lambda size=3, method='auto': size // 2,
+    'unsharp_mask': lambda size=5, amount=1.0, method='auto': size // 2,
+    'lowpass_filter': lambda cutoff=0.05: _pad_for_cutoff(cutoff),
+    'highpass_filter': lambda cutoff=0.05: _pad_for_cutoff(cutoff),
+    'bandpass_filter': lambda low=0.02, high=0.1: _pad_for_cutoff(low),
+    'convolve': lambda kernel=((0, 0, 0), (0, 1, 0), (0, 0, 0)), method='auto': np.shape(kernel)[0] // 2,
+    'median_filter': lambda size=3, method='auto': size // 2,
+    'bilateral_filter': lambda size=3, sigma_color=75, sigma_space=75, method='auto': 2 * (size // 2),
+    'guided_filter': lambda radius=8, eps=400.0: 2 * radius,
+    'adjust_color': lambda saturation=1.0, brightness=0: 0,
+    'edge_detection': lambda low=100, high=200, auto=None: 16,
+}
+# Operations whose tiled result can differ from a whole-image run: Canny's hysteresis can follow an
+# edge arbitrarily far past the halo, and FFT filtering rounds differently for each padded strip
+# size. They still run tiled when asked to (run_pipeline_tiled), but are never tiled implicitly.
+INEXACT_TILES = ('lowpass_filter', 'highpass_filter', 'bandpass_filter', 'edge_detection')
+# Bytes of temporaries per image byte assumed when sizing strips (float64 gradients dominate).
+TILE_OVERHEAD = 24
+
+def is_tileable(name):
+    return name in TILE_HALOS or is_point_op(name) or name in ('histogram_equalization', 'gradient_magnitude')
+
+# True when running name with params strip by strip gives exactly the whole-image result. Blurs and
+# convolutions are exact unless they may switch to the FFT (see _choose_method).
+def tiles_exactly(name, params=None):
+    if not is_tileable(name) or name in INEXACT_TILES:
+        return False
+    if name in ('gaussian_blur', 'unsharp_mask', 'convolve'):
+        params = {**describe_operations()[name], **(params or {})}
+        if name == 'convolve':
+            size, threshold = max(np.shape(params['kernel'])), DENSE_FFT_MIN_SIZE
+        else:
+            size, threshold = params['size'], SEPARABLE_FFT_MIN_SIZE
+        return params['method'] == 'spatial' or (params['method'] == 'auto' and size < threshold)
+    return True
+
+def _strip_rows(shape, max_bytes, halo):
+    row_bytes = int(np.prod(shape[1:])) * TILE_OVERHEAD
+    return max(1, max_bytes // row_bytes - 2 * halo)
+
+def _strips(height, rows, halo):
+    for y0 in range(0, height, rows):
+        y1 = min(height, y0 + rows)
+        yield y0, y1, max(0, y0 - halo), min(height, y1 + halo)
+
+def _equalize_lut(hist):
+    # Same table as cv2.equalizeHist, built from a histogram gathered across strips.
+    total = int(hist.sum())
+    first = int(np.flatnonzero(hist)[0]) if total else 0
+    if total == 0 or hist[first] == total:
+        return np.full(256, first, dtype=np.uint8)
+    scale = 255.0 / (total - hist[first])
+    cdf = np.cumsum(hist) - hist[first]
+    lut = np.clip(np.rint(cdf * scale), 0, 255).astype(np.uint8)
+    lut[:first + 1] = 0
+    return lut
+
+# Turns a pipeline stage into (function(strip, y), halo), where y is the image row the strip
+# starts at. Stages that depend on whole-image
+# statistics gather them from source strip by strip first, then become per-strip lookups.
+def _tiled_stage(stage, source, max_bytes):
+    name, params = stage
+    if name == 'point_ops':
+        present = None
+        if any(op in RANGE_LUTS for op, _ in params):
+            for y0, y1, _, _ in _strips(source.shape[0], _strip_rows(source.shape, max_bytes, 0), 0):
+                strip_present = values_present(np.ascontiguousarray(source[y0:y1]))
+                present = strip_present if present is None else [a | b for a, b in zip(present, strip_present)]
+        lut = compile_point_ops(source[:1], params, present)
+        return (lambda strip, y: cv2.LUT(strip, lut)), 0
+    if name == 'histogram_equalization':
+        hist = np.zeros(256)
+        for y0, y1, _, _ in _strips(source.shape[0], _strip_rows(source.shape, max_bytes, 0), 0):
+            strip = np.ascontiguousarray(source[y0:y1])
+            luma = cv2.cvtColor(strip, cv2.COLOR_RGB2YCrCb)[:, :, 0] if is_color(strip) else strip
+            hist += cv2.calcHist([luma], [0], None, [256], [0, 256]).ravel()
+        lut = _equalize_lut(hist)
+        def equalize(strip, y):
+            if not is_color(strip):
+                return cv2.LUT(strip, lut)
+            ycrcb = cv2.cvtColor(strip, cv2.COLOR_RGB2YCrCb)
+            ycrcb[:, :, 0] = cv2.LUT(ycrcb[:, :, 0], lut)
+            return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB)
+        return equalize, 0
+    if name == 'gradient_magnitude':
+        operator = params.get('operator', 'sobel')
+        peaks = None
+        for y0, y1, ya, yb in _strips(source.shape[0], _strip_rows(source.shape, max_bytes, 1), 1):
+            strip_peaks = _channel_peaks(_gradient(np.ascontiguousarray(source[ya:yb]), operator)[y0 - ya:y1 - ya])
+            peaks = strip_peaks if peaks is None else [max(a, b) for a, b in zip(peaks, strip_peaks)]
+        return (lambda strip, y: gradient_magnitude(strip, peaks, operator)), 1
+    if name == 'median_filter' and _fast_median_step(**params) > 1:
+        # The subsampled grid is small enough to filter whole; strips only interpolate from it.
+        step = _fast_median_step(**params)
+        small = _subsampled_median(source, params.get('size', 3), step)
+        return (lambda strip, y: _upsample_grid(small, step, strip.shape[:2], y)), 0
+    if name == 'edge_detection' and params.get('auto') is not None:
+        hist = np.zeros((256, 1), dtype=np.float32)
+        for y0, y1, _, _ in _strips(source.shape[0], _strip_rows(source.shape, max_bytes, 0), 0):
+            hist += cv2.calcHist([_luma(np.ascontiguousarray(source[y0:y1]))], [0], None, [256], [0, 256])
+        low, high = canny_thresholds(hist, params['auto'])
+        return (lambda strip, y: edge_detection(strip, low, high)), TILE_HALOS[name]()
+    if name in TILE_HALOS:
+        func = get_operation(name)
+        return (lambda strip, y: func(strip, **params)), TILE_HALOS[name](**params)
+    raise ValueError(f"{name} cannot run in tiled mode.")
+
+# Stages that read whole-image statistics before their strips can run.
+def _needs_stats(stage):
+    name, params = stage
+    if name == 'point_ops':
+        return any(op in RANGE_LUTS for op, _ in params)
+    if name == 'edge_detection':
+        return params.get('auto') is not None
+    if name == 'median_filter':
+        return _fast_median_step(**params) > 1
+    return name in ('histogram_equalization', 'gradient_magnitude')
+
+def _run_strips(source, dest, group, max_bytes, progress, done, total):
+    halo = sum(h for _, h in group)
+    height = source.shape[0]
+    for y0, y1, ya, yb in _strips(height, _strip_rows(source.shape, max_bytes, halo), halo):
+        strip = np.ascontiguousarray(source[ya:yb])
+        for func, _ in group:
+            strip = func(strip, ya)
+        dest[y0:y1] = strip[y0 - ya:y1 - ya]
+        if progress:
+            progress((done + y1 / height) / total)
+
+# Consecutive neighborhood operations share one pass (their halos add up); an operation that needs
+# whole-image statistics forces the previous pass to be written out first, to a temporary memmap in
+# temp_dir. progress(fraction) is called after every strip and may raise to abort the run.
+def run_pipeline_tiled(src, dst, steps, max_bytes=256 * 1024 * 1024, progress=None, temp_dir=None):
+    stages = plan_pipeline(steps)
+    for name, _ in stages:
+        if name != 'point_ops' and not is_tileable(name):
+            raise ValueError(f"{name} cannot run in tiled mode.")
+    temp_files = []
+    try:
+        source, group, passes = src, [], 0
+        total = 1 + sum(1 for stage in stages if _needs_stats(stage))
+        for stage in stages:
+            if _needs_stats(stage) and group:
+                fd, path = tempfile.mkstemp(suffix='.npy', dir=temp_dir)
+                os.close(fd)
+                temp_files.append(path)
+                target = np.lib.format.open_memmap(path, mode='w+', dtype=dst.dtype, shape=dst.shape)
+                _run_strips(source, target, group, max_bytes, progress, passes, total)
+                source, group, passes = target, [], passes + 1
+            group.append(_tiled_stage(stage, source, max_bytes))
+        if group:
+            _run_strips(source, dst, group, max_bytes, progress, passes, total)
+        else:
+            dst[...] = source
+        if progress:
+            progress(1.0)
+        return dst
+    finally:
+        for path in temp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import image_engine as engine
+
+# Lazy operation graph: applying an operation only adds a node; pixels are computed when
+# something asks for them (display, save, analysis). Evaluation starts from the cached ancestor
+# that leaves the least work, runs the remaining steps through the engine planner (peephole
+# simplification plus point-op fusion) and caches the result. Nodes are keyed by their simplified
+# step sequence from the source, so equivalent chains (four quarter turns, a double flip, an op
+# undone and re-applied) share one cached result.
+
+# Parameters as a hashable value; lists, tuples and arrays (kernels, centers) compare by content.
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _params_key(params):
+    return _freeze(params)
+
+# GraphNode Class for one operation applied to its parent
+class GraphNode:
+    def __init__(self, parent, name=None, params=None):
+        self.parent = parent
+        self.name = name
+        self.params = params or {}
+        self.children = {}
+        self.redo_child = None
+        self.steps = parent.steps + [{'op': name, **self.params}] if parent else []
+        self.signature = tuple((n, _params_key(p)) for n, p in engine.simplify_steps(self.steps))
+
+# OperationGraph Class for deferred evaluation with a byte-bounded result cache
+class OperationGraph:
+    def __init__(self, source, cache_bytes=256 * 1024 * 1024):
+        self.root = GraphNode(None)
+        self.head = self.root
+        self.source = source
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.computed_stages = 0
+
+    def apply(self, name, **params):
+        engine.validate_step({'op': name, **params})
+        key = (name, _params_key(params))
+        with self.lock:
+            node = self.head.children.get(key)
+            if node is None:
+                node = self.head.children[key] = GraphNode(self.head, name, params)
+            self.head.redo_child = node
+            self.head = node
+        return node
+
+    def can_undo(self):
+        return self.head is not self.root
+
+    def can_redo(self):
+        return self.head.redo_child is not None
+
+    def undo(self):
+        with self.lock:
+            self.head = self.head.parent
+            return self.head
+
+    def redo(self):
+        with self.lock:
+            self.head = self.head.redo_child
+            return self.head
+
+    def is_cached(self, node=None):
+        node = node or self.head
+        with self.lock:
+            return not node.signature or node.signature in self.cache
+
+    # Returns the pixels of node (default: head). The returned array is shared with the cache and
+    # must not be modified in place.
+    def evaluate(self, node=None):
+        node = node or self.head
+        with self.lock:
+            best = None
+            ancestor, remaining = node, []
+            while ancestor is not None:
+                if not ancestor.signature or ancestor.signature in self.cache:
+                    stages = engine.plan_pipeline(list(reversed(remaining)))
+                    if best is None or len(stages) < len(best[1]):
+                        best = (ancestor, stages)
+                    if not stages:
+                        break
+                if ancestor.parent is not None:
+                    remaining.append(ancestor.steps[-1])
+                ancestor = ancestor.parent
+            start, stages = best
+            img = self._get(start.signature)
+        for stage in stages:
+            img = engine.run_stage(img, stage)
+        with self.lock:
+            self.computed_stages += len(stages)
+            if node.signature and node.signature not in self.cache:
+                self._put(node.signature, img)
+        return img
+
+    def _get(self, signature):
+        if not signature:
+            return self.source
+        self.cache.move_to_end(signature)
+        return self.cache[signature]
+
+    # The source is always kept; cached results are evicted least recently used first.
+    def _put(self, signature, img):
+        self.cache[signature] = img
+        total = sum(a.nbytes for a in self.cache.values())
+        while total > self.cache_bytes and len(self.cache) > 1:
+            _, evicted = self.cache.popitem(last=False)
+            total -= evicted.nbytes
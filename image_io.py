@@ -0,0 +1,133 @@
+import os
+
+import cv2
+import numpy as np
+
+# Image I/O: files are decoded straight into the app's working format (RGB or single-channel
+# grayscale) instead of decoding BGR color and converting afterwards, previews use the JPEG
+# decoder's reduced-resolution modes, and encoder options are applied by file extension.
+# .npy files hold raw arrays in internal channel order and are memory-mapped on read.
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp', '.npy')
+
+# Encoder options: png_compression 0-9 (None keeps OpenCV's default, a fast run-length strategy
+# that is considerably quicker than any explicit zlib level), jpeg_quality and webp_quality 1-100
+# (webp above 100 is lossless).
+ENCODER_DEFAULTS = {'png_compression': None, 'jpeg_quality': 95, 'webp_quality': 90}
+
+REDUCED_FLAGS = {
+    'color': {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8},
+    'grayscale': {2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8},
+}
+
+# OpenCV 4.11+ can hand decoded pixels over in RGB order; older builds decode BGR and convert.
+IMREAD_COLOR_RGB = getattr(cv2, 'IMREAD_COLOR_RGB', None)
+
+def _read_flags(mode, reduce=1):
+    if mode not in ('color', 'grayscale'):
+        raise ValueError(f"Invalid mode: {mode}")
+    if reduce not in (1, 2, 4, 8):
+        raise ValueError("Reduction factor must be 1, 2, 4 or 8.")
+    if mode == 'grayscale':
+        return REDUCED_FLAGS[mode][reduce] if reduce > 1 else cv2.IMREAD_GRAYSCALE
+    flags = REDUCED_FLAGS[mode][reduce] if reduce > 1 else cv2.IMREAD_COLOR
+    if IMREAD_COLOR_RGB is not None:
+        # The reduced color flags include the BGR bit, which cannot be combined with the RGB one.
+        flags = (flags & ~cv2.IMREAD_COLOR) | IMREAD_COLOR_RGB
+    return flags
+
+# Decodes path in the given mode; reduce (2, 4 or 8) shrinks the image while decoding, which for
+# JPEG skips most of the inverse DCT work.
+def read_image(path, mode='color', reduce=1):
+    if path.lower().endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    img = cv2.imread(path, _read_flags(mode, reduce))
+    if img is None:
+        raise ValueError(f"Invalid image file: {path}")
+    if img.ndim == 3 and IMREAD_COLOR_RGB is None:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return img
+
+# Same as read_image for encoded bytes already in memory.
+def decode_image(data, mode='color'):
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _read_flags(mode))
+    if img is None:
+        raise ValueError("Data is not a supported image.")
+    if img.ndim == 3 and IMREAD_COLOR_RGB is None:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return img
+
+# (width, height) from the file header without decoding pixels, or None if Pillow cannot tell.
+# Pillow is imported here, not at module level: batch workers, the server and the CLI import this
+# module but only previews read sizes. Images past Pillow's pixel limit raise
+# DecompressionBombError on open; they get no size (and so no preview) but still load normally.
+def image_size(path):
+    from PIL import Image
+    try:
+        with Image.open(path) as im:
+            return im.size
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+# Only the JPEG decoder saves work at reduced sizes (it skips most of the inverse DCT); for other
+# formats the IMREAD_REDUCED_* flags decode the whole image and then resize it.
+REDUCED_DECODE_EXTENSIONS = ('.jpg', '.jpeg')
+
+# Largest decode-time reduction that still leaves the longer side at least max_size pixels; 1 for
+# formats without a cheaper reduced decode.
+def preview_factor(path, max_size):
+    if not path.lower().endswith(REDUCED_DECODE_EXTENSIONS):
+        return 1
+    size = image_size(path)
+    if size is None:
+        return 1
+    for factor in (8, 4, 2):
+        if max(size) // factor >= max_size:
+            return factor
+    return 1
+
+# Returns (img, factor): a quick decode no smaller than max_size on its longer side, and the
+# factor it was reduced by.
+def read_preview(path, max_size, mode='color'):
+    factor = preview_factor(path, max_size)
+    return read_image(path, mode, factor), factor
+
+def encode_params(path, options=None):
+    options = {**ENCODER_DEFAULTS, **(options or {})}
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.png' and options['png_compression'] is not None:
+        if not 0 <= options['png_compression'] <= 9:
+            raise ValueError("PNG compression must be between 0 and 9.")
+        return [cv2.IMWRITE_PNG_COMPRESSION, int(options['png_compression'])]
+    if ext in ('.jpg', '.jpeg'):
+        if not 1 <= options['jpeg_quality'] <= 100:
+            raise ValueError("JPEG quality must be between 1 and 100.")
+        return [cv2.IMWRITE_JPEG_QUALITY, int(options['jpeg_quality'])]
+    if ext == '.webp':
+        if not 1 <= options['webp_quality'] <= 101:
+            raise ValueError("WebP quality must be between 1 and 101.")
+        return [cv2.IMWRITE_WEBP_QUALITY, int(options['webp_quality'])]
+    return []
+
+# Returns the bytes of img encoded in the format of ext ('.png', '.jpg', ...).
+def encode_image(img, ext, options=None):
+    params = encode_params('image' + ext, options)
+    ok, buf = cv2.imencode(ext, cv2.cvtColor(img, cv2.COLOR_RGB2BGR) if img.ndim == 3 else img, params)
+    if not ok:
+        raise ValueError(f"Could not encode {ext}")
+    return buf.tobytes()
+
+# Encoders take BGR, so color images are converted once here; grayscale and .npy are written as-is.
+def write_image(path, img, options=None):
+    if path.lower().endswith('.npy'):
+        if isinstance(img, np.memmap):
+            img.flush()
+        else:
+            np.save(path, img)
+        return path
+    params = encode_params(path, options)
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    if not cv2.imwrite(path, img, params):
+        raise ValueError(f"Could not write {path}")
+    return path
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Batch manifest: one SQLite row per (input file, pipeline signature) recording the input's size,
+# mtime and content digest, the output written and whether it succeeded. A re-run skips inputs
+# whose size and mtime are unchanged and whose output still exists, without opening them; inputs
+# that were only touched are hashed by the worker and skipped if the bytes match. Rows are written
+# as results arrive, so an interrupted run resumes where it stopped.
+
+# Encoder options change the output bytes, so they are part of the signature when set.
+def pipeline_signature(steps, mode='color', encoder_options=None):
+    data = {'steps': steps, 'mode': mode}
+    if encoder_options:
+        data['encoder'] = encoder_options
+    text = json.dumps(data, sort_keys=True)
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+def file_digest(path, chunk_size=1024 * 1024):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+# Deterministic output name for writing next to the input: the same file and pipeline always map
+# to the same output, and different pipelines never overwrite each other.
+def output_name(input_path, signature, output_format=None):
+    base, ext = os.path.splitext(input_path)
+    ext = '.' + output_format.lstrip('.') if output_format else ext
+    return f"{base}_processed_{signature}{ext}"
+
+# BatchManifest Class for the SQLite index of processed inputs
+class BatchManifest:
+    def __init__(self, path, flush_every=100, flush_seconds=2.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.last_flush = time.monotonic()
+        # Planning happens on the caller's thread and recording on the thread that consumes
+        # results; the two never overlap, so one connection is shared between them.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " input_path TEXT NOT NULL, signature TEXT NOT NULL, size INTEGER, mtime_ns INTEGER,"
+            " digest TEXT, output_path TEXT, status TEXT, error TEXT, updated REAL,"
+            " PRIMARY KEY (input_path, signature))"
+        )
+        self.conn.commit()
+        self.pending = []
+        self.stats = {}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def rows(self, signature):
+        cursor = self.conn.execute("SELECT input_path, size, mtime_ns, digest, output_path, status FROM files WHERE signature = ?", (signature,))
+        return {row[0]: row[1:] for row in cursor}
+
+    # tasks: [(input_path, output_path)]. Returns (todo, skipped): todo items are
+    # (input_path, output_path, known_digest) where known_digest lets the worker skip an input
+    # whose mtime changed but whose bytes did not; skipped items are (input_path, output_path).
+    def plan(self, tasks, signature, force=False):
+        rows = {} if force else self.rows(signature)
+        todo, skipped = [], []
+        for input_path, output_path in tasks:
+            st = os.stat(input_path)
+            self.stats[os.path.abspath(input_path)] = (st.st_size, st.st_mtime_ns)
+            row = rows.get(os.path.abspath(input_path))
+            # A deleted or moved output is regenerated even when the input is unchanged.
+            if row is None or row[4] != 'done' or row[3] != os.path.abspath(output_path) or not os.path.exists(output_path):
+                todo.append((input_path, output_path, None))
+            elif (row[0], row[1]) == (st.st_size, st.st_mtime_ns):
+                skipped.append((input_path, output_path))
+            else:
+                todo.append((input_path, output_path, row[2]))
+        return todo, skipped
+
+    def record(self, result, signature):
+        input_path = os.path.abspath(result.input_path)
+        size, mtime_ns = self.stats.get(input_path, (None, None))
+        status = 'failed' if result.error else 'done'
+        self.pending.append((input_path, signature, size, mtime_ns, result.digest, os.path.abspath(result.output_path), status, result.error, time.time()))
+        if len(self.pending) >= self.flush_every or time.monotonic() - self.last_flush > self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self.pending)
+        self.conn.commit()
+        self.pending = []
@@ -0,0 +1,196 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Instrumentation layer: named spans around interesting calls (operations, load/save, history,
+# display) record wall time, CPU time of the calling thread, bytes allocated and image dimensions.
+# Records are aggregated for the in-app stats panel and handed to sinks (e.g. JSON lines files);
+# spans can optionally run under cProfile. Nothing here touches Tk.
+
+# JsonLinesSink Class for appending one JSON record per line; safe to share between threads, and
+# between processes since each record is a single append.
+class JsonLinesSink:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, default=str) + '\n'
+        with self.lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+# SpanStats Class for the running aggregate of one span name
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+        self.last = None
+
+    def add(self, record):
+        self.count += 1
+        self.wall += record['wall_ms']
+        self.cpu += record['cpu_ms']
+        self.max_wall = max(self.max_wall, record['wall_ms'])
+        self.last = record
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.wall / self.count,
+            'max_ms': self.max_wall,
+            'cpu_ms': self.cpu / self.count,
+            'total_ms': self.wall,
+            'bytes': self.last.get('bytes'),
+            'shape': self.last.get('shape'),
+        }
+
+# Instrumentation Class for recording spans
+class Instrumentation:
+    def __init__(self, enabled=True, sinks=None, trace_memory=False, profile=False, history=500):
+        self.enabled = enabled
+        self.sinks = list(sinks or [])
+        # tracemalloc slows every allocation down and its peak is process-wide, so memory is only
+        # measured on request; with concurrent spans each one sees the others' allocations too.
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.profiler = cProfile.Profile()
+        self.profile_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.stats = OrderedDict()
+        self.recent = deque(maxlen=history)
+        self.local = threading.local()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def set_trace_memory(self, enabled):
+        self.trace_memory = enabled
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.recent.clear()
+        with self.profile_lock:
+            self.profiler = cProfile.Profile()
+
+    # Usage: with instruments.span('op.gamma_transform', img) as fields: ...; fields['shape'] = out.shape
+    # The yielded dict is merged into the record, so callers can attach results (e.g. output size).
+    @contextmanager
+    def span(self, name, img=None, **fields):
+        if not self.enabled:
+            yield fields
+            return
+        if img is not None:
+            fields.setdefault('shape', tuple(img.shape))
+        depth = getattr(self.local, 'depth', 0)
+        self.local.depth = depth + 1
+        # cProfile can only be active once at a time, so only outermost spans are profiled and a
+        # span that overlaps one already profiling on another thread is timed but not profiled.
+        profiling = self.profile and depth == 0 and self.profile_lock.acquire(blocking=False)
+        memory = self.trace_memory and tracemalloc.is_tracing()
+        if memory:
+            before = tracemalloc.get_traced_memory()[0]
+            if depth == 0:
+                tracemalloc.reset_peak()
+        error = None
+        if profiling:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) already owns the hook.
+                self.profile_lock.release()
+                profiling = False
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield fields
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            if profiling:
+                self.profiler.disable()
+                self.profile_lock.release()
+            self.local.depth = depth
+            record = {'name': name, 'time': time.time(), 'wall_ms': wall * 1000, 'cpu_ms': cpu * 1000, 'thread': threading.current_thread().name, 'pid': os.getpid(), 'depth': depth}
+            if memory:
+                record['bytes'] = max(0, tracemalloc.get_traced_memory()[1] - before)
+            record.update(fields)
+            if error:
+                record['error'] = error
+            self.emit(record)
+
+    # Decorator form of span; the first array argument (if any) provides the dimensions.
+    def wrap(self, name, func):
+        def wrapper(*args, **kwargs):
+            img = next((a for a in args if hasattr(a, 'shape')), None)
+            with self.span(name, img):
+                return func(*args, **kwargs)
+        wrapper.__name__ = getattr(func, '__name__', name)
+        return wrapper
+
+    # Records a duration measured without a span, e.g. work done before this instance existed.
+    def record(self, name, wall, cpu=0.0, **fields):
+        if not self.enabled:
+            return
+        record = {'name': name, 'time': time.time(), 'wall_ms': wall * 1000, 'cpu_ms': cpu * 1000, 'thread': threading.current_thread().name, 'pid': os.getpid(), 'depth': 0}
+        record.update(fields)
+        self.emit(record)
+
+    def emit(self, record):
+        with self.lock:
+            self.stats.setdefault(record['name'], SpanStats()).add(record)
+            self.recent.append(record)
+        for sink in list(self.sinks):
+            try:
+                sink(record)
+            except OSError:
+                # A broken trace file must never take the operation down with it.
+                self.remove_sink(sink)
+
+    def summary(self):
+        with self.lock:
+            return OrderedDict((name, stats.summary()) for name, stats in self.stats.items())
+
+    def profile_report(self, sort='cumulative', limit=30):
+        out = io.StringIO()
+        with self.profile_lock:
+            try:
+                pstats.Stats(self.profiler, stream=out).sort_stats(sort).print_stats(limit)
+            except TypeError:
+                return "No profile data recorded yet."
+        return out.getvalue()
+
+    def dump_profile(self, path):
+        with self.profile_lock:
+            self.profiler.dump_stats(path)
+
+# Shared do-nothing instance for code paths that take an optional Instrumentation.
+DISABLED = Instrumentation(enabled=False)
+
+# Batch workers build one Instrumentation per trace file and process.
+_worker_instruments = {}
+
+def for_trace(path):
+    if not path:
+        return DISABLED
+    if path not in _worker_instruments:
+        _worker_instruments[path] = Instrumentation(sinks=[JsonLinesSink(path)])
+    return _worker_instruments[path]
@@ -0,0 +1,305 @@
+import json
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import cv2
+import numpy as np
+
+import image_engine as engine
+import image_io
+import image_profiler
+
+# Local HTTP service: POST encoded image bytes to an endpoint, get the encoded result back (or JSON
+# for analysis endpoints). Decoding, processing and encoding run in a process pool; only the
+# encoded bytes cross the process boundary. At most max_pending requests are admitted at once
+# (running or waiting for a worker); further requests are rejected with 429, before their body is
+# read, so clients back off instead of piling up behind a queue that never drains.
+#
+#   curl --data-binary @in.jpg 'http://127.0.0.1:8765/gamma?gamma=0.8&format=jpg' -o out.jpg
+#   curl --data-binary @in.png 'http://127.0.0.1:8765/stats?mode=grayscale'
+#   curl http://127.0.0.1:8765/metrics
+
+# Endpoint -> engine operation; parameters come from the query string.
+ENDPOINTS = OrderedDict([
+    ('negative', 'negative_transform'),
+    ('log', 'log_transform'),
+    ('gamma', 'gamma_transform'),
+    ('rotate', 'rotate_any'),
+    ('blur', 'gaussian_blur'),
+    ('median', 'median_filter'),
+    ('bilateral', 'bilateral_filter'),
+    ('hist-equalize', 'histogram_equalization'),
+    ('edges', 'edge_detection'),
+    ('stats', 'image_stats'),
+    ('fft', 'fft_magnitude'),
+])
+CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'webp': 'image/webp', 'bmp': 'image/bmp', 'tiff': 'image/tiff'}
+# Query parameters handled by the server rather than passed to the operation.
+RESERVED_PARAMS = ('mode', 'format', 'quality', 'max_size')
+FFT_MAX_SIZE = 1024
+# Integer-defaulted parameters that must stay whole numbers; the others (sigmas, brightness, Canny
+# thresholds) also take fractional values.
+INTEGER_PARAMS = ('size', 'radius')
+# Operation defaults, read once: describe_operations() inspects every operation's signature.
+OPERATION_DEFAULTS = engine.describe_operations()
+
+def _init_worker():
+    # One process per core already saturates the machine; keep OpenCV from oversubscribing it.
+    cv2.setNumThreads(1)
+
+# Comma-separated numbers, with rows separated by ';' for 2D values: '10,20' -> (10.0, 20.0),
+# '0,1,0;1,-4,1;0,1,0' -> a 3x3 kernel.
+def _parse_numbers(value):
+    rows = [tuple(float(v) for v in row.split(',')) for row in value.split(';')]
+    return rows[0] if len(rows) == 1 else tuple(rows)
+
+# Query values arrive as strings; they are converted to the type of the operation's default.
+# Optional parameters (default None) are numbers when they parse as such (rotate center, gradient
+# peaks) and names otherwise (Canny's automatic thresholds).
+def parse_params(op, query):
+    defaults = OPERATION_DEFAULTS.get(op, {})
+    params = {}
+    for key, value in query.items():
+        if key in RESERVED_PARAMS:
+            continue
+        if key not in defaults:
+            raise ValueError(f"Unknown parameter for {op}: {key}")
+        default = defaults[key]
+        try:
+            if isinstance(default, bool):
+                params[key] = value.lower() in ('1', 'true', 'yes')
+            elif isinstance(default, int) and key in INTEGER_PARAMS:
+                params[key] = int(value)
+            elif isinstance(default, int):
+                try:
+                    params[key] = int(value)
+                except ValueError:
+                    params[key] = float(value)
+            elif isinstance(default, float):
+                params[key] = float(value)
+            elif isinstance(default, tuple):
+                params[key] = _parse_numbers(value)
+            elif value.lower() in ('', 'none'):
+                params[key] = None
+            elif default is None:
+                try:
+                    params[key] = _parse_numbers(value)
+                except ValueError:
+                    params[key] = value
+            else:
+                params[key] = value
+        except ValueError:
+            raise ValueError(f"Invalid value for {key}: {value!r}") from None
+    return params
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+# Runs in a worker process: returns (content_type, body bytes).
+def handle_request(endpoint, data, query):
+    op = ENDPOINTS[endpoint]
+    mode = query.get('mode', 'color')
+    # Analysis endpoints take no operation parameters, but unknown keys are still rejected.
+    params = parse_params(op, query)
+    img = image_io.decode_image(data, mode)
+    if endpoint == 'stats':
+        return 'application/json', json.dumps(_json_safe(engine.image_stats(img))).encode()
+    fmt = query.get('format', 'png').lower()
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported format: {fmt}")
+    quality = int(query['quality']) if 'quality' in query else None
+    if quality is not None and fmt not in ('jpg', 'jpeg', 'webp'):
+        raise ValueError(f"Quality only applies to jpg and webp output, not {fmt}")
+    if endpoint == 'fft':
+        spectra = engine.fft_magnitude(img, max_size=int(query.get('max_size', FFT_MAX_SIZE)))
+        planes = [cv2.normalize(s, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8) for s in spectra.values()]
+        out = np.dstack(planes) if len(planes) > 1 else planes[0]
+    else:
+        out = engine.apply_operation(img, op, **params)
+    options = {'jpeg_quality': quality, 'webp_quality': quality} if quality is not None else None
+    return CONTENT_TYPES[fmt], image_io.encode_image(out, '.' + fmt, options)
+
+# EndpointMetrics Class for request counts and latency percentiles of one endpoint
+class EndpointMetrics:
+    def __init__(self, window=1000):
+        self.count = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.latencies = deque(maxlen=window)
+
+    def add(self, ms, error=False):
+        self.count += 1
+        self.errors += error
+        self.total_ms += ms
+        self.latencies.append(ms)
+
+    def summary(self):
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'count': self.count, 'errors': self.errors, 'rejected': self.rejected,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'max_ms': float(latencies.max()),
+        }
+
+# ImageServer Class for the HTTP front end and its worker pool
+class ImageServer:
+    # workers: processes (default: CPU count); max_pending: requests admitted at once, running or
+    # queued (default: 4 per worker); max_body: largest accepted request body in bytes.
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, max_pending=None, max_body=64 * 1024 * 1024, instruments=None, mp_context=None):
+        self.workers = max(1, workers or multiprocessing.cpu_count())
+        self.max_pending = max_pending or self.workers * 4
+        self.max_body = max_body
+        self.instruments = instruments or image_profiler.DISABLED
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.lock = threading.Lock()
+        self.metrics = OrderedDict((endpoint, EndpointMetrics()) for endpoint in ENDPOINTS)
+        self.started = time.time()
+        self.mp_context = mp_context or multiprocessing.get_context('spawn')
+        self.pool = self._new_pool()
+        # Start the workers (and import the engine in them) before the first request arrives.
+        for future in [self.pool.submit(_init_worker) for _ in range(self.workers)]:
+            future.result()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+
+    def close(self):
+        self.httpd.server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def metrics_summary(self):
+        with self.lock:
+            endpoints = {name: m.summary() for name, m in self.metrics.items() if m.count or m.rejected}
+        return {'uptime_s': time.time() - self.started, 'workers': self.workers, 'max_pending': self.max_pending, 'endpoints': endpoints}
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context, initializer=_init_worker)
+
+    # A worker that dies (killed, out of memory, a crash in native code) breaks the whole pool and
+    # every later submit would fail; the first request to notice replaces it.
+    def _replace_pool(self, broken):
+        with self.lock:
+            if self.pool is not broken:
+                return
+            self.pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    # Takes one of the max_pending slots, or counts a rejection. Called before the request body
+    # is read, so a rejected client has not uploaded it and at most max_pending bodies are held.
+    def admit(self, endpoint):
+        if self.slots.acquire(blocking=False):
+            return True
+        with self.lock:
+            self.metrics[endpoint].rejected += 1
+        return False
+
+    def release(self):
+        self.slots.release()
+
+    # Returns (status, content_type, body) for one admitted POST.
+    def process(self, endpoint, data, query):
+        start = time.perf_counter()
+        status = 200
+        pool = self.pool
+        try:
+            with self.instruments.span('http.' + endpoint, bytes_in=len(data)):
+                content_type, body = pool.submit(handle_request, endpoint, data, query).result()
+        except ValueError as e:
+            status, content_type, body = 400, 'application/json', json.dumps({'error': str(e)}).encode()
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            status, content_type, body = 503, 'application/json', b'{"error": "A worker process died, retry later."}'
+        except Exception as e:
+            status, content_type, body = 500, 'application/json', json.dumps({'error': f"{type(e).__name__}: {e}"}).encode()
+        with self.lock:
+            self.metrics[endpoint].add((time.perf_counter() - start) * 1000, status != 200)
+        return status, content_type, body
+
+    def _handler_class(self):
+        server = self
+
+        # Handler Class for one HTTP connection
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, status, content_type, body, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_json(self, status, data):
+                self.send_body(status, 'application/json', json.dumps(data).encode())
+
+            def do_GET(self):
+                path = urlsplit(self.path).path.strip('/')
+                if path == 'health':
+                    self.send_json(200, {'status': 'ok'})
+                elif path == 'metrics':
+                    self.send_json(200, server.metrics_summary())
+                elif path in ('', 'operations'):
+                    self.send_json(200, {name: {k: v for k, v in OPERATION_DEFAULTS[op].items() if not isinstance(v, tuple)} if op in OPERATION_DEFAULTS else {} for name, op in ENDPOINTS.items()})
+                else:
+                    self.send_json(404, {'error': f"Unknown endpoint: /{path}"})
+
+            # Requests answered without reading their body leave unread bytes on the connection,
+            # so it is closed after the response.
+            def reject(self, status, message, headers=None):
+                self.close_connection = True
+                self.send_body(status, 'application/json', json.dumps({'error': message}).encode(), headers)
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                endpoint = url.path.strip('/')
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                except ValueError:
+                    self.reject(400, "Content-Length must be an integer.")
+                    return
+                if length <= 0 or length > server.max_body:
+                    self.reject(413 if length > 0 else 400, f"Body must be between 1 byte and {server.max_body} bytes.")
+                    return
+                if endpoint not in ENDPOINTS:
+                    self.reject(404, f"Unknown endpoint: /{endpoint}")
+                    return
+                if not server.admit(endpoint):
+                    self.reject(429, "Server busy, retry later.", {'Retry-After': '1'})
+                    return
+                try:
+                    data = self.rfile.read(length)
+                    status, content_type, body = server.process(endpoint, data, dict(parse_qsl(url.query)))
+                finally:
+                    server.release()
+                self.send_body(status, content_type, body, {'Retry-After': '1'} if status == 503 else None)
+
+        return Handler
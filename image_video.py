@@ -0,0 +1,263 @@
+import glob
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+import image_engine as engine
+import image_io
+import image_profiler
+
+# Streaming pipeline for videos and numbered frame sequences. Decoding, processing and encoding run
+# on separate threads connected by bounded queues, so they overlap (OpenCV releases the GIL) and
+# only a fixed number of frames is alive at once, however long the footage is.
+#
+# Sources: a video file, a printf-style sequence pattern (frames/img_%04d.png) or a directory of
+# images (sorted by name). Destinations: a video file (.mp4, .avi, .mkv, .mov), a sequence pattern
+# or a directory, which receives frame_000000.png, frame_000001.png, ...
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.m4v', '.wmv', '.webm')
+FOURCC = {'.mp4': 'mp4v', '.m4v': 'mp4v', '.mov': 'mp4v', '.avi': 'MJPG', '.mkv': 'XVID', '.webm': 'VP80', '.wmv': 'WMV2'}
+DEFAULT_FPS = 25.0
+
+# Sentinel passed down the queues after the last frame.
+_END = object()
+
+def is_sequence_pattern(path):
+    return '%' in os.path.basename(path)
+
+# FrameSource Class for reading frames in internal channel order
+class FrameSource:
+    def __init__(self, path, mode='color'):
+        self.path = path
+        self.mode = mode
+        self.capture = None
+        self.files = None
+        self.fps = None
+        self.frame_count = None
+        if os.path.isdir(path):
+            self.files = sorted(f for f in glob.glob(os.path.join(path, '*')) if f.lower().endswith(image_io.IMAGE_EXTENSIONS))
+            if not self.files:
+                raise ValueError(f"No images found in {path}")
+            self.frame_count = len(self.files)
+            return
+        if not is_sequence_pattern(path) and not os.path.isfile(path):
+            raise ValueError(f"Input not found: {path}")
+        self.capture = cv2.VideoCapture(path, cv2.CAP_IMAGES if is_sequence_pattern(path) else cv2.CAP_ANY)
+        if not self.capture.isOpened():
+            raise ValueError(f"Could not open {path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or None
+        count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_count = count if count > 0 else None
+
+    def __iter__(self):
+        if self.files is not None:
+            for file in self.files:
+                yield image_io.read_image(file, self.mode)
+            return
+        while True:
+            ok, frame = self.capture.read()
+            if not ok:
+                return
+            # Captures decode to BGR; the engine works in RGB.
+            if frame.ndim == 2:
+                yield frame if self.mode == 'grayscale' else cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
+            else:
+                yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY if self.mode == 'grayscale' else cv2.COLOR_BGR2RGB)
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.release()
+
+# FrameSink Class for writing frames to a video or an image sequence. The writer is opened on the
+# first frame, since operations such as halve_resolution or rotate_90 change the frame size.
+class FrameSink:
+    def __init__(self, path, fps=None, codec=None, encoder_options=None):
+        self.path = path
+        self.fps = fps or DEFAULT_FPS
+        self.codec = codec
+        self.encoder_options = encoder_options
+        self.writer = None
+        self.shape = None
+        self.count = 0
+        ext = os.path.splitext(path)[1].lower()
+        self.video = ext in VIDEO_EXTENSIONS and not is_sequence_pattern(path)
+        if self.video:
+            self.codec = codec or FOURCC.get(ext, 'mp4v')
+            if len(self.codec) != 4:
+                raise ValueError("Codec must be a four-character code, e.g. mp4v.")
+        else:
+            os.makedirs(os.path.dirname(path) if is_sequence_pattern(path) else path, exist_ok=True)
+
+    def write(self, frame):
+        if self.shape is None:
+            self.shape = frame.shape
+            if self.video:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                fourcc = cv2.VideoWriter_fourcc(*self.codec)
+                self.writer = cv2.VideoWriter(self.path, fourcc, self.fps, (frame.shape[1], frame.shape[0]), frame.ndim == 3)
+                if not self.writer.isOpened():
+                    raise ValueError(f"Could not open a {self.codec} writer for {self.path}")
+        elif frame.shape != self.shape:
+            raise ValueError(f"Frame {self.count} is {frame.shape}, earlier frames were {self.shape}.")
+        if self.video:
+            self.writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) if frame.ndim == 3 else frame)
+        elif is_sequence_pattern(self.path):
+            image_io.write_image(self.path % self.count, frame, self.encoder_options)
+        else:
+            image_io.write_image(os.path.join(self.path, f"frame_{self.count:06d}.png"), frame, self.encoder_options)
+        self.count += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+
+# VideoPipeline Class for the reader -> processor -> writer stages
+class VideoPipeline:
+    # workers: processing threads (frames are re-ordered before writing). queue_size: frames
+    # buffered between each pair of stages.
+    def __init__(self, steps, mode='color', workers=1, queue_size=8, instruments=None):
+        self.steps = list(steps)
+        for step in self.steps:
+            engine.validate_step(step)
+        self.stages = engine.plan_pipeline(self.steps)
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.instruments = instruments or image_profiler.DISABLED
+        self.stopped = threading.Event()
+        self.error = None
+        self.frames_done = 0
+        self.frame_count = None
+        self.in_flight = None
+        self.peak_pending = 0
+
+    def stop(self):
+        self.stopped.set()
+
+    # Blocking put/get that give up once the pipeline is stopped (after an error or stop()).
+    def _put(self, q, item):
+        while not self.stopped.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, q):
+        while not self.stopped.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _END
+
+    def _fail(self, e):
+        if self.error is None:
+            self.error = e
+        self.stopped.set()
+
+    # Waits for an in-flight slot, giving up once the pipeline is stopped.
+    def _acquire(self):
+        while not self.stopped.is_set():
+            if self.in_flight.acquire(timeout=0.1):
+                return True
+        return False
+
+    def _read(self, source, frames):
+        try:
+            for index, frame in enumerate(source):
+                if not self._acquire():
+                    return
+                if not self._put(frames, (index, frame)):
+                    self.in_flight.release()
+                    return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.workers):
+                self._put(frames, _END)
+
+    def _process(self, frames, results):
+        try:
+            while True:
+                item = self._get(frames)
+                if item is _END:
+                    break
+                index, frame = item
+                with self.instruments.span('video.process', frame):
+                    for stage in self.stages:
+                        frame = engine.run_stage(frame, stage)
+                if not self._put(results, (index, frame)):
+                    return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(results, _END)
+
+    # Frames may finish out of order with several workers; they are held until their turn. Each
+    # written frame frees an in-flight slot, so at most queue_size + workers frames are held.
+    def _write(self, sink, results, progress):
+        pending = {}
+        next_index = 0
+        finished = 0
+        try:
+            while finished < self.workers:
+                item = self._get(results)
+                if item is _END:
+                    if self.stopped.is_set():
+                        return
+                    finished += 1
+                    continue
+                pending[item[0]] = item[1]
+                self.peak_pending = max(self.peak_pending, len(pending))
+                while next_index in pending:
+                    with self.instruments.span('video.encode', pending[next_index]):
+                        sink.write(pending.pop(next_index))
+                    self.in_flight.release()
+                    next_index += 1
+                    self.frames_done = next_index
+                    if progress:
+                        progress(next_index, self.frame_count)
+        except Exception as e:
+            self._fail(e)
+
+    # Returns {'frames', 'seconds', 'fps'}; raises the first error of any stage. progress(done,
+    # total) is called from the writer thread after every frame (total is None when unknown).
+    def run(self, source_path, destination, fps=None, codec=None, encoder_options=None, progress=None):
+        source = FrameSource(source_path, self.mode)
+        try:
+            sink = FrameSink(destination, fps or source.fps, codec, encoder_options)
+        except Exception:
+            source.close()
+            raise
+        self.frame_count = source.frame_count
+        # Frames read but not yet written (queued, processing or waiting to be reordered) are
+        # limited to queue_size + workers, so memory stays constant even when one frame is slow
+        # and the others run ahead of it. A stopped run abandons its slots with the semaphore;
+        # peak_pending is the most frames ever held for reordering.
+        self.in_flight = threading.BoundedSemaphore(self.queue_size + self.workers)
+        self.peak_pending = 0
+        frames = queue.Queue(self.queue_size)
+        results = queue.Queue(self.queue_size)
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._read, args=(source, frames), name='video-read', daemon=True)]
+        threads += [threading.Thread(target=self._process, args=(frames, results), name=f'video-process-{i}', daemon=True) for i in range(self.workers)]
+        writer = threading.Thread(target=self._write, args=(sink, results, progress), name='video-write', daemon=True)
+        try:
+            for thread in threads + [writer]:
+                thread.start()
+            writer.join()
+            self.stopped.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            source.close()
+            sink.close()
+        if self.error is not None:
+            raise self.error
+        seconds = time.perf_counter() - start
+        return {'frames': sink.count, 'seconds': seconds, 'fps': sink.count / seconds if seconds > 0 else 0.0}
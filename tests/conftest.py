@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+# The modules live at the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Smoothed noise: has edges, flat areas and the full range of levels without being pure noise.
+def _make_image(shape, seed):
+    noise = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    return cv2.normalize(cv2.GaussianBlur(noise, (7, 7), 0), None, 0, 255, cv2.NORM_MINMAX)
+
+@pytest.fixture
+def gray():
+    return _make_image((96, 128), 0)
+
+@pytest.fixture
+def color():
+    return _make_image((96, 128, 3), 1)
+
+@pytest.fixture(params=['gray', 'color'])
+def image(request):
+    return request.getfixturevalue(request.param)
+
+# The GUI module configures a log file in the working directory when imported; import it from a
+# scratch directory. Only its Tk-free classes are tested, so no display is needed.
+@pytest.fixture(scope='session')
+def gui(tmp_path_factory):
+    pytest.importorskip('tkinter')
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('gui'))
+    try:
+        import image_Processing
+    finally:
+        os.chdir(cwd)
+    return image_Processing
+
+# FakeWidget Class for standing in for Tk widgets, variables and the root window: after()
+# callbacks are queued for pump(), get() returns the given value and everything else is a no-op.
+class FakeWidget:
+    def __init__(self, value='', size=(400, 300)):
+        self.value = value
+        self.size = size
+        self.text = None
+        self.callbacks = []
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def config(self, **kwargs):
+        self.text = kwargs.get('text', self.text)
+
+    configure = config
+
+    def winfo_width(self):
+        return self.size[0]
+
+    def winfo_height(self):
+        return self.size[1]
+
+    def after(self, ms, func, *args):
+        self.callbacks.append((func, args))
+        return len(self.callbacks)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+# Tests that need extra fake widgets (entries, labels) take the class through this fixture rather
+# than importing conftest.
+@pytest.fixture
+def fake_widget():
+    return FakeWidget
+
+# An ImageProcessingApp without a window: setup_gui only installs fake widgets, message boxes are
+# collected in app.messages and the pixels of frames passed to draw_frame in app.frames.
+@pytest.fixture
+def app(gui, monkeypatch):
+    def setup_gui(self):
+        self.root = FakeWidget()
+        self.status_label = FakeWidget()
+        self.image_canvas = FakeWidget()
+        self.preview_var = FakeWidget("0")
+        self.lazy_var = FakeWidget("0")
+        self.scheduler = gui.OperationScheduler(self.root, self.status_label, poll_ms=1)
+    monkeypatch.setattr(gui.ImageProcessingApp, 'setup_gui', setup_gui)
+    monkeypatch.setattr(gui.ImageTk, 'PhotoImage', lambda image: np.asarray(image))
+    messages = []
+    monkeypatch.setattr(gui.messagebox, 'showerror', lambda *args: messages.append(args))
+    monkeypatch.setattr(gui.messagebox, 'showinfo', lambda *args: messages.append(args))
+    app = gui.ImageProcessingApp()
+    app.messages = messages
+    app.frames = []
+    monkeypatch.setattr(app, 'draw_frame', app.frames.append)
+    return app
+
+# Runs queued after() callbacks until the scheduler (an OperationScheduler, or an app's) is idle.
+def pump(target, timeout=10.0):
+    scheduler = getattr(target, 'scheduler', target)
+    callbacks = scheduler.root.callbacks
+    deadline = time.monotonic() + timeout
+    while (callbacks or scheduler.busy()) and time.monotonic() < deadline:
+        if callbacks:
+            func, args = callbacks.pop(0)
+            func(*args)
+        else:
+            time.sleep(0.001)
+    assert not scheduler.busy()
+
+@pytest.fixture
+def run_pending():
+    return pump
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+import image_engine as engine
+import image_io
+from image_batch import BatchExecutor
+
+STEPS = ['negative_transform', {'op': 'gaussian_blur', 'size': 5}]
+
+@pytest.fixture
+def inputs(tmp_path, color):
+    paths = []
+    for i in range(6):
+        path = str(tmp_path / f"in_{i}.png")
+        image_io.write_image(path, np.roll(color, 7 * i, axis=1))
+        paths.append(path)
+    return paths
+
+def _tasks(paths, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    return [(path, os.path.join(out_dir, os.path.basename(path))) for path in paths]
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_outputs_match_engine(inputs, tmp_path, jobs):
+    results = list(BatchExecutor(STEPS, jobs=jobs).run(_tasks(inputs, str(tmp_path / 'out'))))
+    assert [r.index for r in results] == list(range(len(inputs)))
+    for result in results:
+        assert result.error is None
+        expected = engine.run_pipeline(image_io.read_image(result.input_path), STEPS)
+        assert np.array_equal(image_io.read_image(result.output_path), expected)
+
+def test_failed_file_does_not_stop_the_batch(inputs, tmp_path):
+    broken = str(tmp_path / 'broken.png')
+    with open(broken, 'wb') as f:
+        f.write(b'not an image')
+    results = list(BatchExecutor(STEPS, jobs=2, ordered=False).run(_tasks([broken] + inputs, str(tmp_path / 'out'))))
+    errors = [r for r in results if r.error]
+    assert len(results) == len(inputs) + 1
+    assert [r.input_path for r in errors] == [broken]
+
+def test_tasks_are_consumed_lazily(inputs, tmp_path):
+    consumed = []
+    def tasks():
+        for task in _tasks(inputs, str(tmp_path / 'out')):
+            consumed.append(task)
+            yield task
+    # Unordered, every finished file is reported before new tasks are drawn.
+    executor = BatchExecutor(STEPS, jobs=2, prefetch=1, ordered=False)
+    results = executor.run(tasks())
+    next(results)
+    assert len(consumed) == executor.max_pending
+    assert len(list(results)) == len(inputs) - 1
+
+def test_invalid_steps_fail_before_running():
+    with pytest.raises(ValueError):
+        BatchExecutor([{'op': 'gaussian_blur', 'radius': 3}])
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+import image_bench
+from image_cli import main
+
+def test_synthetic_images():
+    assert image_bench.synthetic_image('thumb', 'grayscale').shape == (256, 256)
+    assert image_bench.synthetic_image('thumb', 'color').shape == (256, 256, 3)
+
+def test_run_benchmarks_covers_every_applicable_case():
+    results = image_bench.run_benchmarks(['thumb'], ['grayscale', 'color'], ['negative_transform', 'adjust_color'], repeat=1, report=None)
+    assert sorted(results['results']) == ['adjust_color|color|thumb', 'negative_transform|color|thumb', 'negative_transform|grayscale|thumb']
+    for result in results['results'].values():
+        assert result['seconds'] > 0 and result['mp_per_s'] > 0 and result['temps'] >= 0
+    assert 'opencv' in results['meta']
+
+def _results(mp_per_s):
+    return {'results': {'negative_transform|color|thumb': {'mp_per_s': mp_per_s, 'peak_mb': 1.0}}}
+
+def test_compare_flags_slowdowns_beyond_the_threshold():
+    assert image_bench.compare_results(_results(80.0), _results(100.0), 0.10, report=None) == ['negative_transform|color|thumb']
+    assert image_bench.compare_results(_results(95.0), _results(100.0), 0.10, report=None) == []
+
+def test_cli_saves_and_compares(tmp_path, capsys):
+    saved = str(tmp_path / 'bench.json')
+    assert main(['bench', '--sizes', 'thumb', '--modes', 'grayscale', '--ops', 'negative_transform', '--repeat', '1', '--save', saved]) == 0
+    with open(saved) as f:
+        assert list(json.load(f)['results']) == ['negative_transform|grayscale|thumb']
+    baseline = str(tmp_path / 'fast.json')
+    with open(baseline, 'w') as f:
+        json.dump({'results': {'negative_transform|grayscale|thumb': {'mp_per_s': 1e12, 'peak_mb': 0.0}}}, f)
+    assert main(['bench', '--sizes', 'thumb', '--modes', 'grayscale', '--ops', 'negative_transform', '--repeat', '1', '--compare', baseline]) == 1
+
+@pytest.mark.parametrize('option, value', [('--sizes', '2mp'), ('--modes', 'colour'), ('--ops', 'blur')])
+def test_cli_rejects_unknown_values(option, value, capsys):
+    assert main(['bench', option, value]) == 2
+    assert capsys.readouterr().err.startswith('Error:')
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+import image_cache
+import image_engine as engine
+from image_cache import ResultCache, image_digest, make_key
+
+def test_cached_result_matches_recompute(color):
+    cache = ResultCache()
+    calls = []
+    def compute():
+        calls.append(1)
+        return engine.gaussian_blur(color, size=7)
+    first = cache.cached(color, 'gaussian_blur', {'size': 7}, compute)
+    second = cache.cached(color, 'gaussian_blur', {'size': 7}, compute)
+    assert len(calls) == 1 and cache.hits == 1
+    assert np.array_equal(second, engine.gaussian_blur(color, size=7)) and second is first
+    assert cache.cached(color, 'gaussian_blur', {'size': 7}, compute, copy=True) is not first
+
+def test_uncacheable_ops_always_compute(gray):
+    cache = ResultCache()
+    cache.cached(gray, 'negative_transform', {}, lambda: 255 - gray)
+    assert not cache.entries
+
+def test_key_includes_version_and_array_params(gray, monkeypatch):
+    digest = image_digest(gray)
+    kernel = np.ones((35, 35)) / 35 ** 2
+    key = make_key(digest, 'convolve', {'kernel': kernel})
+    assert key.startswith(f"v{image_cache.CACHE_VERSION}-{digest}-")
+    other = kernel.copy()
+    other[17, 17] += 1
+    assert make_key(digest, 'convolve', {'kernel': other}) != key
+    monkeypatch.setattr(image_cache, 'CACHE_VERSION', image_cache.CACHE_VERSION + 1)
+    assert make_key(digest, 'convolve', {'kernel': kernel}) != key
+
+def test_memory_tier_is_bounded(gray):
+    cache = ResultCache(max_bytes=gray.nbytes * 2)
+    for i in range(4):
+        cache.put(make_key(str(i), 'op'), gray.copy())
+    assert cache.nbytes <= gray.nbytes * 2 and len(cache.entries) == 2
+    assert cache.get(make_key('0', 'op')) is None and cache.get(make_key('3', 'op')) is not None
+
+def test_disk_tier_is_shared_between_instances(tmp_path, color):
+    key = make_key(image_digest(color), 'pipeline', {'steps': ['negative_transform']})
+    stats = engine.image_stats(color)
+    spectra = engine.fft_magnitude(color)
+    writer = ResultCache(max_bytes=0, disk_dir=str(tmp_path))
+    writer.put(key, 255 - color)
+    writer.put(key + 'stats', stats)
+    writer.put(key + 'fft', spectra)
+    reader = ResultCache(max_bytes=0, disk_dir=str(tmp_path))
+    assert np.array_equal(reader.get(key), 255 - color)
+    loaded = reader.get(key + 'stats')
+    assert list(loaded) == list(stats) and loaded == stats
+    loaded = reader.get(key + 'fft')
+    assert list(loaded) == list(spectra) and all(np.array_equal(loaded[k], spectra[k]) for k in spectra)
+    assert all(name.endswith('.npz') for name in os.listdir(tmp_path))
+
+def test_corrupt_disk_entry_is_a_miss_and_removed(tmp_path, gray):
+    cache = ResultCache(max_bytes=0, disk_dir=str(tmp_path))
+    key = make_key(image_digest(gray), 'pipeline')
+    cache.put(key, gray)
+    path = cache._disk_path(key)
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) // 2)
+    assert cache.get(key) is None and not os.path.exists(path)
+    with open(path, 'wb') as f:
+        f.write(b'not an npz file')
+    assert cache.get(key) is None and not os.path.exists(path)
+
+def test_pickled_object_arrays_are_not_loaded(tmp_path, gray):
+    cache = ResultCache(max_bytes=0, disk_dir=str(tmp_path))
+    key = make_key(image_digest(gray), 'pipeline')
+    with open(cache._disk_path(key), 'wb') as f:
+        np.savez(f, __meta__=np.array('{"key": "%s", "kind": "array"}' % key), a0=np.array([object()], dtype=object))
+    assert cache.get(key) is None
+
+def test_disk_tier_evicts_to_the_limit(tmp_path, gray):
+    cache = ResultCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=gray.nbytes * 3)
+    for i in range(6):
+        cache.put(make_key(str(i), 'pipeline'), gray)
+    total = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path))
+    assert total <= gray.nbytes * 3
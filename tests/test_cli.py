@@ -0,0 +1,65 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import image_engine as engine
+import image_io
+from image_cli import load_pipeline, main
+
+PIPELINE = {'mode': 'grayscale', 'operations': [{'op': 'gamma_transform', 'gamma': 0.8}, 'negative_transform']}
+
+@pytest.fixture
+def pipeline_file(tmp_path):
+    path = tmp_path / 'pipeline.json'
+    path.write_text(json.dumps(PIPELINE))
+    return str(path)
+
+@pytest.fixture
+def input_dir(tmp_path, color):
+    path = tmp_path / 'in'
+    path.mkdir()
+    for name in ('a.png', 'b.png'):
+        image_io.write_image(str(path / name), color)
+    (path / 'notes.txt').write_text('not an image')
+    return str(path)
+
+def test_load_pipeline(pipeline_file):
+    steps, mode = load_pipeline(pipeline_file)
+    assert steps == PIPELINE['operations']
+    assert mode == 'grayscale'
+
+def test_load_yaml_pipeline(tmp_path):
+    pytest.importorskip('yaml')
+    path = tmp_path / 'pipeline.yaml'
+    path.write_text("operations:\n  - op: gaussian_blur\n    size: 5\n  - flip_horizontal\n")
+    assert load_pipeline(str(path)) == ([{'op': 'gaussian_blur', 'size': 5}, 'flip_horizontal'], 'color')
+
+@pytest.mark.parametrize('data', [{'mode': 'sepia', 'operations': []}, {'steps': []}, ['no_such_op']])
+def test_load_pipeline_rejects_invalid_files(tmp_path, data):
+    path = tmp_path / 'pipeline.json'
+    path.write_text(json.dumps(data))
+    with pytest.raises(ValueError):
+        load_pipeline(str(path))
+
+def test_run_writes_processed_images(pipeline_file, input_dir, tmp_path, color):
+    out = str(tmp_path / 'out')
+    assert main(['run', pipeline_file, '-i', input_dir, '-o', out, '-j', '1', '-q']) == 0
+    assert sorted(os.listdir(out)) == ['a.png', 'b.png']
+    expected = engine.run_pipeline(image_io.read_image(os.path.join(input_dir, 'a.png'), 'grayscale'), PIPELINE['operations'])
+    assert np.array_equal(image_io.read_image(os.path.join(out, 'a.png'), 'grayscale'), expected)
+
+def test_run_converts_format(pipeline_file, input_dir, tmp_path):
+    out = str(tmp_path / 'out')
+    assert main(['run', pipeline_file, '-i', input_dir, '-o', out, '-j', '1', '-q', '--format', 'jpg']) == 0
+    assert sorted(os.listdir(out)) == ['a.jpg', 'b.jpg']
+
+def test_errors_exit_with_status_2(pipeline_file, input_dir, capsys):
+    assert main(['run', pipeline_file, '-i', input_dir, '-o', input_dir]) == 2
+    assert main(['run', pipeline_file, '-i', input_dir + '_missing', '-o', input_dir]) == 2
+    assert 'Error:' in capsys.readouterr().err
+
+def test_list(capsys):
+    assert main(['list']) == 0
+    assert 'gamma_transform(gamma=1.0, c=1.0)' in capsys.readouterr().out
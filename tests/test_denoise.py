@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import pytest
+
+import image_engine as engine
+
+@pytest.mark.parametrize('size', [5, 9, 25])
+def test_bilateral_auto_is_exact(image, size):
+    expected = cv2.bilateralFilter(image, size, 75, 75)
+    assert np.array_equal(engine.bilateral_filter(image, size), expected)
+    assert np.array_equal(engine.bilateral_filter(image, size, method='exact'), expected)
+    # sigma_space is honoured at every size.
+    assert np.array_equal(engine.bilateral_filter(image, size, sigma_space=5), cv2.bilateralFilter(image, size, 75, 5))
+
+def test_fast_bilateral_is_opt_in(image):
+    fast = engine.bilateral_filter(image, 15, sigma_color=30, method='fast')
+    assert np.array_equal(fast, engine.guided_filter(image, 7, 900.0))
+    assert not np.array_equal(fast, engine.bilateral_filter(image, 15, sigma_color=30))
+
+def test_median_auto_switches_at_the_threshold(image):
+    below = engine.MEDIAN_FAST_MIN_SIZE - 2
+    assert np.array_equal(engine.median_filter(image, below), cv2.medianBlur(image, below))
+    size = engine.MEDIAN_FAST_MIN_SIZE + 10
+    fast = engine.median_filter(image, size)
+    assert np.array_equal(fast, engine.median_filter(image, size, 'fast'))
+    assert np.abs(fast.astype(int) - cv2.medianBlur(image, size)).mean() < 8
+    assert np.array_equal(engine.median_filter(image, size, 'exact'), cv2.medianBlur(image, size))
+
+def test_invalid_filter_parameters(gray):
+    with pytest.raises(ValueError):
+        engine.median_filter(gray, 5, 'approximate')
+    with pytest.raises(ValueError):
+        engine.bilateral_filter(gray, 5, method='approximate')
+    with pytest.raises(ValueError):
+        engine.guided_filter(gray, 0)
+
+def test_guided_filter_keeps_flat_images(image):
+    flat = np.full_like(image, 77)
+    assert np.array_equal(engine.guided_filter(flat, 4, 100.0), flat)
+
+def test_adjust_color_matches_hsv_reference(color):
+    hsv = cv2.cvtColor(color, cv2.COLOR_RGB2HSV).astype(np.float64)
+    hsv[:, :, 1] = np.clip(hsv[:, :, 1] * 1.4, 0, 255)
+    hsv[:, :, 2] = np.clip(hsv[:, :, 2] - 30, 0, 255)
+    expected = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2RGB)
+    assert np.array_equal(engine.adjust_color(color, 1.4, -30), expected)
+
+def test_adjust_color_validation(gray, color):
+    with pytest.raises(ValueError):
+        engine.adjust_color(gray, 1.2, 0)
+    with pytest.raises(ValueError):
+        engine.adjust_color(color, 2.5, 0)
+    with pytest.raises(ValueError):
+        engine.adjust_color(color, 1.0, 300)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import image_engine as engine
+
+# Operations that keep the image size.
+SHAPE_PRESERVING = [name for name in engine.OPERATIONS if name not in ('halve_resolution', 'rotate_90')]
+
+@pytest.mark.parametrize('name', SHAPE_PRESERVING)
+def test_operation_keeps_shape_and_dtype(image, name):
+    if name == 'adjust_color' and image.ndim == 2:
+        pytest.skip("color only")
+    out = engine.apply_operation(image, name)
+    assert out.dtype == np.uint8
+    assert out.shape == image.shape
+
+def test_geometric_operations(image):
+    h, w = image.shape[:2]
+    assert engine.halve_resolution(image).shape[:2] == (h // 2, w // 2)
+    assert np.array_equal(engine.rotate_90(image), np.rot90(image, -1))
+    assert np.array_equal(engine.flip_horizontal(image), image[:, ::-1])
+
+def test_negative_transform(image):
+    assert np.array_equal(engine.negative_transform(image), 255 - image)
+
+def test_operations_do_not_modify_input(image):
+    before = image.copy()
+    for name in SHAPE_PRESERVING:
+        if name == 'adjust_color' and image.ndim == 2:
+            continue
+        engine.apply_operation(image, name)
+    assert np.array_equal(image, before)
+
+def test_unknown_operation():
+    with pytest.raises(ValueError, match="Unknown operation"):
+        engine.get_operation('nope')
+
+@pytest.mark.parametrize('step', [{'op': 'gaussian_blur', 'sigma': 2}, {'size': 3}, 42])
+def test_validate_step_rejects_bad_steps(step):
+    with pytest.raises(ValueError):
+        engine.validate_step(step)
+
+def test_invalid_parameters(gray):
+    with pytest.raises(ValueError):
+        engine.gaussian_blur(gray, size=4)
+    with pytest.raises(ValueError):
+        engine.gamma_transform(gray, gamma=0)
+
+def test_describe_operations_lists_defaults():
+    described = engine.describe_operations()
+    assert set(described) == set(engine.OPERATIONS)
+    assert described['gamma_transform'] == {'gamma': 1.0, 'c': 1.0}
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from scipy.fft import next_fast_len
+
+import image_engine as engine
+
+def _reference(plane, shape):
+    spectrum = np.fft.fft2(plane.astype(np.float64), s=shape)
+    return np.fft.fftshift(20 * np.log1p(np.abs(spectrum)))
+
+@pytest.mark.parametrize('size', [(96, 128), (97, 131)])
+def test_matches_numpy_reference(color, size):
+    img = np.ascontiguousarray(np.resize(color, size + (3,)))
+    shape = (next_fast_len(size[0], real=True), next_fast_len(size[1], real=True))
+    spectra = engine.fft_magnitude(img)
+    assert list(spectra) == ['Red', 'Green', 'Blue']
+    for i, magnitude in enumerate(spectra.values()):
+        assert magnitude.shape == shape and magnitude.dtype == np.float32
+        np.testing.assert_allclose(magnitude, _reference(img[:, :, i], shape), atol=0.05)
+
+def test_grayscale_has_one_spectrum(gray):
+    spectra = engine.fft_magnitude(gray)
+    assert list(spectra) == ['Gray']
+    np.testing.assert_allclose(spectra['Gray'], _reference(gray, gray.shape), atol=0.05)
+
+def test_max_size_downsamples_for_display(gray):
+    full = engine.fft_magnitude(gray)['Gray']
+    small = engine.fft_magnitude(gray, max_size=32)['Gray']
+    assert small.shape == (24, 32)
+    assert small.mean() == pytest.approx(full.mean(), rel=1e-3)
+    assert engine.fft_magnitude(gray, max_size=1024)['Gray'].shape == full.shape
@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+import pytest
+
+import image_engine as engine
+
+def _max_diff(a, b):
+    return np.abs(a.astype(np.int16) - b.astype(np.int16)).max()
+
+@pytest.mark.parametrize('size', [15, 31])
+def test_frequency_blur_matches_spatial(image, size):
+    assert _max_diff(engine.gaussian_blur(image, size, 'frequency'), engine.gaussian_blur(image, size, 'spatial')) <= 1
+    assert _max_diff(engine.unsharp_mask(image, size, 1.0, 'frequency'), engine.unsharp_mask(image, size, 1.0, 'spatial')) <= 2
+
+@pytest.mark.parametrize('shape', [(15, 15), (17, 15)])
+def test_frequency_convolve_matches_filter2d(image, shape):
+    kernel = np.random.default_rng(1).normal(size=shape).astype(np.float32) * 0.05
+    kernel[shape[0] // 2, shape[1] // 2] += 1
+    assert _max_diff(engine.convolve(image, kernel, 'frequency'), cv2.filter2D(image, -1, kernel)) <= 1
+
+def test_auto_switches_at_the_thresholds(gray):
+    assert engine._choose_method('auto', gray, engine.DENSE_FFT_MIN_SIZE) == 'frequency'
+    assert engine._choose_method('auto', gray, engine.DENSE_FFT_MIN_SIZE - 2) == 'spatial'
+    assert engine._choose_method('auto', gray, engine.DENSE_FFT_MIN_SIZE, separable=True) == 'spatial'
+    # Kernels as large as the image stay spatial.
+    assert engine._choose_method('auto', gray, 97) == 'spatial'
+    with pytest.raises(ValueError):
+        engine._choose_method('fft', gray, 3)
+
+def test_constant_images(image):
+    flat = np.full_like(image, 90)
+    assert np.array_equal(engine.lowpass_filter(flat, 0.05), flat)
+    assert np.all(engine.highpass_filter(flat, 0.05) == 128)
+    assert np.all(engine.bandpass_filter(flat, 0.02, 0.1) == 128)
+
+def test_lowpass_and_highpass_split_the_spectrum(gray):
+    low = engine.lowpass_filter(gray, 0.05).astype(np.float64)
+    high = engine.highpass_filter(gray, 0.05).astype(np.float64) - 128
+    assert abs(low.mean() - gray.mean()) < 1
+    assert np.abs(low + high - gray).max() <= 2
+    # Smoothing leaves less energy at high frequencies than in the input.
+    assert np.abs(np.diff(low, axis=1)).mean() < np.abs(np.diff(gray.astype(np.float64), axis=1)).mean() / 2
+
+def test_bandpass_is_the_difference_of_lowpasses(gray):
+    band = engine.bandpass_filter(gray, 0.02, 0.1).astype(np.int16) - 128
+    diff = engine.lowpass_filter(gray, 0.1).astype(np.int16) - engine.lowpass_filter(gray, 0.02).astype(np.int16)
+    assert np.abs(band - diff).max() <= 2
+
+@pytest.mark.parametrize('call', [
+    lambda img: engine.lowpass_filter(img, 0),
+    lambda img: engine.highpass_filter(img, 0.5),
+    lambda img: engine.bandpass_filter(img, 0.1, 0.05),
+    lambda img: engine.convolve(img, np.ones((4, 3))),
+])
+def test_invalid_parameters(gray, call):
+    with pytest.raises(ValueError):
+        call(gray)
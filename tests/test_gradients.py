@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+import image_engine as engine
+
+def _reference_magnitude(img, operator):
+    planes = [img] if img.ndim == 2 else [img[:, :, i] for i in range(img.shape[2])]
+    out = []
+    for plane in planes:
+        if operator == 'sobel':
+            gx, gy = cv2.Sobel(plane, cv2.CV_64F, 1, 0, ksize=3), cv2.Sobel(plane, cv2.CV_64F, 0, 1, ksize=3)
+        else:
+            gx, gy = cv2.Scharr(plane, cv2.CV_64F, 1, 0), cv2.Scharr(plane, cv2.CV_64F, 0, 1)
+        mag = np.hypot(gx, gy)
+        out.append(mag * 255 / mag.max())
+    return out[0] if img.ndim == 2 else np.dstack(out)
+
+@pytest.mark.parametrize('operator', engine.GRADIENT_OPERATORS)
+def test_gradient_magnitude_matches_float64(image, operator):
+    result = engine.gradient_magnitude(image, operator=operator)
+    assert result.dtype == np.uint8 and result.shape == image.shape
+    assert np.abs(result - _reference_magnitude(image, operator)).max() <= 1
+
+def test_given_peaks_scale_each_channel(color):
+    full = engine.gradient_magnitude(color)
+    peaks = engine._channel_peaks(engine._gradient(color))
+    assert np.array_equal(engine.gradient_magnitude(color, peaks), full)
+    assert np.array_equal(engine.gradient_magnitude(color, [p * 2 for p in peaks]), (engine._gradient(color) * [255 / (2 * p) for p in peaks]).astype(np.uint8))
+
+def test_flat_image_has_no_gradient(image):
+    assert not engine.gradient_magnitude(np.full_like(image, 40)).any()
+    with pytest.raises(ValueError):
+        engine.gradient_magnitude(image, operator='prewitt')
+
+def test_orientation_shapes(image):
+    result = engine.gradient_orientation(image)
+    assert result.shape == image.shape and result.dtype == np.uint8
+
+def test_median_thresholds(gray):
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
+    median = int(np.median(gray))
+    low, high = engine.canny_thresholds(hist, 'median')
+    assert abs(low - 0.67 * median) <= 1 and abs(high - 1.33 * median) <= 1
+
+def test_otsu_thresholds_match_opencv(image):
+    luma = engine._luma(image)
+    otsu, _ = cv2.threshold(luma, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    low, high = engine.canny_thresholds(cv2.calcHist([luma], [0], None, [256], [0, 256]), 'otsu')
+    assert high == int(otsu) and low == high // 2
+    with pytest.raises(ValueError):
+        engine.canny_thresholds(np.ones(256), 'mean')
+
+@pytest.mark.parametrize('auto', ['median', 'otsu'])
+def test_edge_detection_auto_uses_the_thresholds(image, auto):
+    luma = engine._luma(image)
+    low, high = engine.canny_thresholds(cv2.calcHist([luma], [0], None, [256], [0, 256]), auto)
+    edges = engine.edge_detection(image, auto=auto)
+    assert edges.shape == image.shape
+    assert np.array_equal(edges if image.ndim == 2 else edges[:, :, 0], cv2.Canny(luma, low, high))
@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+
+import image_engine as engine
+from image_graph import OperationGraph
+
+def test_simplify_steps_rules():
+    steps = ['negative_transform', 'negative_transform', {'op': 'gamma_transform', 'gamma': 1.0}, 'contrast_stretch', 'contrast_stretch', 'rotate_90', 'rotate_90', 'rotate_90', 'rotate_90', {'op': 'rotate_any', 'angle': 360}]
+    assert engine.simplify_steps(steps) == [('contrast_stretch', {})]
+
+def test_evaluate_matches_run_pipeline(image):
+    steps = [{'op': 'gamma_transform', 'gamma': 0.8}, 'negative_transform', {'op': 'gaussian_blur', 'size': 5}, 'rotate_90']
+    graph = OperationGraph(image)
+    for step in steps:
+        name, params = engine.parse_step(step)
+        graph.apply(name, **params)
+    assert np.array_equal(graph.evaluate(), engine.run_pipeline(image, steps))
+
+def test_equivalent_chains_share_the_cache(color):
+    graph = OperationGraph(color)
+    graph.apply('gaussian_blur', size=5)
+    blurred = graph.evaluate()
+    computed = graph.computed_stages
+    for _ in range(4):
+        graph.apply('rotate_90')
+    assert graph.is_cached()
+    assert graph.evaluate() is blurred and graph.computed_stages == computed
+
+def test_undo_redo_reuse_nodes(gray):
+    graph = OperationGraph(gray)
+    node = graph.apply('negative_transform')
+    graph.evaluate()
+    assert graph.undo() is graph.root and graph.can_redo()
+    assert graph.evaluate() is gray
+    assert graph.redo() is node and graph.is_cached()
+    graph.undo()
+    assert graph.apply('negative_transform') is node
+
+def test_list_valued_params(color):
+    kernel = [[0, 1, 0], [1, -4, 1], [0, 1, 0]]
+    graph = OperationGraph(color)
+    node = graph.apply('convolve', kernel=kernel)
+    graph.undo()
+    assert graph.apply('convolve', kernel=np.array(kernel)) is node
+    graph.apply('rotate_any', angle=30, center=[10, 20])
+    expected = engine.rotate_any(engine.convolve(color, kernel), 30, (10, 20))
+    assert np.array_equal(graph.evaluate(), expected)
+
+def test_undo_waits_for_the_lock(gray):
+    graph = OperationGraph(gray)
+    graph.apply('negative_transform')
+    with graph.lock:
+        worker = threading.Thread(target=graph.undo)
+        worker.start()
+        worker.join(0.05)
+        assert worker.is_alive() and graph.can_undo()
+    worker.join()
+    assert not graph.can_undo()
+
+def test_cache_is_bounded(gray):
+    graph = OperationGraph(gray, cache_bytes=gray.nbytes * 2)
+    for gamma in (0.5, 0.6, 0.7, 0.8):
+        graph.apply('gamma_transform', gamma=gamma)
+        graph.evaluate()
+    assert sum(a.nbytes for a in graph.cache.values()) <= gray.nbytes * 2
@@ -0,0 +1,44 @@
+import numpy as np
+
+import image_engine as engine
+
+def _same(counts, expected):
+    return list(counts) == list(expected) and all(np.array_equal(counts[k], expected[k]) for k in expected)
+
+def test_region_updates_match_a_recount(gui, image):
+    state = gui.HistogramState()
+    state.reset(engine.histogram(image), 1)
+    current = image.copy()
+    rng = np.random.default_rng(3)
+    for version, (x, y) in enumerate([(5, 7), (40, 20), (60, 50)], 2):
+        before = current[y:y + 30, x:x + 25].copy()
+        current[y:y + 30, x:x + 25] = rng.integers(0, 256, before.shape, dtype=np.uint8)
+        assert state.update_region(before, current[y:y + 30, x:x + 25], version - 1, version)
+        assert _same(state.current(version), engine.histogram(current))
+
+def test_stale_versions_are_rejected(gui, gray):
+    state = gui.HistogramState()
+    assert state.current(0) is None
+    state.reset(engine.histogram(gray), 3)
+    patch = gray[:10, :10]
+    assert not state.update_region(patch, 255 - patch, 2, 3)
+    assert not state.update_region(patch, gray[:5, :10], 3, 4)
+    assert state.current(4) is None and _same(state.current(3), engine.histogram(gray))
+
+def test_current_returns_a_copy(gui, gray):
+    state = gui.HistogramState()
+    state.reset(engine.histogram(gray), 1)
+    state.current(1)['Gray'][:] = 0
+    assert state.current(1)['Gray'].sum() == gray.size
+
+def test_roi_edit_keeps_the_app_histogram_current(app, color):
+    app.processed_image = color.copy()
+    app.original_image = color.copy()
+    app.image_changed()
+    app.full_histogram(app.processed_image, app.image_version)
+    misses = app.result_cache.misses
+    before = app.region_copy((10, 20, 50, 60))
+    app.processed_image[20:60, 10:50] = 255 - before
+    app.image_changed((10, 20, 50, 60), before)
+    counts = app.full_histogram(app.processed_image, app.image_version)
+    assert _same(counts, engine.histogram(app.processed_image)) and app.result_cache.misses == misses
@@ -0,0 +1,51 @@
+import numpy as np
+
+def test_global_edits_round_trip(gui, color):
+    history = gui.HistoryStore()
+    states = [color]
+    for i in range(1, 4):
+        history.record(states[-1])
+        states.append(np.roll(states[-1], 5 * i, axis=1) // 2)
+    current = states[-1]
+    for expected in reversed(states[:-1]):
+        current, rect = history.undo(current)
+        assert rect is None and np.array_equal(current, expected)
+    for expected in states[1:]:
+        current, _ = history.redo(current)
+        assert np.array_equal(current, expected)
+    assert not history.can_redo()
+
+def test_roi_edits_store_only_the_patch(gui, color):
+    history = gui.HistoryStore()
+    rect = (10, 20, 40, 50)
+    current = color.copy()
+    before = current[20:50, 10:40].copy()
+    after = 255 - before
+    current[20:50, 10:40] = after
+    history.record(before, after, rect)
+    assert history.nbytes() < color.nbytes // 4
+    current, undo_rect = history.undo(current)
+    assert undo_rect == rect and np.array_equal(current, color)
+    current, _ = history.redo(current)
+    assert np.array_equal(current[20:50, 10:40], after)
+
+def test_budget_evicts_oldest_steps(gui):
+    rng = np.random.default_rng(0)
+    history = gui.HistoryStore(byte_budget=30000)
+    for _ in range(5):
+        history.record(rng.integers(0, 256, (100, 100), dtype=np.uint8))
+    assert history.nbytes() <= 30000
+    assert 1 <= len(history.undo_stack) < 5
+
+def test_single_step_over_budget_is_kept(gui):
+    history = gui.HistoryStore(byte_budget=10)
+    history.record(np.random.default_rng(1).integers(0, 256, (50, 50), dtype=np.uint8))
+    assert history.can_undo()
+
+def test_new_edit_clears_redo(gui, gray):
+    history = gui.HistoryStore()
+    history.record(gray)
+    history.undo(255 - gray)
+    assert history.can_redo()
+    history.record(gray)
+    assert not history.can_redo()
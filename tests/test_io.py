@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+import pytest
+
+import image_io
+
+def test_png_round_trip(tmp_path, image):
+    path = str(tmp_path / 'a.png')
+    image_io.write_image(path, image)
+    mode = 'color' if image.ndim == 3 else 'grayscale'
+    assert np.array_equal(image_io.read_image(path, mode), image)
+    # Channels are stored in the usual file order, so other readers see the same colors.
+    if image.ndim == 3:
+        assert np.array_equal(cv2.imread(path)[:, :, ::-1], image)
+
+def test_color_file_read_as_grayscale(tmp_path, color):
+    path = str(tmp_path / 'a.png')
+    image_io.write_image(path, color)
+    gray = image_io.read_image(path, 'grayscale')
+    assert gray.shape == color.shape[:2]
+    assert np.abs(gray.astype(int) - cv2.cvtColor(color, cv2.COLOR_RGB2GRAY)).max() <= 1
+
+def test_npy_is_memory_mapped(tmp_path, color):
+    path = str(tmp_path / 'a.npy')
+    image_io.write_image(path, color)
+    loaded = image_io.read_image(path)
+    assert isinstance(loaded, np.memmap) and np.array_equal(loaded, color)
+
+def test_encode_decode_round_trip(image):
+    mode = 'color' if image.ndim == 3 else 'grayscale'
+    assert np.array_equal(image_io.decode_image(image_io.encode_image(image, '.png'), mode), image)
+    data = image_io.encode_image(image, '.jpg', {'jpeg_quality': 100})
+    # Chroma subsampling blurs the independent color channels of the test image a little; swapped
+    # channels would be off by far more.
+    assert np.abs(image_io.decode_image(data, mode).astype(int) - image).mean() < 8
+
+def test_invalid_input(tmp_path):
+    with pytest.raises(ValueError):
+        image_io.decode_image(b'not an image')
+    path = tmp_path / 'bad.png'
+    path.write_bytes(b'not an image')
+    with pytest.raises(ValueError):
+        image_io.read_image(str(path))
+    with pytest.raises(ValueError):
+        image_io.read_image(str(path), 'sepia')
+    assert image_io.image_size(str(path)) is None
+
+@pytest.mark.parametrize('path, options', [
+    ('a.png', {'png_compression': 10}),
+    ('a.jpg', {'jpeg_quality': 0}),
+    ('a.webp', {'webp_quality': 102}),
+])
+def test_encode_params_validation(path, options):
+    with pytest.raises(ValueError):
+        image_io.encode_params(path, options)
+
+def test_encode_params_by_extension():
+    assert image_io.encode_params('a.png') == []
+    assert image_io.encode_params('a.png', {'png_compression': 3}) == [cv2.IMWRITE_PNG_COMPRESSION, 3]
+    assert image_io.encode_params('a.JPG') == [cv2.IMWRITE_JPEG_QUALITY, 95]
+    assert image_io.encode_params('a.webp', {'webp_quality': 101}) == [cv2.IMWRITE_WEBP_QUALITY, 101]
+    assert image_io.encode_params('a.bmp', {'jpeg_quality': 50}) == []
+
+def test_preview_uses_reduced_decoding(tmp_path):
+    img = cv2.resize(np.random.default_rng(0).integers(0, 256, (60, 80, 3), dtype=np.uint8), (800, 600))
+    path = str(tmp_path / 'big.jpg')
+    image_io.write_image(path, img)
+    assert image_io.image_size(path) == (800, 600)
+    preview, factor = image_io.read_preview(path, 300)
+    assert factor == 2 and preview.shape == (300, 400, 3)
+    preview, factor = image_io.read_preview(path, 200)
+    assert factor == 4 and preview.shape == (150, 200, 3)
+    assert image_io.read_preview(path, 1000)[1] == 1
+    assert image_io.read_preview(path, 100, 'grayscale')[0].shape == (75, 100)
+
+@pytest.mark.parametrize('ext', ['.png', '.tiff', '.bmp', '.webp'])
+def test_other_formats_are_never_reduced(tmp_path, ext):
+    img = np.zeros((600, 800, 3), dtype=np.uint8)
+    path = str(tmp_path / ('big' + ext))
+    image_io.write_image(path, img)
+    assert image_io.preview_factor(path, 100) == 1
+    preview, factor = image_io.read_preview(path, 100)
+    assert factor == 1 and preview.shape == img.shape
+
+def test_images_past_the_pixel_limit_have_no_size(tmp_path, monkeypatch):
+    from PIL import Image
+    path = str(tmp_path / 'big.jpg')
+    image_io.write_image(path, np.zeros((600, 800, 3), dtype=np.uint8))
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1000)
+    assert image_io.image_size(path) is None
+    preview, factor = image_io.read_preview(path, 100)
+    assert factor == 1 and preview.shape == (600, 800, 3)
+
+def test_load_preview_is_only_drawn_for_jpeg(app, tmp_path):
+    img = cv2.resize(np.random.default_rng(0).integers(0, 256, (60, 80, 3), dtype=np.uint8), (1600, 1200))
+    for ext in ('.png', '.jpg'):
+        image_io.write_image(str(tmp_path / ('big' + ext)), img)
+    app.show_load_preview(str(tmp_path / 'big.png'))
+    assert app.frames == []
+    app.show_load_preview(str(tmp_path / 'big.jpg'))
+    frame, left, top = app.frames[0]
+    assert max(frame.shape[:2]) <= 400
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+import image_io
+from image_batch import BatchResult
+from image_cli import main
+from image_manifest import BatchManifest, file_digest, output_name, pipeline_signature
+
+STEPS = [{'op': 'gamma_transform', 'gamma': 0.8}]
+
+@pytest.fixture
+def files(tmp_path, color):
+    tasks = []
+    for name in ('a.png', 'b.png'):
+        path = str(tmp_path / name)
+        image_io.write_image(path, color)
+        tasks.append((path, str(tmp_path / ('out_' + name))))
+    return tasks
+
+def finish(manifest, signature, tasks):
+    for index, (input_path, output_path) in enumerate(tasks):
+        with open(output_path, 'wb') as f:
+            f.write(b'output')
+        manifest.record(BatchResult(index, input_path, output_path, None, file_digest(input_path)), signature)
+    manifest.flush()
+
+def test_signature_depends_on_pipeline_and_encoder():
+    signature = pipeline_signature(STEPS)
+    assert signature == pipeline_signature(list(STEPS))
+    assert signature != pipeline_signature(STEPS, 'grayscale')
+    assert signature != pipeline_signature(STEPS, encoder_options={'jpeg_quality': 80})
+    assert output_name('in/a.png', signature, 'jpg') == f"in/a_processed_{signature}.jpg"
+
+def test_unchanged_inputs_are_skipped(tmp_path, files):
+    signature = pipeline_signature(STEPS)
+    with BatchManifest(str(tmp_path / 'm.sqlite')) as manifest:
+        todo, skipped = manifest.plan(files, signature)
+        assert [t[:2] for t in todo] == files and not skipped
+        finish(manifest, signature, files)
+    with BatchManifest(str(tmp_path / 'm.sqlite')) as manifest:
+        assert manifest.plan(files, signature) == ([], files)
+        todo, skipped = manifest.plan(files, pipeline_signature(STEPS, 'grayscale'))
+        assert len(todo) == 2 and not skipped
+        todo, skipped = manifest.plan(files, signature, force=True)
+        assert len(todo) == 2 and not skipped
+
+def test_changed_and_touched_inputs(tmp_path, files, gray):
+    signature = pipeline_signature(STEPS)
+    with BatchManifest(str(tmp_path / 'm.sqlite')) as manifest:
+        manifest.plan(files, signature)
+        finish(manifest, signature, files)
+        digests = [file_digest(input_path) for input_path, _ in files]
+        st = os.stat(files[0][0])
+        os.utime(files[0][0], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        image_io.write_image(files[1][0], gray)
+        todo, skipped = manifest.plan(files, signature)
+        # Both are handed to the workers with the recorded digest, which only matches the touched file.
+        assert todo == [(input_path, output_path, digest) for (input_path, output_path), digest in zip(files, digests)] and not skipped
+        assert file_digest(files[0][0]) == digests[0] and file_digest(files[1][0]) != digests[1]
+
+def test_deleted_output_is_regenerated(tmp_path, files):
+    signature = pipeline_signature(STEPS)
+    with BatchManifest(str(tmp_path / 'm.sqlite')) as manifest:
+        manifest.plan(files, signature)
+        finish(manifest, signature, files)
+        os.remove(files[0][1])
+        todo, skipped = manifest.plan(files, signature)
+        assert todo == [(files[0][0], files[0][1], None)] and skipped == files[1:]
+
+def test_failed_inputs_are_retried(tmp_path, files):
+    signature = pipeline_signature(STEPS)
+    with BatchManifest(str(tmp_path / 'm.sqlite')) as manifest:
+        manifest.plan(files, signature)
+        manifest.record(BatchResult(0, files[0][0], files[0][1], 'boom'), signature)
+        manifest.flush()
+        todo, _ = manifest.plan(files, signature)
+        assert [t[0] for t in todo] == [files[0][0], files[1][0]]
+
+def test_cli_run_with_manifest(tmp_path, files, capsys):
+    pipeline = tmp_path / 'pipeline.json'
+    pipeline.write_text(json.dumps(STEPS))
+    out = str(tmp_path / 'out')
+    args = ['run', str(pipeline), '-i', str(tmp_path), '-o', out, '-j', '1', '-q', '--manifest', str(tmp_path / 'm.sqlite')]
+    assert main(args) == 0
+    assert 'Processed 2 of 2' in capsys.readouterr().out
+    assert main(args) == 0
+    assert 'Skipped 2 unchanged' in capsys.readouterr().out
+    os.remove(os.path.join(out, 'a.png'))
+    assert main(args) == 0
+    assert 'Processed 1 of 2' in capsys.readouterr().out and os.path.exists(os.path.join(out, 'a.png'))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import image_engine as engine
+
+CHAINS = [
+    [('negative_transform', {}), ('gamma_transform', {'gamma': 0.5, 'c': 1.0})],
+    [('log_transform', {'c': 40.0}), ('contrast_stretch', {}), ('negative_transform', {})],
+    [('gamma_transform', {'gamma': 2.2, 'c': 1.0}), ('contrast_stretch', {}), ('log_transform', {'c': 30.0}), ('contrast_stretch', {})],
+]
+
+def _sequential(img, ops):
+    for name, params in ops:
+        img = engine.apply_operation(img, name, **params)
+    return img
+
+@pytest.mark.parametrize('ops', CHAINS)
+def test_fused_chain_equals_sequential(image, ops):
+    assert np.array_equal(engine.apply_point_ops(image, ops), _sequential(image, ops))
+
+def test_contrast_stretch_is_per_channel(color):
+    img = color.copy()
+    img[:, :, 0] //= 4
+    out = engine.contrast_stretch(img)
+    for i in range(3):
+        assert out[:, :, i].min() == 0 and out[:, :, i].max() == 255
+
+def test_pipeline_groups_point_ops():
+    steps = ['negative_transform', {'op': 'gamma_transform', 'gamma': 0.5}, 'sharpen_image', 'log_transform']
+    stages = engine.plan_pipeline(steps)
+    assert [name for name, _ in stages] == ['point_ops', 'sharpen_image', 'point_ops']
+    assert len(stages[0][1]) == 2
+
+def test_run_pipeline_equals_sequential(image):
+    steps = [{'op': 'gamma_transform', 'gamma': 0.7}, 'contrast_stretch', 'sharpen_image', 'negative_transform', {'op': 'log_transform', 'c': 45.0}]
+    ops = [engine.parse_step(step) for step in steps]
+    assert np.array_equal(engine.run_pipeline(image, steps), _sequential(image, ops))
+
+def test_gathered_values_give_the_same_table(gray):
+    ops = [('log_transform', {'c': 40.0}), ('contrast_stretch', {})]
+    present = engine.values_present(gray)
+    assert np.array_equal(engine.compile_point_ops(gray[:10], ops, present), engine.compile_point_ops(gray, ops))
+
+# The tables reproduce the original per-pixel float formulas.
+def test_tables_match_float_formulas(image):
+    levels = image.astype(np.float64)
+    assert np.array_equal(engine.gamma_transform(image, gamma=0.6, c=1.2), np.uint8(np.clip(1.2 * np.power(levels / 255.0, 0.6) * 255, 0, 255)))
+    assert np.array_equal(engine.log_transform(image, c=40.0), np.uint8(np.clip(40.0 * np.log1p(levels), 0, 255)))
@@ -0,0 +1,41 @@
+import numpy as np
+
+import image_engine as engine
+
+def _load(app, img):
+    app.processed_image = img
+    app.original_image = img.copy()
+    app.image_changed()
+
+def test_preview_leaves_the_image_and_history_alone(app, color, run_pending, fake_widget):
+    _load(app, color)
+    app.preview_var.set("1")
+    app.gamma_entry, app.c_entry = fake_widget("0.5"), fake_widget("1.0")
+    app.schedule_preview('gamma_transform')
+    run_pending(app)
+    proxy, left, top = app.frames[-1]
+    assert np.array_equal(proxy, engine.gamma_transform(color, gamma=0.5))
+    assert app.processed_image is not None and np.array_equal(app.processed_image, color)
+    assert not app.history.can_undo()
+
+def test_preview_runs_on_a_display_sized_proxy(app, color, run_pending, fake_widget):
+    _load(app, color)
+    app.preview_var.set("1")
+    app.zoom_factor = 0.5
+    app.mask_size_entry = fake_widget("9")
+    app.schedule_preview('gaussian_blur')
+    run_pending(app)
+    proxy = app.frames[-1][0]
+    assert proxy.shape[:2] == (48, 64)
+    # The 9-pixel kernel covers 5 proxy pixels at half zoom.
+    expected = engine.gaussian_blur(app.renderer.visible_region(app.pyramid, 0.5, (400, 300), False)[0], size=5)
+    assert np.array_equal(proxy, expected)
+
+def test_invalid_preview_parameters_are_reported_in_the_status(app, gray, run_pending, fake_widget):
+    _load(app, gray)
+    app.preview_var.set("1")
+    app.log_c_entry = fake_widget("-1")
+    app.schedule_preview('log_transform')
+    run_pending(app)
+    assert app.status_label.text.startswith("Preview:")
+    assert app.frames == []
@@ -0,0 +1,71 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import image_profiler
+
+def test_span_records_timing_shape_and_fields(gray):
+    records = []
+    instruments = image_profiler.Instrumentation(sinks=[records.append])
+    with instruments.span('op.blur', gray, size=5) as fields:
+        fields['out'] = 'done'
+    record, = records
+    assert record['name'] == 'op.blur'
+    assert record['shape'] == gray.shape and record['size'] == 5 and record['out'] == 'done'
+    assert record['wall_ms'] >= 0 and record['cpu_ms'] >= 0 and record['depth'] == 0
+    assert instruments.summary()['op.blur']['count'] == 1
+
+def test_nested_spans_and_errors():
+    records = []
+    instruments = image_profiler.Instrumentation(sinks=[records.append])
+    with pytest.raises(ValueError):
+        with instruments.span('outer'):
+            with instruments.span('inner'):
+                raise ValueError("bad")
+    assert [(r['name'], r['depth']) for r in records] == [('inner', 1), ('outer', 0)]
+    assert all(r['error'] == "ValueError: bad" for r in records)
+
+def test_disabled_instrumentation_records_nothing():
+    with image_profiler.DISABLED.span('anything'):
+        pass
+    assert image_profiler.DISABLED.summary() == {}
+
+def test_memory_tracking_reports_allocations():
+    instruments = image_profiler.Instrumentation(trace_memory=True)
+    instruments.set_trace_memory(True)
+    try:
+        with instruments.span('alloc'):
+            block = np.ones(1_000_000, dtype=np.uint8)
+    finally:
+        instruments.set_trace_memory(False)
+    assert block.nbytes <= instruments.summary()['alloc']['bytes']
+
+def test_profile_report():
+    instruments = image_profiler.Instrumentation(profile=True)
+    with instruments.span('work'):
+        sorted(range(10000), key=lambda x: -x)
+    assert 'function calls' in instruments.profile_report()
+
+def test_json_lines_sink_is_thread_safe(tmp_path):
+    path = str(tmp_path / 'trace.jsonl')
+    instruments = image_profiler.Instrumentation(sinks=[image_profiler.JsonLinesSink(path)])
+    def work():
+        for _ in range(25):
+            with instruments.span('t'):
+                pass
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 100
+
+def test_broken_sink_is_dropped(tmp_path):
+    instruments = image_profiler.Instrumentation(sinks=[image_profiler.JsonLinesSink(str(tmp_path / 'missing' / 'trace.jsonl'))])
+    with instruments.span('op'):
+        pass
+    assert instruments.sinks == []
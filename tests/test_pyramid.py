@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+
+def _reference_levels(img, count):
+    levels = [img]
+    for _ in range(count - 1):
+        h, w = levels[-1].shape[:2]
+        levels.append(cv2.resize(levels[-1][:h // 2 * 2, :w // 2 * 2], (w // 2, h // 2), interpolation=cv2.INTER_AREA))
+    return levels
+
+def _full_level(pyramid, k):
+    h, w = pyramid.levels[k].shape[:2]
+    return pyramid.region(k, 0, 0, w, h)
+
+def test_levels_halve_until_min_size(gui, color):
+    pyramid = gui.ImagePyramid(tile_size=16, min_size=16)
+    pyramid.set_image(color)
+    assert [level.shape[:2] for level in pyramid.levels] == [(96, 128), (48, 64), (24, 32)]
+
+def test_tiles_match_whole_level_downsampling(gui, color):
+    pyramid = gui.ImagePyramid(tile_size=16, min_size=16)
+    pyramid.set_image(color)
+    for k, expected in enumerate(_reference_levels(color, len(pyramid.levels))):
+        assert np.array_equal(_full_level(pyramid, k), expected)
+
+def test_tiles_are_built_on_demand(gui, gray):
+    pyramid = gui.ImagePyramid(tile_size=16, min_size=16)
+    pyramid.set_image(gray)
+    pyramid.region(1, 0, 0, 16, 16)
+    assert pyramid.valid[1].sum() == 1
+    assert not pyramid.valid[2].any()
+
+def test_invalidate_rebuilds_only_the_edited_tiles(gui, gray):
+    pyramid = gui.ImagePyramid(tile_size=16, min_size=16)
+    img = gray.copy()
+    pyramid.set_image(img)
+    for k in range(len(pyramid.levels)):
+        _full_level(pyramid, k)
+    img[0:20, 0:20] = 255 - img[0:20, 0:20]
+    pyramid.invalidate((0, 0, 20, 20))
+    assert pyramid.valid[1].sum() == pyramid.valid[1].size - 1
+    for k, expected in enumerate(_reference_levels(img, len(pyramid.levels))):
+        assert np.array_equal(_full_level(pyramid, k), expected)
+
+def test_level_for_zoom(gui, color):
+    pyramid = gui.ImagePyramid(tile_size=16, min_size=16)
+    pyramid.set_image(color)
+    assert [pyramid.level_for_zoom(z) for z in (2.0, 1.0, 0.6, 0.5, 0.3, 0.01)] == [0, 0, 0, 1, 1, 2]
@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+@pytest.fixture
+def scheduler(gui, monkeypatch, fake_widget):
+    errors = []
+    monkeypatch.setattr(gui.messagebox, 'showerror', lambda title, message: errors.append(message))
+    scheduler = gui.OperationScheduler(fake_widget(), fake_widget(), poll_ms=1)
+    scheduler.errors = errors
+    return scheduler
+
+def test_jobs_run_in_order_off_the_main_thread(scheduler, run_pending):
+    log = []
+    def compute(inputs, job):
+        log.append(('compute', inputs, threading.current_thread() is threading.main_thread()))
+        return inputs * 10
+    for i in range(3):
+        scheduler.submit(None, f"job {i}", compute=compute, prepare=lambda i=i: i, commit=lambda result: log.append(('commit', result, threading.current_thread() is threading.main_thread())))
+    run_pending(scheduler)
+    assert log == [('compute', 0, False), ('commit', 0, True), ('compute', 1, False), ('commit', 10, True), ('compute', 2, False), ('commit', 20, True)]
+
+def test_queued_job_is_replaced_by_same_key(scheduler, run_pending):
+    release = threading.Event()
+    results = []
+    scheduler.submit('a', "running", compute=lambda inputs, job: release.wait(5), commit=results.append)
+    scheduler.submit('b', "first", compute=lambda inputs, job: 'first', commit=results.append)
+    scheduler.submit('b', "second", compute=lambda inputs, job: 'second', commit=results.append)
+    release.set()
+    run_pending(scheduler)
+    assert results == [True, 'second']
+
+def test_cancel_drops_the_running_result(scheduler, run_pending):
+    release = threading.Event()
+    results = []
+    scheduler.submit(None, "slow", compute=lambda inputs, job: release.wait(5), commit=results.append)
+    scheduler.submit(None, "queued", compute=lambda inputs, job: 'queued', commit=results.append)
+    scheduler.cancel()
+    release.set()
+    time.sleep(0.05)
+    run_pending(scheduler)
+    assert results == []
+    assert scheduler.status_label.text == "Operation cancelled"
+
+def test_errors_are_reported_and_the_queue_continues(scheduler, run_pending):
+    results = []
+    def fail(inputs, job):
+        raise ValueError("bad size")
+    scheduler.submit(None, "failing", compute=fail, commit=results.append)
+    scheduler.submit(None, "next", compute=lambda inputs, job: 'ok', commit=results.append)
+    run_pending(scheduler)
+    assert results == ['ok']
+    assert scheduler.errors == ["Operation failed: bad size"]
@@ -0,0 +1,134 @@
+import http.client
+import json
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+import image_engine as engine
+import image_io
+from image_server import ImageServer, parse_params
+
+@pytest.fixture(scope='module')
+def server():
+    server = ImageServer(port=0, workers=1, max_pending=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+
+def request(server, method, path, body=None):
+    conn = http.client.HTTPConnection(*server.address[:2], timeout=60)
+    try:
+        conn.request(method, path, body=body)
+        response = conn.getresponse()
+        return response.status, response.getheader('Content-Type'), response.read(), dict(response.getheaders())
+    finally:
+        conn.close()
+
+# Sends raw header lines (and no body) and returns the status line and whether the server closed
+# the connection after answering.
+def raw_post(server, path, headers):
+    with socket.create_connection(server.address[:2], timeout=5) as sock:
+        sock.sendall(f"POST {path} HTTP/1.1\r\nHost: test\r\n{''.join(h + chr(13) + chr(10) for h in headers)}\r\n".encode())
+        data = b''
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return data.split(b'\r\n', 1)[0].decode(), True
+                data += chunk
+        except socket.timeout:
+            return data.split(b'\r\n', 1)[0].decode(), False
+
+def test_image_endpoints_match_the_engine(server, color):
+    data = image_io.encode_image(color, '.png')
+    status, content_type, body, _ = request(server, 'POST', '/negative', data)
+    assert status == 200 and content_type == 'image/png'
+    assert np.array_equal(image_io.decode_image(body), engine.negative_transform(color))
+    status, _, body, _ = request(server, 'POST', '/rotate?angle=30&center=10,20', data)
+    assert status == 200 and np.array_equal(image_io.decode_image(body), engine.rotate_any(color, 30, (10, 20)))
+    status, _, body, _ = request(server, 'POST', '/edges?auto=otsu&mode=grayscale', data)
+    gray = image_io.decode_image(data, 'grayscale')
+    assert status == 200 and np.array_equal(image_io.decode_image(body, 'grayscale'), engine.edge_detection(gray, auto='otsu'))
+
+def test_stats_endpoint(server, gray):
+    status, content_type, body, _ = request(server, 'POST', '/stats?mode=grayscale', image_io.encode_image(gray, '.png'))
+    assert status == 200 and content_type == 'application/json'
+    assert json.loads(body)['Gray'] == pytest.approx(engine.image_stats(gray)['Gray'])
+
+@pytest.mark.parametrize('path', ['/gamma?gamma=abc', '/gamma?strength=2', '/negative?format=gif', '/rotate?center=1,2,3', '/blur?size=4', '/blur?size=5.5',
+                                  '/negative?format=jpg&quality=0', '/negative?format=webp&quality=102', '/negative?quality=50',
+                                  '/fft?bogus=1', '/stats?bogus=1'])
+def test_invalid_parameters_are_400(server, gray, path):
+    status, _, body, _ = request(server, 'POST', path, image_io.encode_image(gray, '.png'))
+    assert status == 400 and 'error' in json.loads(body)
+
+def test_fractional_values_for_integer_defaults(server, gray):
+    data = image_io.encode_image(gray, '.png')
+    status, _, body, _ = request(server, 'POST', '/bilateral?size=5&sigma_color=30.5&mode=grayscale', data)
+    assert status == 200 and np.array_equal(image_io.decode_image(body, 'grayscale'), engine.bilateral_filter(gray, 5, 30.5))
+    assert request(server, 'POST', '/fft?max_size=64&mode=grayscale', data)[0] == 200
+
+def test_quality_reaches_the_encoder(server, color):
+    data = image_io.encode_image(color, '.png')
+    low = request(server, 'POST', '/negative?format=jpg&quality=10', data)[2]
+    assert low == image_io.encode_image(engine.negative_transform(color), '.jpg', {'jpeg_quality': 10})
+    assert len(low) < len(request(server, 'POST', '/negative?format=jpg', data)[2])
+
+def test_undecodable_body_is_400(server):
+    assert request(server, 'POST', '/negative', b'not an image')[0] == 400
+
+def test_unknown_endpoints_are_404(server):
+    assert request(server, 'POST', '/sepia', b'x')[0] == 404
+    assert request(server, 'GET', '/sepia')[0] == 404
+
+@pytest.mark.parametrize('header, status', [('Content-Length: abc', 400), ('Content-Length: 0', 400), ('Content-Length: 1000000000', 413)])
+def test_bad_lengths_are_rejected_without_reading(server, header, status):
+    line, closed = raw_post(server, '/negative', [header])
+    assert line.split()[1] == str(status) and closed
+
+def test_busy_server_rejects_before_reading_the_body(server):
+    held = 0
+    while server.admit('negative'):
+        held += 1
+    try:
+        assert held == server.max_pending
+        # The body is never sent; the answer must not wait for it.
+        line, closed = raw_post(server, '/negative', ['Content-Length: 1000000'])
+        assert line.split()[1] == '429' and closed
+    finally:
+        for _ in range(held):
+            server.release()
+    assert server.metrics_summary()['endpoints']['negative']['rejected'] >= 1
+
+def test_get_endpoints(server):
+    status, _, body, _ = request(server, 'GET', '/health')
+    assert status == 200 and json.loads(body) == {'status': 'ok'}
+    operations = json.loads(request(server, 'GET', '/operations')[2])
+    assert operations['gamma'] == {'gamma': 1.0, 'c': 1.0}
+    metrics = json.loads(request(server, 'GET', '/metrics')[2])
+    assert metrics['workers'] == 1 and metrics['max_pending'] == 2
+
+def test_pool_is_replaced_after_a_worker_dies(server, gray):
+    data = image_io.encode_image(gray, '.png')
+    for process in list(server.pool._processes.values()):
+        process.kill()
+        process.join()
+    status, _, _, headers = request(server, 'POST', '/negative', data)
+    assert status == 503 and headers['Retry-After'] == '1'
+    assert request(server, 'POST', '/negative', data)[0] == 200
+
+def test_parse_params():
+    assert parse_params('gamma_transform', {'gamma': '0.5', 'format': 'png'}) == {'gamma': 0.5}
+    assert parse_params('gaussian_blur', {'size': '5', 'method': 'frequency'}) == {'size': 5, 'method': 'frequency'}
+    assert parse_params('rotate_any', {'center': '10,20.5'}) == {'center': (10.0, 20.5)}
+    assert parse_params('rotate_any', {'center': 'none'}) == {'center': None}
+    assert parse_params('edge_detection', {'auto': 'median'}) == {'auto': 'median'}
+    assert parse_params('convolve', {'kernel': '0,1,0;1,-4,1;0,1,0'}) == {'kernel': ((0, 1, 0), (1, -4, 1), (0, 1, 0))}
+    assert parse_params('bilateral_filter', {'sigma_color': '30.5', 'sigma_space': '40'}) == {'sigma_color': 30.5, 'sigma_space': 40}
+    for query in ({'size': 'big'}, {'size': '5.5'}, {'kernel': '1,x'}, {'bogus': '1'}):
+        with pytest.raises(ValueError):
+            parse_params('convolve' if 'kernel' in query else 'gaussian_blur', query)
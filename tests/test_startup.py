@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import image_profiler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('tkinter', 'matplotlib', 'scipy', 'PIL')
+
+# Top-level packages loaded by importing module in a fresh interpreter.
+def loaded_packages(module, cwd):
+    code = f"import sys; import {module}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return set(result.stdout.split())
+
+@pytest.mark.parametrize('module', ['image_cli', 'image_engine', 'image_io', 'image_batch', 'image_server', 'image_video'])
+def test_headless_modules_skip_heavy_imports(tmp_path, module):
+    assert not loaded_packages(module, str(tmp_path)) & set(HEAVY)
+
+def test_gui_module_defers_matplotlib_and_scipy(tmp_path):
+    pytest.importorskip('tkinter')
+    loaded = loaded_packages('image_Processing', str(tmp_path))
+    assert 'tkinter' in loaded and not loaded & {'matplotlib', 'scipy'}
+
+def test_command_line_never_imports_tk(tmp_path):
+    env = {**os.environ, 'PYTHONPATH': ''}
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(ROOT, 'image_Processing.py'), 'list'], cwd=str(tmp_path), env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0 and 'gamma_transform' in result.stdout
+    imported = {line.rsplit('|', 1)[-1].strip().split('.')[0] for line in result.stderr.splitlines() if '|' in line}
+    assert not imported & set(HEAVY)
+    assert not os.path.exists(tmp_path / 'image_app.log')
+
+def test_plotting_is_imported_on_first_use(gui):
+    pytest.importorskip('matplotlib')
+    figure, canvas = gui._plotting()
+    assert figure.__name__ == 'Figure' and canvas.__name__ == 'FigureCanvasTkAgg'
+
+def test_record_adds_a_measured_duration():
+    records = []
+    instruments = image_profiler.Instrumentation(sinks=[records.append])
+    instruments.record('startup.imports', 0.25, 0.2, phase='imports')
+    record, = records
+    assert record['name'] == 'startup.imports' and record['phase'] == 'imports' and record['depth'] == 0
+    assert record['wall_ms'] == 250 and record['cpu_ms'] == 200
+    assert instruments.summary()['startup.imports']['count'] == 1
+    image_profiler.Instrumentation(enabled=False, sinks=[records.append]).record('startup.total', 1.0)
+    assert len(records) == 1
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+import image_engine as engine
+
+def test_histogram_counts_every_pixel(image):
+    counts = engine.histogram(image)
+    planes = [image] if image.ndim == 2 else [image[:, :, i] for i in range(3)]
+    assert list(counts) == (['Gray'] if image.ndim == 2 else ['Red', 'Green', 'Blue'])
+    for plane, hist in zip(planes, counts.values()):
+        assert np.array_equal(hist, np.bincount(plane.ravel(), minlength=256))
+
+def test_stats_match_numpy_and_scipy(image):
+    planes = [image] if image.ndim == 2 else [image[:, :, i] for i in range(3)]
+    for plane, result in zip(planes, engine.image_stats(image).values()):
+        values = plane.ravel().astype(np.float64)
+        assert result['mean'] == pytest.approx(values.mean(), abs=1e-9)
+        assert result['std'] == pytest.approx(values.std(), abs=1e-9)
+        assert result['skew'] == pytest.approx(stats.skew(values), abs=1e-9)
+        assert result['kurtosis'] == pytest.approx(stats.kurtosis(values), abs=1e-9)
+        assert (result['min'], result['max']) == (plane.min(), plane.max())
+
+def test_constant_and_empty_channels():
+    result = engine.histogram_stats(engine.histogram(np.full((8, 8), 7, dtype=np.uint8))['Gray'])
+    assert (result['mean'], result['std'], result['min'], result['max']) == (7, 0, 7, 7)
+    assert np.isnan(result['skew']) and np.isnan(result['kurtosis'])
+    empty = engine.histogram_stats(np.zeros(256, dtype=np.int64))
+    assert np.isnan(empty['mean']) and (empty['min'], empty['max']) == (0, 0)
+
+def test_tall_images_are_counted_in_bands(gray):
+    # More than 2**24 pixels per bin is past float32's exact range, so calcHist runs in row bands.
+    tall = np.tile(gray, (1400, 1))
+    counts = engine.histogram(tall)['Gray']
+    assert counts.sum() == tall.size and np.array_equal(counts, np.bincount(gray.ravel(), minlength=256) * 1400)
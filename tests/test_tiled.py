@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+import pytest
+
+import image_engine as engine
+
+# Parameter sets the GUI (and pipelines) use, beyond each operation's defaults.
+VARIANTS = [
+    ('gaussian_blur', {'size': 9}),
+    ('unsharp_mask', {'size': 9, 'amount': 1.5}),
+    ('convolve', {'kernel': np.ones((5, 5)) / 25}),
+    ('median_filter', {'size': 5}),
+    ('median_filter', {'size': 41}),
+    ('median_filter', {'size': 41, 'method': 'fast'}),
+    ('bilateral_filter', {'size': 9}),
+    ('bilateral_filter', {'size': 9, 'method': 'fast'}),
+    ('gradient_magnitude', {'operator': 'scharr'}),
+    ('gamma_transform', {'gamma': 0.5}),
+    ('adjust_color', {'saturation': 1.5, 'brightness': 20}),
+]
+CASES = [(name, {}) for name in engine.OPERATIONS] + VARIANTS
+
+def _strip_budget(img, rows):
+    return int(np.prod(img.shape[1:])) * engine.TILE_OVERHEAD * rows
+
+@pytest.fixture
+def large():
+    # Tall enough for several strips, and not a multiple of the strip height.
+    noise = np.random.default_rng(2).integers(0, 256, (157, 96, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (5, 5), 0)
+
+@pytest.mark.parametrize('name, params', [case for case in CASES if engine.tiles_exactly(*case)], ids=lambda v: v if isinstance(v, str) else '')
+@pytest.mark.parametrize('mode', ['gray', 'color'])
+def test_exactly_tileable_operations_match_whole_image(large, name, params, mode):
+    img = large if mode == 'color' else large[:, :, 1].copy()
+    if name == 'adjust_color' and mode == 'gray':
+        pytest.skip("color only")
+    step = {'op': name, **params}
+    expected = engine.run_pipeline(img, [step])
+    halo = engine.TILE_HALOS[name](**params) if name in engine.TILE_HALOS else 1
+    out = engine.run_pipeline_tiled(img, np.empty_like(img), [step], max_bytes=_strip_budget(img, 2 * halo + 20))
+    assert np.array_equal(out, expected)
+
+@pytest.mark.parametrize('name, params', [
+    ('edge_detection', {}),
+    ('edge_detection', {'auto': 'otsu'}),
+    ('lowpass_filter', {}),
+    ('highpass_filter', {}),
+    ('bandpass_filter', {}),
+    ('gaussian_blur', {'size': 151}),
+    ('gaussian_blur', {'size': 9, 'method': 'frequency'}),
+    ('convolve', {'kernel': np.ones((15, 15)) / 225}),
+])
+def test_inexact_operations_are_not_auto_tiled(name, params):
+    assert engine.is_tileable(name)
+    assert not engine.tiles_exactly(name, params)
+
+def test_geometric_operations_do_not_tile():
+    for name in ('halve_resolution', 'rotate_90', 'flip_horizontal', 'rotate_any'):
+        assert not engine.tiles_exactly(name)
+
+def test_pipeline_with_statistics_passes(large):
+    steps = ['contrast_stretch', {'op': 'gaussian_blur', 'size': 5}, 'histogram_equalization', 'gradient_magnitude', 'negative_transform']
+    out = engine.run_pipeline_tiled(large, np.empty_like(large), steps, max_bytes=_strip_budget(large, 30))
+    assert np.array_equal(out, engine.run_pipeline(large, steps))
+
+def test_memmapped_source_and_destination(tmp_path, large):
+    src = np.lib.format.open_memmap(str(tmp_path / 'src.npy'), mode='w+', dtype=np.uint8, shape=large.shape)
+    src[...] = large
+    dst = np.lib.format.open_memmap(str(tmp_path / 'dst.npy'), mode='w+', dtype=np.uint8, shape=large.shape)
+    engine.run_pipeline_tiled(src, dst, ['sharpen_image'], max_bytes=_strip_budget(large, 12), temp_dir=str(tmp_path))
+    assert np.array_equal(dst, engine.sharpen_image(large))
+
+# The GUI sends images of tiled_min_bytes and up through the strip engine for exactly these cases.
+def test_gui_tiles_large_images_exactly(app, large, run_pending):
+    app.tiled_min_bytes = 0
+    app.processed_image = large.copy()
+    app.image_changed()
+    app.apply_to_image(engine.median_filter, size=41, done_message="Median")
+    run_pending(app)
+    assert np.array_equal(app.processed_image, engine.median_filter(large, size=41))
+    app.apply_to_image(engine.edge_detection, auto='otsu', done_message="Edges")
+    run_pending(app)
+    assert np.array_equal(app.processed_image, engine.edge_detection(engine.median_filter(large, size=41), auto='otsu'))
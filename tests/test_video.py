@@ -0,0 +1,96 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import image_engine as engine
+import image_io
+from image_video import FrameSink, FrameSource, VideoPipeline
+
+STEPS = [{'op': 'gamma_transform', 'gamma': 0.7}, {'op': 'gaussian_blur', 'size': 5}, 'rotate_90']
+
+@pytest.fixture
+def frames(tmp_path, color):
+    path = tmp_path / 'frames'
+    path.mkdir()
+    images = [np.roll(color, 7 * i, axis=1) for i in range(12)]
+    for i, img in enumerate(images):
+        image_io.write_image(str(path / f'img_{i:04d}.png'), img)
+    return str(path), images
+
+def _read_sequence(pattern, count, mode='color'):
+    return [image_io.read_image(pattern % i, mode) for i in range(count)]
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_directory_to_pattern(tmp_path, frames, workers):
+    source, images = frames
+    pattern = str(tmp_path / 'out' / 'f_%03d.png')
+    seen = []
+    stats = VideoPipeline(STEPS, workers=workers, queue_size=2).run(source, pattern, progress=lambda done, total: seen.append((done, total)))
+    assert stats['frames'] == len(images)
+    assert seen == [(i, len(images)) for i in range(1, len(images) + 1)]
+    for img, out in zip(images, _read_sequence(pattern, len(images))):
+        assert np.array_equal(out, engine.run_pipeline(img, STEPS))
+
+def test_pattern_input_in_grayscale(tmp_path, frames):
+    source, images = frames
+    out = str(tmp_path / 'out')
+    VideoPipeline(['negative_transform'], mode='grayscale').run(os.path.join(source, 'img_%04d.png'), out)
+    written = sorted(os.listdir(out))
+    assert written[0] == 'frame_000000.png' and len(written) == len(images)
+    # Captures decode color and convert, which can round one level away from a grayscale decode.
+    expected = 255 - image_io.read_image(os.path.join(source, 'img_0003.png'), 'grayscale').astype(int)
+    assert np.abs(image_io.read_image(os.path.join(out, written[3]), 'grayscale') - expected).max() <= 1
+
+def test_video_file_round_trip(tmp_path, frames):
+    source, images = frames
+    path = str(tmp_path / 'out.avi')
+    stats = VideoPipeline(['flip_horizontal'], workers=2).run(source, path, fps=10)
+    assert stats['frames'] == len(images)
+    decoded = list(FrameSource(path))
+    assert len(decoded) == len(images) and decoded[0].shape == images[0].shape
+    # MJPEG is lossy; the flip must still be visible.
+    assert np.abs(decoded[5].astype(int) - images[5][:, ::-1]).mean() < np.abs(decoded[5].astype(int) - images[5]).mean()
+
+def test_processing_errors_propagate(tmp_path, frames):
+    source, _ = frames
+    with pytest.raises(ValueError, match="color mode"):
+        VideoPipeline(['adjust_color'], mode='grayscale', workers=2).run(source, str(tmp_path / 'out'))
+
+def test_invalid_arguments(tmp_path, frames):
+    with pytest.raises(ValueError):
+        VideoPipeline(['no_such_op'])
+    with pytest.raises(ValueError):
+        VideoPipeline(STEPS).run(str(tmp_path / 'missing.mp4'), str(tmp_path / 'out'))
+    with pytest.raises(ValueError):
+        FrameSink(str(tmp_path / 'out.mp4'), codec='h264x')
+    empty = tmp_path / 'empty'
+    empty.mkdir()
+    with pytest.raises(ValueError):
+        FrameSource(str(empty))
+
+def test_sink_rejects_size_changes(tmp_path, color):
+    sink = FrameSink(str(tmp_path / 'out'))
+    sink.write(color)
+    with pytest.raises(ValueError):
+        sink.write(color[:50])
+    sink.close()
+    assert sink.count == 1
+
+def test_slow_frame_does_not_grow_the_reorder_buffer(tmp_path, monkeypatch):
+    source = tmp_path / 'frames'
+    source.mkdir()
+    for i in range(40):
+        image_io.write_image(str(source / f'img_{i:04d}.png'), np.full((8, 8, 3), i, dtype=np.uint8))
+    run_stage = engine.run_stage
+    def slow_stage(frame, stage):
+        if frame[0, 0, 0] == 3:
+            time.sleep(0.5)
+        return run_stage(frame, stage)
+    monkeypatch.setattr(engine, 'run_stage', slow_stage)
+    pipeline = VideoPipeline(['negative_transform'], workers=3, queue_size=2)
+    assert pipeline.run(str(source), str(tmp_path / 'out'))['frames'] == 40
+    assert 0 < pipeline.peak_pending <= pipeline.queue_size + pipeline.workers
+    written = sorted(os.listdir(tmp_path / 'out'))
+    assert [int(image_io.read_image(str(tmp_path / 'out' / name))[0, 0, 0]) for name in written] == [255 - i for i in range(40)]
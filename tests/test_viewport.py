@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def renderer(gui, monkeypatch):
+    # PhotoImage needs a Tk interpreter; the cache only has to hold on to whatever render returns.
+    monkeypatch.setattr(gui.ImageTk, 'PhotoImage', lambda image: image)
+    return gui.ViewportRenderer(cache_size=2)
+
+def _pyramid(gui, img):
+    pyramid = gui.ImagePyramid(tile_size=32, min_size=16)
+    pyramid.set_image(img)
+    return pyramid
+
+def test_viewport_of_a_smaller_image_is_all_of_it(gui):
+    rect, offset = gui.ViewportRenderer.viewport((100, 200), 1.0, (400, 300))
+    assert rect == (0, 0, 200, 100)
+    assert offset == (100, 100)
+
+def test_viewport_of_a_zoomed_image_is_the_visible_part(gui):
+    rect, offset = gui.ViewportRenderer.viewport((1000, 1000), 2.0, (400, 300))
+    assert offset == (-800, -850)
+    assert rect == (400, 425, 600, 575)
+
+def test_visible_region_at_full_zoom_is_a_crop(gui, renderer, color):
+    pixels, left, top, origin = renderer.visible_region(_pyramid(gui, color), 1.0, (64, 48), True)
+    x0, y0 = origin
+    assert np.array_equal(pixels, color[y0:y0 + pixels.shape[0], x0:x0 + pixels.shape[1]])
+    assert (left, top) == (0, 0)
+
+def test_zoomed_out_region_has_display_size(gui, renderer, color):
+    pixels, left, top, _ = renderer.visible_region(_pyramid(gui, color), 0.25, (400, 300), True)
+    assert pixels.shape[:2] == (24, 32)
+    assert (left, top) == (184, 138)
+
+def test_render_caches_frames_per_version(gui, renderer, color):
+    pyramid = _pyramid(gui, color)
+    first = renderer.render(pyramid, 1, 1.0, (64, 48), True)
+    assert renderer.render(pyramid, 1, 1.0, (64, 48), True) is first
+    renderer.render(pyramid, 2, 1.0, (64, 48), True)
+    assert renderer.cached(1, 1.0, (64, 48), True) is None
+    for zoom in (0.5, 0.75, 1.5):
+        renderer.render(pyramid, 2, zoom, (64, 48), True)
+    assert len(renderer.cache) == 2